@@ -0,0 +1,177 @@
+"""Sincronização incremental: chamados alterados e excluídos desde uma marca
+
+`GET /api/chamados/alteracoes/?desde=<marca>` devolve os chamados criados ou
+alterados depois da marca (pelo índice em `(atualizado_em, id)`), os
+excluídos (pelo registro `ChamadoExcluido`) e a marca seguinte. O custo
+acompanha o número de alterações, não o tamanho da tabela.
+
+A marca é opaca para o cliente e guarda a posição `(data, id)` lida em cada
+sequência. `atualizado_em` é carimbado antes do commit, então uma transação
+em andamento pode gravar uma data que outro cliente já ultrapassou; por
+isso a marca nunca passa de `agora - JANELA` e as linhas mais recentes são
+reenviadas na consulta seguinte. O cliente aplica tudo por `id` (upsert),
+então repetições são inofensivas.
+
+Sem `desde` a resposta começa do primeiro chamado (carga inicial), em
+lotes de até LIMITE enquanto `tem_mais` for verdadeiro. Marcas anteriores à
+retenção do registro de exclusões (`CHAMADOS_EXCLUSOES_DIAS`) não são
+aceitas: o cliente precisa recarregar tudo.
+"""
+import base64
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import models
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import serializers
+
+from .models import Chamado, ChamadoExcluido
+from .projecoes import ChamadoListProjecao
+
+LIMITE = 500
+
+# Duração máxima esperada de uma transação que altera chamados
+JANELA = timedelta(seconds=5)
+
+
+class MarcaInvalida(Exception):
+    """A marca não foi gerada por este endpoint"""
+
+
+class MarcaExpirada(Exception):
+    """A marca é anterior às exclusões ainda registradas"""
+
+
+def retencao_exclusoes():
+    return timedelta(days=getattr(settings, 'CHAMADOS_EXCLUSOES_DIAS', 90))
+
+
+@receiver(post_delete, sender=Chamado)
+def _registrar_exclusao(sender, instance, using, **kwargs):
+    # post_delete cobre também QuerySet.delete() e a exclusão pelo admin
+    ChamadoExcluido.objects.using(using).create(
+        chamado_id=instance.pk, numero=instance.numero)
+
+
+def codificar_marca(alteracoes, exclusoes):
+    conteudo = json.dumps({
+        'a': [alteracoes[0].isoformat(), alteracoes[1]] if alteracoes else None,
+        'e': [exclusoes[0].isoformat(), exclusoes[1]],
+    }, separators=(',', ':'))
+    return base64.urlsafe_b64encode(conteudo.encode()).decode()
+
+
+def decodificar_marca(marca):
+    """(posição das alterações ou None, posição das exclusões)"""
+    try:
+        conteudo = json.loads(base64.urlsafe_b64decode(marca.encode()))
+        posicoes = []
+        for chave in ('a', 'e'):
+            valor = conteudo[chave]
+            if valor is None and chave == 'a':
+                posicoes.append(None)
+                continue
+            data = parse_datetime(valor[0])
+            if (data is None or timezone.is_naive(data) or
+                    not isinstance(valor[1], int)):
+                raise ValueError(valor)
+            posicoes.append((data, valor[1]))
+    except (TypeError, ValueError, KeyError, IndexError):
+        raise MarcaInvalida(marca)
+    return tuple(posicoes)
+
+
+def _depois_de(queryset, campo, posicao, limite):
+    """Até `limite + 1` linhas em ordem `(campo, id)` após a posição"""
+    if posicao is not None:
+        data, pk = posicao
+        # O limite não estrito isolado deixa o banco usar o índice como
+        # intervalo (como em KeysetPagination.seek_filter)
+        queryset = queryset.filter(
+            models.Q(**{f'{campo}__gte': data}) & (
+                models.Q(**{f'{campo}__gt': data}) |
+                models.Q(**{campo: data, 'id__gt': pk})
+            )
+        )
+    return list(queryset.order_by(campo, 'id')[:limite + 1])
+
+
+def _proxima(anterior, ultima, tem_mais, teto):
+    """Posição seguinte e se ainda há o que ler agora
+
+    A marca nunca passa do teto da janela. Um lote cheio que termina depois
+    do teto já entregou tudo até ele; o restante é recente e volta na
+    próxima sincronização, então não há mais o que ler agora.
+    """
+    if tem_mais and ultima > teto:
+        proxima, tem_mais = teto, False
+    else:
+        proxima = ultima if tem_mais else teto
+    if anterior is not None and anterior > proxima:
+        return anterior, tem_mais
+    return proxima, tem_mais
+
+
+def alteracoes_desde(marca=None, limite=LIMITE, agora=None):
+    """Alterações e exclusões após a marca, com a marca seguinte
+
+    Levanta MarcaInvalida ou MarcaExpirada.
+    """
+    agora = agora or timezone.now()
+    teto = (agora - JANELA, 0)
+    if marca:
+        alteracoes, exclusoes = decodificar_marca(marca)
+        if exclusoes[0] < agora - retencao_exclusoes():
+            raise MarcaExpirada(marca)
+    else:
+        # Carga inicial: todos os chamados; exclusões só a partir de agora
+        alteracoes, exclusoes = None, teto
+
+    linhas = _depois_de(
+        ChamadoListProjecao.projetar(Chamado.objects.all()),
+        'atualizado_em', alteracoes, limite)
+    excluidos = _depois_de(
+        ChamadoExcluido.objects.values('id', 'chamado_id', 'numero', 'excluido_em'),
+        'excluido_em', exclusoes, limite)
+
+    mais_alteracoes = len(linhas) > limite
+    mais_exclusoes = len(excluidos) > limite
+    linhas = linhas[:limite]
+    excluidos = excluidos[:limite]
+
+    nova_alteracoes, mais_alteracoes = _proxima(
+        alteracoes,
+        (linhas[-1]['atualizado_em'], linhas[-1]['id']) if linhas else None,
+        mais_alteracoes, teto)
+    nova_exclusoes, mais_exclusoes = _proxima(
+        exclusoes,
+        (excluidos[-1]['excluido_em'], excluidos[-1]['id']) if excluidos else None,
+        mais_exclusoes, teto)
+
+    data_hora = serializers.DateTimeField().to_representation
+    return {
+        'alteracoes': ChamadoListProjecao(linhas, many=True).data,
+        'exclusoes': [
+            {
+                'id': excluido['chamado_id'],
+                'numero': excluido['numero'],
+                'excluido_em': data_hora(excluido['excluido_em']),
+            }
+            for excluido in excluidos
+        ],
+        'desde': codificar_marca(nova_alteracoes, nova_exclusoes),
+        'tem_mais': mais_alteracoes or mais_exclusoes,
+    }
+
+
+def limpar_exclusoes(dias=None, agora=None):
+    """Remove registros de exclusão mais antigos que a retenção"""
+    agora = agora or timezone.now()
+    retencao = timedelta(days=dias) if dias is not None else retencao_exclusoes()
+    removidos, _ = ChamadoExcluido.objects.filter(
+        excluido_em__lt=agora - retencao).delete()
+    return removidos
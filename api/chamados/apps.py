@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class ChamadosConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'chamados'
+
+    def ready(self):
+        # Conecta os sinais do cache de referência, do registro de exclusões
+        # e dos eventos em tempo real
+        from . import alteracoes, eventos, referencia  # noqa: F401
@@ -0,0 +1,14 @@
+"""Recursos dos bancos usados pelas escritas em SQL direto"""
+
+
+def suporta_update_returning(conexao):
+    """UPDATE ... RETURNING: PostgreSQL e SQLite 3.35+
+
+    `can_return_columns_from_insert` não serve: o MariaDB tem INSERT
+    RETURNING mas não UPDATE RETURNING.
+    """
+    if conexao.vendor == 'postgresql':
+        return True
+    if conexao.vendor == 'sqlite':
+        return conexao.Database.sqlite_version_info >= (3, 35, 0)
+    return False
@@ -0,0 +1,113 @@
+"""Busca textual de chamados
+
+No PostgreSQL os chamados têm uma coluna `busca_vetor` (tsvector ponderado,
+gerada pelo banco) com índice GIN e a configuração `portuguese_unaccent`
+(stemming em português sem acentos). No SQLite uma tabela FTS5 externa
+(`chamados_busca`), mantida por triggers, indexa as mesmas colunas com o
+tokenizador `unicode61 remove_diacritics 2`; como o FTS5 não tem stemmer
+para português, cada palavra é buscada como prefixo.
+
+Os dois backends anotam `busca_rank` (maior é mais relevante). Termos que
+parecem um número de chamado (`123`, `#00123`) viram uma busca exata pelo
+índice único de `numero`.
+"""
+import re
+
+from django.db import connections, models
+from django.db.models.expressions import RawSQL
+
+# Pesos por coluna, do mais relevante para o menos relevante
+PESOS = (
+    ('numero', 'A', 10.0),
+    ('titulo', 'A', 10.0),
+    ('equipamento', 'B', 4.0),
+    ('localizacao', 'C', 2.0),
+    ('descricao', 'D', 1.0),
+)
+
+NUMERO_RE = re.compile(r'^#?(\d{1,10})$')
+PALAVRA_RE = re.compile(r'\w+')
+
+CONFIGURACAO_PG = 'portuguese_unaccent'
+TABELA_FTS = 'chamados_busca'
+
+
+def normalizar_numero(termo):
+    """Retorna o `numero` do chamado se o termo parecer um, senão None"""
+    match = NUMERO_RE.match(termo)
+    if not match:
+        return None
+    return match.group(1).zfill(5)
+
+
+def _buscar_postgresql(queryset, termo):
+    tabela = queryset.model._meta.db_table
+    consulta = f"websearch_to_tsquery('{CONFIGURACAO_PG}', %s)"
+    return queryset.annotate(
+        busca_rank=RawSQL(
+            f'ts_rank_cd("{tabela}"."busca_vetor", {consulta})',
+            [termo], output_field=models.FloatField()
+        )
+    ).filter(
+        RawSQL(
+            f'"{tabela}"."busca_vetor" @@ {consulta}',
+            [termo], output_field=models.BooleanField()
+        )
+    )
+
+
+def _consulta_fts5(termo):
+    """Converte o texto livre numa consulta FTS5 segura (E entre prefixos)"""
+    palavras = PALAVRA_RE.findall(termo)
+    return ' '.join(f'"{palavra}"*' for palavra in palavras)
+
+
+def _buscar_sqlite(queryset, termo):
+    consulta = _consulta_fts5(termo)
+    if not consulta:
+        return queryset.none()
+
+    tabela = queryset.model._meta.db_table
+    pesos = ', '.join(str(peso) for _, _, peso in PESOS)
+    return queryset.annotate(
+        busca_rank=RawSQL(
+            f'(SELECT -bm25({TABELA_FTS}, {pesos}) FROM {TABELA_FTS} '
+            f'WHERE {TABELA_FTS} MATCH %s '
+            f'AND {TABELA_FTS}.rowid = "{tabela}"."id")',
+            [consulta], output_field=models.FloatField()
+        )
+    ).filter(
+        RawSQL(
+            f'"{tabela}"."id" IN (SELECT rowid FROM {TABELA_FTS} '
+            f'WHERE {TABELA_FTS} MATCH %s)',
+            [consulta], output_field=models.BooleanField()
+        )
+    )
+
+
+def _buscar_icontains(queryset, termo):
+    condicao = models.Q()
+    for campo, _, _ in PESOS:
+        condicao |= models.Q(**{f'{campo}__icontains': termo})
+    return queryset.filter(condicao)
+
+
+BACKENDS = {
+    'postgresql': _buscar_postgresql,
+    'sqlite': _buscar_sqlite,
+}
+
+
+def buscar_chamados(queryset, termo):
+    """Filtra o queryset pelo termo e anota `busca_rank` quando disponível"""
+    termo = (termo or '').strip()
+    if not termo:
+        return queryset
+
+    numero = normalizar_numero(termo)
+    if numero:
+        return queryset.filter(numero=numero)
+
+    vendor = connections[queryset.db].vendor
+    backend = BACKENDS.get(vendor, _buscar_icontains)
+    return backend(queryset, termo)
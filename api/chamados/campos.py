@@ -0,0 +1,144 @@
+"""Campos esparsos (`?fields=`) e expansão de relações (`?expand=`)
+
+Sem `fields` a resposta é a de sempre. Com `?fields=id,numero,status` só os
+campos pedidos são serializados e o queryset lê só as colunas que eles usam.
+As relações listadas em `Meta.expansiveis` (chaves estrangeiras com
+serializer aninhado) saem como o id, sem JOIN, a menos que também estejam em
+`?expand=`. Relações reversas (anexos, histórico) só são pré-carregadas
+quando pedidas.
+
+    GET /api/chamados/?fields=id,numero,status,tecnico_responsavel
+    GET /api/chamados/42/?fields=id,status,historico&expand=solicitante
+
+No serializer:
+
+    class Meta:
+        colunas = {'status_display': ['status']}  # campo -> colunas lidas
+        expansiveis = ['tecnico_responsavel']      # FK: id ou aninhado
+        prefetch = {'historico': 'historico'}      # campo -> relação reversa
+
+Campos sem entrada em `colunas` leem a coluna de mesmo nome.
+"""
+from rest_framework import serializers
+
+PARAMETRO_CAMPOS = 'fields'
+PARAMETRO_EXPANDIR = 'expand'
+
+
+def _lista(valor):
+    return [item.strip() for item in valor.split(',') if item.strip()]
+
+
+def campos_da_requisicao(request):
+    """(campos, expandir) pedidos na query string; campos None = todos"""
+    if request is None:
+        return None, set()
+    params = request.query_params
+    if PARAMETRO_CAMPOS not in params:
+        return None, set(_lista(params.get(PARAMETRO_EXPANDIR, '')))
+    return (
+        _lista(params[PARAMETRO_CAMPOS]),
+        set(_lista(params.get(PARAMETRO_EXPANDIR, '')))
+    )
+
+
+def relacoes_das_colunas(colunas):
+    """Relações a juntar com select_related para ler as colunas dadas"""
+    relacoes = []
+    for coluna in colunas:
+        if '__' in coluna:
+            relacao = coluna.rsplit('__', 1)[0]
+            if relacao not in relacoes:
+                relacoes.append(relacao)
+    return relacoes
+
+
+def projetar(queryset, colunas):
+    """Junta as relações necessárias e restringe o SELECT às colunas"""
+    relacoes = relacoes_das_colunas(colunas)
+    if relacoes:
+        # select_related() sem argumentos seguiria todas as chaves
+        queryset = queryset.select_related(*relacoes)
+    return queryset.only(queryset.model._meta.pk.name, *colunas)
+
+
+class CamposDinamicosMixin:
+    """Serializer que respeita `?fields=` e `?expand=` quando é a raiz"""
+
+    def eh_raiz(self):
+        pai = self.parent
+        if isinstance(pai, serializers.ListSerializer):
+            pai = pai.parent
+        return pai is None
+
+    def get_fields(self):
+        campos = super().get_fields()
+        if not self.eh_raiz():
+            return campos
+
+        pedidos, expandir = campos_da_requisicao(self.context.get('request'))
+        if pedidos is None:
+            return campos
+
+        selecionados = self.selecionar(pedidos, expandir)
+        for nome in list(campos):
+            if nome not in selecionados:
+                del campos[nome]
+            elif (nome in self.expansiveis() and nome not in expandir):
+                campos[nome] = serializers.PrimaryKeyRelatedField(
+                    read_only=True, source=campos[nome].source)
+        return campos
+
+    @classmethod
+    def expansiveis(cls):
+        return getattr(cls.Meta, 'expansiveis', [])
+
+    @classmethod
+    def selecionar(cls, pedidos, expandir):
+        """Campos do Meta.fields presentes em `pedidos` ou em `expandir`"""
+        desejados = set(pedidos) | set(expandir)
+        return [nome for nome in cls.Meta.fields if nome in desejados]
+
+    @classmethod
+    def plano(cls, pedidos=None, expandir=()):
+        """(colunas, relações reversas) necessárias para os campos pedidos
+
+        `pedidos` None significa todos os campos com as relações aninhadas.
+        """
+        if pedidos is None:
+            selecionados = list(cls.Meta.fields)
+            expandir = set(cls.expansiveis())
+        else:
+            selecionados = cls.selecionar(pedidos, expandir)
+
+        colunas_meta = getattr(cls.Meta, 'colunas', {})
+        prefetch_meta = getattr(cls.Meta, 'prefetch', {})
+        colunas = []
+        reversas = []
+        for nome in selecionados:
+            if nome in prefetch_meta:
+                if prefetch_meta[nome] not in reversas:
+                    reversas.append(prefetch_meta[nome])
+            elif nome in cls.expansiveis():
+                if nome in expandir:
+                    aninhado = cls._declared_fields[nome].__class__
+                    # A chave primária da relação vem sempre com o JOIN
+                    pk = aninhado.Meta.model._meta.pk.name
+                    colunas.extend(
+                        f'{nome}__{coluna}'
+                        for coluna in aninhado.plano()[0] if coluna != pk
+                    )
+                else:
+                    colunas.append(nome)
+            else:
+                colunas.extend(colunas_meta.get(nome, [nome]))
+
+        return list(dict.fromkeys(colunas)), reversas
+
+    @classmethod
+    def plano_da_requisicao(cls, request):
+        """Plano para a requisição, ou None se ela não pediu `fields`"""
+        pedidos, expandir = campos_da_requisicao(request)
+        if pedidos is None:
+            return None
+        return cls.plano(pedidos, expandir)
@@ -0,0 +1,457 @@
+"""Geração de dados sintéticos em volume para testes de capacidade
+
+`manage.py gerar_carga` cria usuários, chamados, histórico e metadados de
+anexos com distribuições próximas das reais: status conforme a idade do
+chamado, prioridades desiguais, técnicos e solicitantes com cargas
+desiguais (poucos concentram muitos chamados), históricos de tamanho
+variável e anexos sem arquivo físico.
+
+Os chamados são montados em lotes de `tamanho_lote`, cada um com o próprio
+gerador aleatório (`semente:lote`), e gravados com `bulk_create` por vários
+processos. O conteúdo depende só da semente, do tamanho do lote e do dia da
+execução; ids e números dependem da ordem em que os lotes são gravados.
+
+`bulk_create` não emite sinais: ao final os contadores do dashboard são
+recalculados e o cache de referência é invalidado. A busca textual acompanha
+(coluna gerada no PostgreSQL, triggers no SQLite). No SQLite os processos
+montam os lotes em paralelo, mas as escritas são serializadas pelo banco.
+
+`criar_dados_exemplo` continua sendo o caminho para a demonstração: poucos
+usuários com logins conhecidos e chamados escritos à mão, um `create()` por
+vez. A carga não depende dele; sem tipos de serviço, roda
+`criar_tipos_servico`.
+"""
+import itertools
+import math
+import multiprocessing
+import random
+from contextlib import contextmanager, nullcontext
+from datetime import timedelta
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.db import connections, router, transaction
+from django.utils import timezone
+
+from usuarios.models import Usuario
+
+from . import contadores, numeracao, referencia
+from .models import AnexoChamado, Chamado, HistoricoChamado, TipoServico
+
+SENHA_PADRAO = 'senha123'
+
+NOMES = (
+    'Ana', 'Bruno', 'Carla', 'Daniel', 'Eduarda', 'Felipe', 'Gabriela',
+    'Henrique', 'Isabela', 'João', 'Larissa', 'Lucas', 'Mariana', 'Mateus',
+    'Natália', 'Paulo', 'Rafaela', 'Rodrigo', 'Sofia', 'Thiago', 'Vanessa',
+)
+SOBRENOMES = (
+    'Almeida', 'Barbosa', 'Cardoso', 'Costa', 'Dias', 'Ferreira', 'Gomes',
+    'Lima', 'Martins', 'Melo', 'Oliveira', 'Pereira', 'Ribeiro', 'Rocha',
+    'Santos', 'Silva', 'Souza',
+)
+DEPARTAMENTOS = (
+    'Financeiro', 'Recursos Humanos', 'Comercial', 'Jurídico', 'Compras',
+    'Logística', 'Marketing', 'Diretoria', 'Atendimento', 'TI',
+)
+
+PROBLEMAS = (
+    'não liga', 'está lento', 'apresenta erro ao iniciar', 'sem acesso à rede',
+    'travando com frequência', 'não imprime', 'sem som', 'tela piscando',
+    'não reconhece o dispositivo', 'pede atualização', 'perdeu a configuração',
+)
+EQUIPAMENTOS = (
+    'Computador', 'Notebook', 'Impressora', 'Monitor', 'Roteador', 'Telefone IP',
+    'Scanner', 'Servidor de arquivos', 'Switch', 'Projetor', 'Nobreak',
+)
+LOCAIS = ('Sala', 'Andar', 'Bloco', 'Recepção', 'Almoxarifado', 'Auditório')
+DETALHES = (
+    'O problema começou hoje pela manhã.',
+    'Já tentei reiniciar e não resolveu.',
+    'Acontece em mais de um usuário do setor.',
+    'Preciso com urgência para fechar o mês.',
+    'O erro aparece depois da última atualização.',
+    'Funciona por alguns minutos e volta a falhar.',
+)
+OBSERVACOES = (
+    'Equipamento reiniciado e testado.',
+    'Driver reinstalado.',
+    'Cabo de rede substituído.',
+    'Aguardando peça de reposição.',
+    'Usuário orientado sobre o procedimento.',
+    'Configuração restaurada a partir do backup.',
+    'Encaminhado ao fornecedor.',
+)
+ARQUIVOS = (
+    ('print_erro.png', 'image/png', 250_000),
+    ('foto_equipamento.jpg', 'image/jpeg', 1_500_000),
+    ('log_sistema.txt', 'text/plain', 40_000),
+    ('relatorio.pdf', 'application/pdf', 800_000),
+    ('planilha.xlsx',
+     'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+     120_000),
+)
+
+PRIORIDADES = (('baixa', 30), ('media', 45), ('alta', 20), ('urgente', 5))
+# Horas médias até o atendimento e até o encerramento, por prioridade
+PRAZOS = {'baixa': (24, 72), 'media': (8, 36), 'alta': (3, 16), 'urgente': (1, 6)}
+# Distribuição de status pela idade do chamado (dias)
+STATUS_POR_IDADE = (
+    (2, (('aberto', 60), ('em_atendimento', 35), ('encerrado', 4), ('cancelado', 1))),
+    (14, (('aberto', 20), ('em_atendimento', 35), ('encerrado', 40), ('cancelado', 5))),
+    (None, (('aberto', 3), ('em_atendimento', 7), ('encerrado', 82), ('cancelado', 8))),
+)
+# Chamados abertos por hora do dia (expediente concentra a demanda)
+PESOS_HORA = (
+    1, 1, 1, 1, 1, 1, 2, 6, 12, 14, 13, 10, 6, 10, 13, 12, 10, 7, 3, 2, 2, 1, 1, 1)
+
+
+def _pesos_acumulados(total, expoente):
+    """Pesos de Zipf acumulados: o i-ésimo item tem peso 1/(i+1)^expoente"""
+    return list(itertools.accumulate(
+        1 / (posicao + 1) ** expoente for posicao in range(total)))
+
+
+def _escolher(rng, opcoes):
+    valores, pesos = zip(*opcoes)
+    return rng.choices(valores, weights=pesos)[0]
+
+
+def _poisson(rng, media):
+    """Sorteio de Poisson (Knuth; aproximação normal para médias altas)"""
+    if media <= 0:
+        return 0
+    if media > 30:
+        return max(0, round(rng.gauss(media, math.sqrt(media))))
+    limite, produto, total = math.exp(-media), rng.random(), 0
+    while produto > limite:
+        produto *= rng.random()
+        total += 1
+    return total
+
+
+def _nome(rng):
+    return f'{rng.choice(NOMES)} {rng.choice(SOBRENOMES)} {rng.choice(SOBRENOMES)}'
+
+
+@contextmanager
+def datas_explicitas():
+    """Desliga auto_now/auto_now_add para gravar as datas geradas"""
+    campos = [
+        Chamado._meta.get_field('criado_em'),
+        Chamado._meta.get_field('atualizado_em'),
+        HistoricoChamado._meta.get_field('criado_em'),
+        AnexoChamado._meta.get_field('criado_em'),
+        Usuario._meta.get_field('criado_em'),
+        Usuario._meta.get_field('atualizado_em'),
+    ]
+    originais = [(campo.auto_now, campo.auto_now_add) for campo in campos]
+    for campo in campos:
+        campo.auto_now = campo.auto_now_add = False
+    try:
+        yield
+    finally:
+        for campo, (auto_now, auto_now_add) in zip(campos, originais):
+            campo.auto_now, campo.auto_now_add = auto_now, auto_now_add
+
+
+def garantir_usuarios(total, prefixo, semente, agora, percentual_tecnicos=5):
+    """Cria os usuários `prefixo0000000`... que faltam; retorna (solicitantes, técnicos)
+
+    Os primeiros `percentual_tecnicos`% são técnicos. Todos usam a senha
+    SENHA_PADRAO (um único hash, calculado uma vez).
+    """
+    rng = random.Random(f'{semente}:usuarios')
+    tecnicos = max(1, total * percentual_tecnicos // 100)
+    existentes = set(Usuario.objects.filter(
+        username__startswith=prefixo).values_list('username', flat=True))
+    senha = make_password(SENHA_PADRAO)
+
+    novos = []
+    for posicao in range(total):
+        # Sorteia mesmo para os existentes: o mesmo usuário sai igual
+        nome = _nome(rng)
+        departamento = rng.choice(DEPARTAMENTOS)
+        telefone = f'(11) 9{rng.randrange(10**7, 10**8)}'
+        criado_em = agora - timedelta(days=rng.uniform(30, 1500))
+        username = f'{prefixo}{posicao:07d}'
+        if username in existentes:
+            continue
+        novos.append(Usuario(
+            username=username,
+            email=f'{username}@exemplo.com.br',
+            password=senha,
+            nome_completo=nome,
+            departamento='TI' if posicao < tecnicos else departamento,
+            telefone=telefone,
+            tipo_usuario='tecnico' if posicao < tecnicos else 'usuario',
+            criado_em=criado_em,
+            atualizado_em=criado_em,
+        ))
+    with datas_explicitas():
+        Usuario.objects.bulk_create(novos, batch_size=2000)
+
+    ids = dict(Usuario.objects.filter(
+        username__startswith=prefixo).values_list('username', 'id'))
+    nomes = sorted(ids)[:total]
+    return (
+        [ids[nome] for nome in nomes[tecnicos:]] or [ids[nomes[0]]],
+        [ids[nome] for nome in nomes[:tecnicos]],
+    )
+
+
+class Contexto:
+    """Parâmetros compartilhados pelos lotes (enviados uma vez a cada processo)"""
+
+    def __init__(self, semente, total, tamanho_lote, solicitantes, tecnicos,
+                 tipos, agora, dias=365, historico=6.0, anexos=0.3):
+        self.semente = semente
+        self.total = total
+        self.tamanho_lote = tamanho_lote
+        self.solicitantes = solicitantes
+        self.tecnicos = tecnicos
+        self.tipos = tipos
+        self.agora = agora
+        self.dias = dias
+        self.historico = historico
+        self.anexos = anexos
+        self.pesos_solicitantes = _pesos_acumulados(len(solicitantes), 0.6)
+        self.pesos_tecnicos = _pesos_acumulados(len(tecnicos), 0.8)
+        self.pesos_tipos = _pesos_acumulados(len(tipos), 1.0)
+
+    @property
+    def lotes(self):
+        return -(-self.total // self.tamanho_lote)
+
+
+def _instante(rng, agora, dias):
+    """Data de abertura: dia uniforme no período, hora pelo expediente"""
+    dia = (agora - timedelta(days=rng.randrange(dias))).replace(
+        hour=0, minute=0, second=0, microsecond=0)
+    hora = rng.choices(range(24), weights=PESOS_HORA)[0]
+    instante = dia + timedelta(hours=hora, seconds=rng.randrange(3600))
+    return min(instante, agora - timedelta(minutes=1))
+
+
+def _status(rng, idade_dias):
+    for limite, opcoes in STATUS_POR_IDADE:
+        if limite is None or idade_dias < limite:
+            return _escolher(rng, opcoes)
+
+
+def _depois(rng, inicio, horas_medias, limite):
+    return min(inicio + timedelta(hours=rng.expovariate(1 / horas_medias)), limite)
+
+
+def montar_lote(contexto, indice):
+    """Chamados do lote `indice` com seus históricos e anexos (não gravados)
+
+    Retorna a lista de (chamado, históricos, anexos); o número e as chaves
+    do chamado nos filhos são preenchidos na gravação.
+    """
+    rng = random.Random(f'{contexto.semente}:{indice}')
+    agora = contexto.agora
+    inicio = indice * contexto.tamanho_lote
+    quantidade = min(contexto.tamanho_lote, contexto.total - inicio)
+
+    itens = []
+    for _ in range(quantidade):
+        criado_em = _instante(rng, agora, contexto.dias)
+        status = _status(rng, (agora - criado_em).days)
+        prioridade = _escolher(rng, PRIORIDADES)
+        ate_atender, ate_encerrar = PRAZOS[prioridade]
+        solicitante = rng.choices(
+            contexto.solicitantes, cum_weights=contexto.pesos_solicitantes)[0]
+        tecnico = None
+        if status != 'aberto' and not (status == 'cancelado' and rng.random() < 0.5):
+            tecnico = rng.choices(
+                contexto.tecnicos, cum_weights=contexto.pesos_tecnicos)[0]
+        equipamento = rng.choice(EQUIPAMENTOS)
+
+        atendido_em = encerrado_em = None
+        if tecnico is not None:
+            atendido_em = _depois(rng, criado_em, ate_atender, agora)
+        if status in ('encerrado', 'cancelado'):
+            encerrado_em = _depois(rng, atendido_em or criado_em, ate_encerrar, agora)
+
+        chamado = Chamado(
+            titulo=f'{equipamento} {rng.choice(PROBLEMAS)}',
+            descricao=' '.join(rng.sample(DETALHES, rng.randint(1, 3))),
+            tipo_servico_id=rng.choices(
+                contexto.tipos, cum_weights=contexto.pesos_tipos)[0],
+            status=status,
+            prioridade=prioridade,
+            equipamento=(
+                f'{equipamento} {rng.randrange(1, 500):03d}'
+                if rng.random() < 0.7 else None),
+            localizacao=(
+                f'{rng.choice(LOCAIS)} {rng.randrange(1, 40)}'
+                if rng.random() < 0.6 else None),
+            solicitante_id=solicitante,
+            tecnico_responsavel_id=tecnico,
+            observacoes_tecnico=(
+                rng.choice(OBSERVACOES) if status == 'encerrado' else None),
+            criado_em=criado_em,
+            atendido_em=atendido_em,
+            encerrado_em=encerrado_em,
+        )
+        historico, anexos = _eventos(rng, contexto, chamado)
+        chamado.atualizado_em = max(
+            [criado_em, *(h.criado_em for h in historico)])
+        itens.append((chamado, historico, anexos))
+    return itens
+
+
+def _eventos(rng, contexto, chamado):
+    """Histórico (criação, atribuição, mudanças de status, observações) e anexos"""
+    fim = chamado.encerrado_em or contexto.agora
+    historico = [HistoricoChamado(
+        tipo_acao='criado', descricao='Chamado criado',
+        usuario_id=chamado.solicitante_id, criado_em=chamado.criado_em)]
+
+    tecnico = chamado.tecnico_responsavel_id
+    if tecnico is not None:
+        historico.append(HistoricoChamado(
+            tipo_acao='tecnico_atribuido', descricao='Técnico atribuído ao chamado',
+            usuario_id=tecnico, criado_em=chamado.atendido_em))
+        historico.append(HistoricoChamado(
+            tipo_acao='status_alterado',
+            descricao='Status alterado de Aberto para Em Atendimento',
+            usuario_id=tecnico, criado_em=chamado.atendido_em))
+    if chamado.status in ('encerrado', 'cancelado'):
+        historico.append(HistoricoChamado(
+            tipo_acao='status_alterado',
+            descricao=(
+                f'Status alterado de {"Em Atendimento" if tecnico else "Aberto"} '
+                f'para {chamado.get_status_display()}'),
+            usuario_id=tecnico or chamado.solicitante_id,
+            criado_em=chamado.encerrado_em))
+
+    # Observações: Poisson com média para o total chegar a `historico`
+    observacoes = _poisson(rng, contexto.historico - len(historico))
+    inicio_trabalho = chamado.atendido_em or chamado.criado_em
+    for _ in range(observacoes):
+        autor = tecnico if tecnico is not None and rng.random() < 0.7 \
+            else chamado.solicitante_id
+        historico.append(HistoricoChamado(
+            tipo_acao='observacao_adicionada', descricao=rng.choice(OBSERVACOES),
+            usuario_id=autor,
+            criado_em=inicio_trabalho + (fim - inicio_trabalho) * rng.random()))
+
+    anexos = []
+    quantidade = _poisson(rng, contexto.anexos)
+    for posicao in range(quantidade):
+        nome, tipo, tamanho = rng.choice(ARQUIVOS)
+        enviado_em = chamado.criado_em + (fim - chamado.criado_em) * rng.random()
+        nome = f'{posicao + 1}_{nome}'
+        anexos.append(AnexoChamado(
+            arquivo=nome,  # completado com o número na gravação
+            nome_original=nome,
+            tamanho=max(1, int(rng.lognormvariate(0, 0.8) * tamanho)),
+            tipo_arquivo=tipo,
+            enviado_por_id=chamado.solicitante_id,
+            criado_em=enviado_em,
+        ))
+        historico.append(HistoricoChamado(
+            tipo_acao='anexo_adicionado', descricao=f'Anexo adicionado: {nome}',
+            usuario_id=chamado.solicitante_id, criado_em=enviado_em))
+    return historico, anexos
+
+
+def gravar_lote(itens, using=None):
+    """Grava um lote montado; retorna (chamados, históricos, anexos) gravados"""
+    alias = using or router.db_for_write(Chamado)
+    chamados = [chamado for chamado, _, _ in itens]
+    # Reserva fora da transação do lote (no SQLite a reserva faz a própria)
+    for chamado, valor in zip(chamados, numeracao.reservar(len(chamados), using=alias)):
+        chamado.numero = numeracao.formatar(valor)
+
+    with datas_explicitas(), transaction.atomic(using=alias):
+        Chamado.objects.using(alias).bulk_create(chamados)
+        if any(chamado.pk is None for chamado in chamados):
+            # Banco sem RETURNING no INSERT em lote
+            ids = dict(Chamado.objects.using(alias).filter(
+                numero__in=[chamado.numero for chamado in chamados]
+            ).values_list('numero', 'id'))
+            for chamado in chamados:
+                chamado.pk = ids[chamado.numero]
+
+        historicos, anexos = [], []
+        for chamado, historico, anexos_chamado in itens:
+            for entrada in historico:
+                entrada.chamado_id = chamado.pk
+            for anexo in anexos_chamado:
+                anexo.chamado_id = chamado.pk
+                anexo.arquivo = f'chamados/{chamado.numero}/anexos/{anexo.arquivo}'
+            historicos.extend(historico)
+            anexos.extend(anexos_chamado)
+        HistoricoChamado.objects.using(alias).bulk_create(historicos, batch_size=5000)
+        AnexoChamado.objects.using(alias).bulk_create(anexos, batch_size=5000)
+    return len(chamados), len(historicos), len(anexos)
+
+
+def _preparar_conexao(using=None):
+    conexao = connections[using or router.db_for_write(Chamado)]
+    # PRAGMAs não podem mudar dentro de uma transação (ex.: nos testes)
+    if conexao.vendor == 'sqlite' and not conexao.in_atomic_block:
+        with conexao.cursor() as cursor:
+            # Espera a vez de escrever em vez de falhar com "database is
+            # locked"; a durabilidade de cada lote não importa aqui
+            cursor.execute('PRAGMA busy_timeout = 600000')
+            cursor.execute('PRAGMA synchronous = OFF')
+
+
+_contexto = None
+_trava_escrita = None
+
+
+def iniciar_processo(contexto, trava_escrita):
+    """Inicializador de cada processo do pool"""
+    global _contexto, _trava_escrita
+    # Com spawn (Windows, macOS) o processo começa sem o Django configurado
+    django.setup()
+    _contexto = contexto
+    _trava_escrita = trava_escrita
+    _preparar_conexao()
+
+
+def processar_lote(indice):
+    itens = montar_lote(_contexto, indice)
+    with _trava_escrita or nullcontext():
+        return gravar_lote(itens)
+
+
+def gerar(contexto, processos=1):
+    """Grava todos os lotes; produz (chamados, históricos, anexos) a cada lote"""
+    indices = range(contexto.lotes)
+    if processos <= 1:
+        _preparar_conexao()
+        for indice in indices:
+            yield gravar_lote(montar_lote(contexto, indice))
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        # O SQLite devolve "database is locked" sem esperar quando duas
+        # transações disputam a escrita: os processos montam os lotes em
+        # paralelo e gravam um de cada vez
+        vendor = connections[router.db_for_write(Chamado)].vendor
+        trava = multiprocessing.Lock() if vendor == 'sqlite' else None
+        # Cada processo abre as próprias conexões
+        connections.close_all()
+        with ProcessPoolExecutor(
+                processos, initializer=iniciar_processo,
+                initargs=(contexto, trava)) as pool:
+            yield from pool.map(processar_lote, indices)
+
+    contadores.recalcular()
+    referencia.invalidar()
+
+
+def tipos_servico():
+    return list(TipoServico.objects.filter(ativo=True).order_by('id')
+                .values_list('id', flat=True))
+
+
+def inicio_do_dia():
+    """Referência das datas: início do dia atual (mesmo conteúdo no mesmo dia)"""
+    return timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
@@ -0,0 +1,100 @@
+"""GET condicional (ETag / Last-Modified) para detalhe e listagens de chamados
+
+Os validadores são calculados antes da serialização:
+
+- detalhe: `atualizado_em` do chamado, o último registro de histórico e o
+  último anexo (mais a quantidade de anexos, que cobre remoções), numa
+  consulta pelos índices, antes de carregar histórico e anexos;
+- listagens: o total, os links e o `id`/`atualizado_em` de cada linha da
+  página, lidos pelas mesmas consultas da paginação (nenhuma consulta a
+  mais; o 304 evita a serialização). Só ETag: uma exclusão não avança
+  nenhuma data, então Last-Modified não bastaria para detectá-la.
+
+O ETag também inclui o usuário, a query string (`fields`, página, filtros)
+e o formato negociado. Com `If-None-Match` ou `If-Modified-Since`
+satisfeitos a resposta é 304 sem corpo. Alterações só em dados de outras
+tabelas (nome de um usuário ou do tipo de serviço) não mudam os validadores.
+"""
+import hashlib
+
+from django.db.models import Count, OuterRef, Subquery
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from .models import AnexoChamado, Chamado, HistoricoChamado
+
+
+def _ultimo(modelo):
+    return Subquery(
+        modelo.objects.filter(chamado=OuterRef('pk'))
+        .order_by('-criado_em').values('criado_em')[:1]
+    )
+
+
+def validadores_detalhe(chamado_id):
+    """(partes do ETag, última alteração) do chamado, ou None se não existe"""
+    total_anexos = Subquery(
+        AnexoChamado.objects.filter(chamado=OuterRef('pk')).order_by()
+        .values('chamado').annotate(total=Count('*')).values('total')
+    )
+    linhas = Chamado.objects.filter(pk=chamado_id).order_by().values_list(
+        'atualizado_em', _ultimo(HistoricoChamado), _ultimo(AnexoChamado),
+        total_anexos
+    )[:1]
+    if not linhas:
+        return None
+    linha = linhas[0]
+    datas = [data for data in linha[:3] if data is not None]
+    return linha, max(datas)
+
+
+def validadores_pagina(paginacao, linhas):
+    """Partes do ETag de uma página já lida pela paginação"""
+    return (
+        paginacao.total(),
+        paginacao.get_next_link(),
+        paginacao.get_previous_link(),
+        [
+            (linha['id'], linha['atualizado_em']) if isinstance(linha, dict)
+            else (linha.pk, linha.atualizado_em)
+            for linha in linhas
+        ],
+    )
+
+
+def gerar_etag(request, partes):
+    conteudo = '|'.join(str(parte) for parte in (
+        *partes,
+        getattr(request.user, 'pk', None),
+        request.META.get('QUERY_STRING', ''),
+        getattr(request, 'accepted_media_type', ''),
+    ))
+    return quote_etag(hashlib.sha1(conteudo.encode()).hexdigest())
+
+
+class GetCondicionalMixin:
+    """Responde 304 antes da serialização e anota ETag/Last-Modified"""
+
+    etag = None
+    ultima_alteracao = None
+
+    def resposta_condicional(self, request, partes, ultima_alteracao=None):
+        """304 (ou 412) se as pré-condições da requisição permitirem"""
+        self.etag = gerar_etag(request, partes)
+        self.ultima_alteracao = ultima_alteracao
+        return get_conditional_response(
+            request, etag=self.etag,
+            last_modified=(
+                int(ultima_alteracao.timestamp()) if ultima_alteracao else None)
+        )
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if self.etag and response.status_code in (200, 304):
+            response['ETag'] = self.etag
+            if self.ultima_alteracao:
+                response['Last-Modified'] = http_date(
+                    self.ultima_alteracao.timestamp())
+            # Sempre revalidar: a resposta muda a qualquer momento
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
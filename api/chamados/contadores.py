@@ -0,0 +1,195 @@
+"""Contadores desnormalizados de chamados
+
+`ContadorChamados` guarda quantos chamados existem por status em cada
+dimensão (geral, prioridade, tipo de serviço, solicitante e técnico). Os
+totais são ajustados na mesma transação do `Chamado.save()`/`delete()`, de
+modo que o dashboard lê algumas linhas em vez de contar a tabela inteira.
+
+Escritas que não passam pelo modelo (`QuerySet.update()`, SQL direto) não
+ajustam os contadores; `manage.py recalcular_contadores` os reconstrói e
+verifica.
+"""
+from collections import Counter
+
+from django.db import models, router, transaction
+
+# Dimensão -> atributo do chamado usado como chave
+DIMENSOES = (
+    ('geral', None),
+    ('prioridade', 'prioridade'),
+    ('tipo_servico', 'tipo_servico_id'),
+    ('solicitante', 'solicitante_id'),
+    ('tecnico', 'tecnico_responsavel_id'),
+)
+
+# Atributos do chamado que afetam algum contador
+CAMPOS = ('status',) + tuple(campo for _, campo in DIMENSOES if campo)
+
+PENDENTES = ('aberto', 'em_atendimento')
+
+
+def valores_contados(chamado):
+    """Valores do chamado relevantes para os contadores"""
+    return {campo: getattr(chamado, campo) for campo in CAMPOS}
+
+
+def chaves_contador(valores):
+    """Chaves (dimensao, chave, status) em que o chamado é contado"""
+    chaves = []
+    for dimensao, campo in DIMENSOES:
+        if campo is None:
+            chave = ''
+        elif valores[campo] is None:
+            continue
+        else:
+            chave = str(valores[campo])
+        chaves.append((dimensao, chave, valores['status']))
+    return chaves
+
+
+def registrar_variacao(antes, depois, contador_model=None, using=None):
+    """Aplica aos contadores a troca dos valores `antes` pelos `depois`
+
+    Qualquer um dos dois pode ser None (criação ou exclusão). Executa no
+    máximo duas consultas: a criação das linhas que faltam e um único UPDATE
+    com incrementos atômicos, no banco `using` (o do chamado gravado).
+    """
+    if contador_model is None:
+        from .models import ContadorChamados as contador_model
+    alias = using or router.db_for_write(contador_model)
+
+    variacoes = Counter()
+    if antes is not None:
+        variacoes.subtract(chaves_contador(antes))
+    if depois is not None:
+        variacoes.update(chaves_contador(depois))
+    variacoes = {chave: delta for chave, delta in variacoes.items() if delta}
+    if not variacoes:
+        return
+
+    with transaction.atomic(using=alias, savepoint=False):
+        contador_model.objects.using(alias).bulk_create(
+            [
+                contador_model(dimensao=d, chave=c, status=s, total=0)
+                for d, c, s in variacoes
+            ],
+            ignore_conflicts=True
+        )
+
+        condicao = models.Q()
+        casos = []
+        for (dimensao, chave, status), delta in variacoes.items():
+            filtro = models.Q(dimensao=dimensao, chave=chave, status=status)
+            condicao |= filtro
+            casos.append(models.When(filtro, then=models.Value(delta)))
+
+        contador_model.objects.using(alias).filter(condicao).update(
+            total=models.F('total') + models.Case(
+                *casos, default=models.Value(0),
+                output_field=models.IntegerField()
+            )
+        )
+
+
+def contar(chamado_model=None, using=None):
+    """Calcula os contadores a partir da tabela de chamados"""
+    if chamado_model is None:
+        from .models import Chamado as chamado_model
+
+    totais = {}
+    for dimensao, campo in DIMENSOES:
+        agrupamento = ['status'] + ([campo] if campo else [])
+        linhas = chamado_model.objects.using(using).order_by().values(
+            *agrupamento).annotate(total=models.Count('id'))
+        for linha in linhas:
+            if campo is None:
+                chave = ''
+            elif linha[campo] is None:
+                continue
+            else:
+                chave = str(linha[campo])
+            totais[(dimensao, chave, linha['status'])] = linha['total']
+    return totais
+
+
+def recalcular(chamado_model=None, contador_model=None, using=None):
+    """Reconstrói todos os contadores a partir da tabela de chamados"""
+    if contador_model is None:
+        from .models import ContadorChamados as contador_model
+    alias = using or router.db_for_write(contador_model)
+
+    with transaction.atomic(using=alias):
+        totais = contar(chamado_model, using=alias)
+        contador_model.objects.using(alias).all().delete()
+        contador_model.objects.using(alias).bulk_create([
+            contador_model(dimensao=d, chave=c, status=s, total=total)
+            for (d, c, s), total in totais.items()
+        ])
+    return totais
+
+
+def divergencias(chamado_model=None, contador_model=None, using=None):
+    """Lista (chave, armazenado, esperado) dos contadores incorretos"""
+    if contador_model is None:
+        from .models import ContadorChamados as contador_model
+
+    esperados = contar(chamado_model, using=using)
+    armazenados = {
+        (d, c, s): total
+        for d, c, s, total in contador_model.objects.using(using).values_list(
+            'dimensao', 'chave', 'status', 'total')
+    }
+    erradas = []
+    for chave in sorted(set(esperados) | set(armazenados)):
+        armazenado = armazenados.get(chave, 0)
+        esperado = esperados.get(chave, 0)
+        if armazenado != esperado:
+            erradas.append((chave, armazenado, esperado))
+    return erradas
+
+
+def estatisticas_dashboard(usuario):
+    """Estatísticas do dashboard lidas dos contadores numa única consulta"""
+    from .models import ContadorChamados
+
+    dimensao_usuario = (
+        'tecnico' if usuario.tipo_usuario == 'tecnico' else 'solicitante'
+    )
+    linhas = ContadorChamados.objects.filter(
+        models.Q(dimensao='geral') |
+        models.Q(dimensao='prioridade', chave='urgente') |
+        models.Q(dimensao=dimensao_usuario, chave=str(usuario.pk))
+    ).values_list('dimensao', 'status', 'total')
+
+    geral = Counter()
+    urgentes = 0
+    do_usuario = Counter()
+    for dimensao, status, total in linhas:
+        if dimensao == 'geral':
+            geral[status] += total
+        elif dimensao == 'prioridade':
+            if status in PENDENTES:
+                urgentes += total
+        else:
+            do_usuario[status] += total
+
+    if dimensao_usuario == 'tecnico':
+        # Para técnicos, contar chamados abertos OU atribuídos a eles
+        meus = geral['aberto'] + sum(
+            total for status, total in do_usuario.items()
+            if status != 'aberto'
+        )
+        meus_pendentes = geral['aberto'] + do_usuario['em_atendimento']
+    else:
+        meus = sum(do_usuario.values())
+        meus_pendentes = sum(do_usuario[status] for status in PENDENTES)
+
+    return {
+        'total_chamados': sum(geral.values()),
+        'chamados_abertos': geral['aberto'],
+        'chamados_em_atendimento': geral['em_atendimento'],
+        'chamados_encerrados': geral['encerrado'],
+        'chamados_urgentes': urgentes,
+        'meus_chamados': meus,
+        'meus_chamados_pendentes': meus_pendentes,
+    }
@@ -0,0 +1,321 @@
+"""Eventos de chamados em tempo real (Server-Sent Events sobre ASGI)
+
+Cada chamado salvo ou excluído e cada entrada de histórico gravada vira uma
+mensagem publicada no broker depois do commit. `GET /api/chamados/eventos/`
+mantém a conexão aberta e transmite as mensagens que o usuário pode ver:
+técnicos e administradores recebem todas; os demais, só as dos chamados de
+que são solicitantes ou responsáveis.
+
+O broker padrão (`BrokerMemoria`) distribui as mensagens entre as conexões
+do próprio processo. Com vários processos, `CHAMADOS_EVENTOS_BROKER` aponta
+para um broker compartilhado, como `BrokerPostgres` (LISTEN/NOTIFY); a
+interface é `publicar(mensagem)`, `ativo()` e `assinar(loop)`.
+
+A transmissão exige o servidor ASGI (`uvicorn sistema_chamados.asgi:application`).
+Sob WSGI a resposta traz só o evento `indisponivel` e o cliente continua com
+`/api/chamados/alteracoes/`. Eventos não são guardados: ao reconectar (ou
+ao receber `ressincronizar`, quando a conexão não acompanha o volume), o
+cliente recupera o que perdeu pela sincronização incremental.
+"""
+import asyncio
+import json
+import logging
+import select
+import threading
+import time
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections, router, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.functional import SimpleLazyObject
+from django.utils.module_loading import import_string
+from rest_framework import renderers, serializers
+
+from .models import Chamado, HistoricoChamado
+
+logger = logging.getLogger(__name__)
+
+# Comentário enviado quando não há eventos, para manter proxies abertos
+INTERVALO_PING = 15
+
+# Enviado no lugar das mensagens quando a fila de uma conexão transborda
+RESSINCRONIZAR = object()
+
+
+def _data_hora(valor):
+    return serializers.DateTimeField().to_representation(valor)
+
+
+def mensagem_chamado(chamado, tipo='chamado.salvo'):
+    dados = {'id': chamado.pk, 'numero': chamado.numero}
+    if tipo == 'chamado.salvo':
+        dados.update({
+            'titulo': chamado.titulo,
+            'status': chamado.status,
+            'prioridade': chamado.prioridade,
+            'tecnico_responsavel': chamado.tecnico_responsavel_id,
+            'atualizado_em': _data_hora(chamado.atualizado_em),
+        })
+    return {
+        'tipo': tipo,
+        'dados': dados,
+        'publico': [chamado.solicitante_id, chamado.tecnico_responsavel_id],
+    }
+
+
+def mensagem_historico(entrada, publico):
+    return {
+        'tipo': 'historico.criado',
+        'dados': {
+            'id': entrada.pk,
+            'chamado': entrada.chamado_id,
+            'tipo_acao': entrada.tipo_acao,
+            'descricao': entrada.descricao,
+            'usuario': entrada.usuario_id,
+            'criado_em': _data_hora(entrada.criado_em),
+        },
+        'publico': publico,
+    }
+
+
+def visivel(usuario, mensagem):
+    """O usuário pode ver o chamado da mensagem?"""
+    if usuario.tipo_usuario in ['tecnico', 'admin']:
+        return True
+    return usuario.pk in mensagem['publico']
+
+
+class Assinatura:
+    """Fila de mensagens de uma conexão, alimentada de qualquer thread"""
+
+    def __init__(self, broker, loop, tamanho):
+        self.broker = broker
+        self.loop = loop
+        self.fila = asyncio.Queue(tamanho)
+        self.transbordou = False
+
+    def entregar(self, mensagem):
+        try:
+            self.loop.call_soon_threadsafe(self._enfileirar, mensagem)
+        except RuntimeError:
+            # Loop encerrado: a conexão já terminou
+            self.cancelar()
+
+    def _enfileirar(self, mensagem):
+        if self.transbordou:
+            return
+        try:
+            self.fila.put_nowait(mensagem)
+        except asyncio.QueueFull:
+            # Conexão lenta: descarta o acumulado e pede ressincronização
+            self.transbordou = True
+            while not self.fila.empty():
+                self.fila.get_nowait()
+            self.fila.put_nowait(RESSINCRONIZAR)
+
+    async def proxima(self, espera):
+        """Próxima mensagem, ou None se nada chegar em `espera` segundos"""
+        try:
+            return await asyncio.wait_for(self.fila.get(), espera)
+        except asyncio.TimeoutError:
+            return None
+
+    def cancelar(self):
+        self.broker.cancelar(self)
+
+
+class BrokerMemoria:
+    """Distribui as mensagens entre as conexões deste processo"""
+
+    def __init__(self, tamanho_fila=100):
+        self.tamanho_fila = tamanho_fila
+        self._assinaturas = set()
+        self._trava = threading.Lock()
+
+    def ativo(self):
+        """Há quem receba? Sem conexões, a publicação é dispensada"""
+        return bool(self._assinaturas)
+
+    def publicar(self, mensagem):
+        self.distribuir(mensagem)
+
+    def distribuir(self, mensagem):
+        with self._trava:
+            assinaturas = list(self._assinaturas)
+        for assinatura in assinaturas:
+            assinatura.entregar(mensagem)
+
+    def assinar(self, loop):
+        assinatura = Assinatura(self, loop, self.tamanho_fila)
+        with self._trava:
+            self._assinaturas.add(assinatura)
+        return assinatura
+
+    def cancelar(self, assinatura):
+        with self._trava:
+            self._assinaturas.discard(assinatura)
+
+
+class BrokerPostgres(BrokerMemoria):
+    """Broker entre processos pelo LISTEN/NOTIFY do PostgreSQL
+
+    Publica com `pg_notify` e, no primeiro `assinar()`, abre uma conexão
+    dedicada que escuta o canal numa thread e distribui as mensagens às
+    conexões do processo. O payload do NOTIFY é limitado a 8000 bytes.
+    """
+
+    canal = 'chamados_eventos'
+
+    def __init__(self, tamanho_fila=100, using=None):
+        super().__init__(tamanho_fila)
+        self.using = using or router.db_for_write(Chamado)
+        self._escuta = None
+
+    def ativo(self):
+        # Conexões de outros processos não são visíveis daqui
+        return True
+
+    def publicar(self, mensagem):
+        conteudo = json.dumps(mensagem, cls=DjangoJSONEncoder)
+        with connections[self.using].cursor() as cursor:
+            cursor.execute('SELECT pg_notify(%s, %s)', [self.canal, conteudo])
+
+    def assinar(self, loop):
+        with self._trava:
+            if self._escuta is None or not self._escuta.is_alive():
+                self._escuta = threading.Thread(
+                    target=self._escutar, name='chamados-eventos', daemon=True)
+                self._escuta.start()
+        return super().assinar(loop)
+
+    def _conectar(self):
+        wrapper = connections[self.using]
+        conexao = wrapper.get_new_connection(wrapper.get_connection_params())
+        conexao.autocommit = True
+        with conexao.cursor() as cursor:
+            cursor.execute(f'LISTEN {self.canal}')
+        return conexao
+
+    def _escutar(self):
+        while True:
+            try:
+                conexao = self._conectar()
+                try:
+                    while True:
+                        select.select([conexao], [], [], INTERVALO_PING)
+                        self.processar(conexao)
+                finally:
+                    conexao.close()
+            except Exception:
+                logger.exception('Escuta de eventos interrompida; reconectando')
+                time.sleep(1)
+
+    def processar(self, conexao):
+        """Distribui as notificações pendentes na conexão de escuta"""
+        conexao.poll()
+        while conexao.notifies:
+            notificacao = conexao.notifies.pop(0)
+            self.distribuir(json.loads(notificacao.payload))
+
+
+def _criar_broker():
+    return import_string(settings.CHAMADOS_EVENTOS_BROKER)()
+
+
+broker = SimpleLazyObject(_criar_broker)
+
+
+def publicar(mensagens, using=None):
+    """Publica depois do commit; falhas do broker não afetam a requisição"""
+    def enviar():
+        for mensagem in mensagens:
+            try:
+                broker.publicar(mensagem)
+            except Exception:
+                logger.exception('Falha ao publicar evento %s', mensagem['tipo'])
+    transaction.on_commit(enviar, using=using)
+
+
+def publicar_historico(entradas, using=None):
+    """Publica entradas gravadas em lote (bulk_create não emite sinais)"""
+    if not entradas or not broker.ativo():
+        return
+    chamado_ids = {entrada.chamado_id for entrada in entradas}
+
+    def enviar():
+        publico = {
+            pk: [solicitante, tecnico]
+            for pk, solicitante, tecnico in Chamado.objects.using(using)
+            .filter(pk__in=chamado_ids)
+            .values_list('pk', 'solicitante_id', 'tecnico_responsavel_id')
+        }
+        for entrada in entradas:
+            if entrada.chamado_id in publico:
+                try:
+                    broker.publicar(
+                        mensagem_historico(entrada, publico[entrada.chamado_id]))
+                except Exception:
+                    logger.exception('Falha ao publicar evento historico.criado')
+    transaction.on_commit(enviar, using=using)
+
+
+@receiver(post_save, sender=Chamado)
+def _chamado_salvo(sender, instance, using, **kwargs):
+    # As transições de status (chamados.transicoes) publicam por conta própria
+    if broker.ativo():
+        publicar([mensagem_chamado(instance)], using)
+
+
+@receiver(post_delete, sender=Chamado)
+def _chamado_excluido(sender, instance, using, **kwargs):
+    if broker.ativo():
+        publicar([mensagem_chamado(instance, 'chamado.excluido')], using)
+
+
+@receiver(post_save, sender=HistoricoChamado)
+def _historico_salvo(sender, instance, created, using, **kwargs):
+    if created:
+        publicar_historico([instance], using)
+
+
+def formatar(evento, dados):
+    conteudo = json.dumps(dados, cls=DjangoJSONEncoder, separators=(',', ':'))
+    return f'event: {evento}\ndata: {conteudo}\n\n'.encode()
+
+
+class EventosRenderer(renderers.BaseRenderer):
+    """Aceita `text/event-stream` e escreve erros (401, 403) como evento"""
+
+    media_type = 'text/event-stream'
+    format = 'sse'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return formatar('erro', data)
+
+
+async def transmitir(usuario, duracao):
+    """Corpo da resposta SSE de uma conexão
+
+    A conexão termina depois de `duracao` segundos (o cliente reconecta):
+    o servidor ASGI só percebe a desconexão do cliente ao escrever.
+    """
+    assinatura = broker.assinar(asyncio.get_running_loop())
+    limite = time.monotonic() + duracao
+    try:
+        yield b'retry: 5000\n\n'
+        while (restante := limite - time.monotonic()) > 0:
+            mensagem = await assinatura.proxima(min(INTERVALO_PING, restante))
+            if mensagem is None:
+                yield b': ping\n\n'
+            elif mensagem is RESSINCRONIZAR:
+                yield formatar('ressincronizar', {})
+                return
+            elif visivel(usuario, mensagem):
+                yield formatar(mensagem['tipo'], mensagem['dados'])
+    finally:
+        assinatura.cancelar()
@@ -0,0 +1,91 @@
+"""Exportação de chamados em CSV ou NDJSON com memória constante
+
+As linhas saem de `values_list()` lidas com `iterator()`: cursor do lado do
+servidor no PostgreSQL, `fetchmany` no SQLite. Nenhum modelo é instanciado e
+nada é acumulado além de um lote, então o uso de memória não depende do
+número de chamados. O cabeçalho do CSV é emitido antes da consulta e cada
+lote é enviado assim que lido, então o primeiro byte não espera a tabela.
+
+Usado por `GET /api/chamados/exportar/` e por `manage.py exportar_chamados`.
+"""
+import csv
+import io
+from itertools import islice
+
+from rest_framework import serializers
+
+from .renderers import JSONRapidoRenderer
+
+TAMANHO_LOTE = 2000
+
+# coluna no banco -> nome na exportação
+COLUNAS = {
+    'id': 'id',
+    'numero': 'numero',
+    'titulo': 'titulo',
+    'tipo_servico__nome': 'tipo_servico',
+    'status': 'status',
+    'prioridade': 'prioridade',
+    'solicitante__nome_completo': 'solicitante',
+    'tecnico_responsavel__nome_completo': 'tecnico_responsavel',
+    'equipamento': 'equipamento',
+    'localizacao': 'localizacao',
+    'criado_em': 'criado_em',
+    'atualizado_em': 'atualizado_em',
+    'atendido_em': 'atendido_em',
+    'encerrado_em': 'encerrado_em',
+}
+CABECALHO = list(COLUNAS.values())
+DATAS = [
+    posicao for posicao, coluna in enumerate(COLUNAS) if coluna.endswith('_em')
+]
+
+FORMATOS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def _lotes(queryset, chunk_size):
+    """Linhas da exportação em listas de até `chunk_size`"""
+    # Mesmo formato e fuso das datas da API
+    data_hora = serializers.DateTimeField().to_representation
+    linhas = queryset.values_list(*COLUNAS).iterator(chunk_size=chunk_size)
+    while True:
+        lote = list(islice(linhas, chunk_size))
+        if not lote:
+            return
+        lote = [list(linha) for linha in lote]
+        for linha in lote:
+            for posicao in DATAS:
+                if linha[posicao] is not None:
+                    linha[posicao] = data_hora(linha[posicao])
+        yield lote
+
+
+def gerar_csv(queryset, chunk_size=TAMANHO_LOTE):
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    escritor.writerow(CABECALHO)
+    yield buffer.getvalue().encode()
+
+    for lote in _lotes(queryset, chunk_size):
+        buffer.seek(0)
+        buffer.truncate()
+        escritor.writerows(lote)
+        yield buffer.getvalue().encode()
+
+
+def gerar_ndjson(queryset, chunk_size=TAMANHO_LOTE):
+    renderer = JSONRapidoRenderer()
+    for lote in _lotes(queryset, chunk_size):
+        yield b''.join(
+            renderer.render(dict(zip(CABECALHO, linha))) + b'\n'
+            for linha in lote
+        )
+
+
+def exportar(queryset, formato, chunk_size=TAMANHO_LOTE):
+    """Gerador de bytes da exportação no formato pedido"""
+    geradores = {'csv': gerar_csv, 'ndjson': gerar_ndjson}
+    return geradores[formato](queryset, chunk_size)
@@ -1,5 +1,7 @@
 import django_filters
 from django.db import models
+from rest_framework.filters import OrderingFilter, SearchFilter
+from .busca import buscar_chamados
 from .models import Chamado
 from usuarios.models import Usuario
 
@@ -53,15 +55,9 @@ class ChamadoFilter(django_filters.FilterSet):
         return queryset
     
     def filter_busca_geral(self, queryset, name, value):
-        """Busca em múltiplos campos"""
+        """Busca textual em múltiplos campos (ver chamados.busca)"""
         if value:
-            return queryset.filter(
-                models.Q(numero__icontains=value) |
-                models.Q(titulo__icontains=value) |
-                models.Q(descricao__icontains=value) |
-                models.Q(equipamento__icontains=value) |
-                models.Q(localizacao__icontains=value)
-            )
+            return buscar_chamados(queryset, value)
         return queryset
 
     def filter_tecnico_ou_aberto(self, queryset, name, value):
@@ -74,6 +70,25 @@ class ChamadoFilter(django_filters.FilterSet):
         return queryset
 
 
+class BuscaTextualFilter(SearchFilter):
+    """SearchFilter que usa o índice de busca textual dos chamados"""
+
+    def filter_queryset(self, request, queryset, view):
+        termo = request.query_params.get(self.search_param, '')
+        termo = termo.replace('\x00', '')
+        return buscar_chamados(queryset, termo)
+
+
+class ChamadoOrderingFilter(OrderingFilter):
+    """Ordena por relevância quando houver busca e nenhuma ordenação explícita"""
+
+    def get_ordering(self, request, queryset, view):
+        params = request.query_params.get(self.ordering_param)
+        if not params and 'busca_rank' in queryset.query.annotations:
+            return ['-busca_rank'] + list(self.get_default_ordering(view) or [])
+        return super().get_ordering(request, queryset, view)
+
+
 class UsuarioFilter(django_filters.FilterSet):
     """Filtros customizados para usuários"""
     
@@ -0,0 +1,74 @@
+"""Gravação do histórico de chamados em lote
+
+`registro_historico()` abre uma unidade de trabalho: a alteração do chamado e
+as entradas de histórico registradas no bloco são gravadas na mesma
+transação, com um único `bulk_create` ao final. Se o bloco falhar, nada é
+gravado.
+
+    with registro_historico(usuario=request.user) as historico:
+        chamado.save()
+        historico.registrar(chamado, 'status_alterado', 'Status alterado')
+"""
+from contextlib import contextmanager
+
+from django.db import router, transaction
+
+# Linhas por INSERT em operações que afetam muitos chamados
+TAMANHO_LOTE = 500
+
+
+class RegistroHistorico:
+    """Acumula entradas de histórico e as grava de uma vez"""
+
+    def __init__(self, usuario=None, using=None, batch_size=TAMANHO_LOTE):
+        self.usuario = usuario
+        self.using = using
+        self.batch_size = batch_size
+        self.pendentes = []
+
+    def registrar(self, chamado, tipo_acao, descricao, usuario=None):
+        """Enfileira uma entrada; `chamado` pode ser a instância ou o pk"""
+        from .models import HistoricoChamado
+
+        self.pendentes.append(HistoricoChamado(
+            chamado_id=getattr(chamado, 'pk', chamado),
+            tipo_acao=tipo_acao,
+            descricao=descricao,
+            usuario=usuario or self.usuario,
+        ))
+
+    def registrar_em_lote(self, chamados, tipo_acao, descricao, usuario=None):
+        """Enfileira a mesma ação para vários chamados
+
+        `descricao` pode ser um texto ou uma função que recebe o chamado.
+        """
+        for chamado in chamados:
+            texto = descricao(chamado) if callable(descricao) else descricao
+            self.registrar(chamado, tipo_acao, texto, usuario)
+
+    def gravar(self):
+        """Grava as entradas pendentes e retorna as criadas"""
+        from .eventos import publicar_historico
+        from .models import HistoricoChamado
+
+        if not self.pendentes:
+            return []
+        pendentes, self.pendentes = self.pendentes, []
+        using = self.using or router.db_for_write(HistoricoChamado)
+        criadas = HistoricoChamado.objects.using(using).bulk_create(
+            pendentes, batch_size=self.batch_size)
+        # bulk_create não emite post_save: os eventos saem daqui
+        publicar_historico(criadas, using)
+        return criadas
+
+
+@contextmanager
+def registro_historico(usuario=None, using=None, batch_size=TAMANHO_LOTE):
+    """Transação cujas entradas de histórico são gravadas ao final"""
+    from .models import HistoricoChamado
+
+    using = using or router.db_for_write(HistoricoChamado)
+    historico = RegistroHistorico(usuario, using=using, batch_size=batch_size)
+    with transaction.atomic(using=using, savepoint=False):
+        yield historico
+        historico.gravar()
@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand
+
+from sistema_chamados import consultas_lentas
+
+
+class Command(BaseCommand):
+    help = (
+        'Relatório do registro de consultas lentas: consultas normalizadas '
+        'ordenadas pelo tempo total, com rotas de origem e plano de execução'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--arquivo',
+            help='Registro a ler (padrão: CONSULTAS_LENTAS_ARQUIVO e seus backups)'
+        )
+        parser.add_argument(
+            '--limite', type=int, default=20,
+            help='Quantidade de consultas no relatório'
+        )
+        parser.add_argument(
+            '--rota',
+            help='Só as consultas originadas nesta rota (ex.: chamados:chamado-list-create)'
+        )
+        parser.add_argument(
+            '--sem-plano', action='store_true',
+            help='Omite os planos de execução'
+        )
+
+    def handle(self, *args, **options):
+        registros = consultas_lentas.ler_registros(options['arquivo'])
+        if options['rota']:
+            registros = (r for r in registros if r.get('rota') == options['rota'])
+        grupos = consultas_lentas.ranking(registros)
+        if not grupos:
+            self.stdout.write(self.style.WARNING('Nenhuma consulta lenta registrada.'))
+            return
+
+        for posicao, grupo in enumerate(grupos[:options['limite']], 1):
+            media = grupo['total_ms'] / grupo['execucoes']
+            self.stdout.write(self.style.SUCCESS(
+                f"{posicao}. [{grupo['assinatura']}] total {grupo['total_ms']:.1f} ms"
+                f" | {grupo['execucoes']} execuções | média {media:.1f} ms"
+                f" | máx {grupo['max_ms']:.1f} ms"
+            ))
+            rotas = sorted(grupo['rotas'].items(), key=lambda item: -item[1])
+            self.stdout.write('   rotas: ' + ', '.join(
+                f'{rota} ({total})' for rota, total in rotas))
+            self.stdout.write(f"   parâmetros: {grupo['parametros'] or '-'}")
+            self.stdout.write(f"   {grupo['sql']}")
+            if grupo['plano'] and not options['sem_plano']:
+                self.stdout.write('   plano:')
+                for linha in grupo['plano']:
+                    self.stdout.write(f'     {linha}')
+            self.stdout.write('')
+        self.stdout.write(
+            f'{len(grupos)} consultas distintas; exibidas {min(len(grupos), options["limite"])}.')
@@ -0,0 +1,64 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.http import QueryDict
+
+from chamados import exportacao
+from chamados.filters import ChamadoFilter
+from chamados.models import Chamado
+
+
+class Command(BaseCommand):
+    help = (
+        'Exporta chamados em CSV ou NDJSON com os mesmos filtros da API '
+        '(ex.: status=aberto prioridade_list=alta prioridade_list=urgente)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'filtros', nargs='*', metavar='filtro=valor',
+            help='Parâmetros do ChamadoFilter; repita o nome para listas'
+        )
+        parser.add_argument(
+            '--formato', choices=list(exportacao.FORMATOS), default='csv',
+            help='Formato da exportação'
+        )
+        parser.add_argument(
+            '--saida',
+            help='Arquivo de destino (padrão: saída padrão)'
+        )
+        parser.add_argument(
+            '--lote', type=int, default=exportacao.TAMANHO_LOTE,
+            help='Linhas lidas do banco por vez'
+        )
+
+    def handle(self, *args, **options):
+        parametros = QueryDict(mutable=True)
+        for filtro in options['filtros']:
+            nome, separador, valor = filtro.partition('=')
+            if not separador:
+                raise CommandError(f'Filtro inválido: "{filtro}". Use nome=valor.')
+            parametros.appendlist(nome, valor)
+
+        desconhecidos = set(parametros) - set(ChamadoFilter.base_filters)
+        if desconhecidos:
+            raise CommandError(
+                f'Filtros desconhecidos: {", ".join(sorted(desconhecidos))}')
+
+        filterset = ChamadoFilter(
+            data=parametros,
+            queryset=Chamado.objects.order_by('-criado_em', '-id')
+        )
+        if not filterset.is_valid():
+            raise CommandError(f'Filtros inválidos: {filterset.errors.as_json()}')
+
+        blocos = exportacao.exportar(
+            filterset.qs, options['formato'], chunk_size=options['lote'])
+        if not options['saida']:
+            for bloco in blocos:
+                self.stdout.write(bloco.decode(), ending='')
+            return
+
+        with open(options['saida'], 'wb') as arquivo:
+            for bloco in blocos:
+                arquivo.write(bloco)
+        self.stderr.write(self.style.SUCCESS(
+            f'Chamados exportados para {options["saida"]}.'))
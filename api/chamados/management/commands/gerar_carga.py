@@ -0,0 +1,97 @@
+import io
+import os
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from chamados import carga
+
+
+class Command(BaseCommand):
+    help = (
+        'Gera usuários, chamados, histórico e anexos sintéticos em volume '
+        '(bulk_create em lotes, vários processos, reproduzível pela semente)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chamados', type=int, default=10000,
+            help='Chamados a criar'
+        )
+        parser.add_argument(
+            '--usuarios', type=int, default=1000,
+            help='Usuários da carga (5%% técnicos); os já existentes são reaproveitados'
+        )
+        parser.add_argument(
+            '--historico', type=float, default=6.0,
+            help='Média de entradas de histórico por chamado'
+        )
+        parser.add_argument(
+            '--anexos', type=float, default=0.3,
+            help='Média de anexos (só metadados) por chamado'
+        )
+        parser.add_argument(
+            '--dias', type=int, default=365,
+            help='Período, em dias até hoje, em que os chamados são abertos'
+        )
+        parser.add_argument(
+            '--semente', type=int, default=42,
+            help='Semente dos geradores aleatórios'
+        )
+        parser.add_argument(
+            '--lote', type=int, default=5000,
+            help='Chamados por lote (cada lote é uma transação)'
+        )
+        parser.add_argument(
+            '--processos', type=int, default=os.cpu_count() or 1,
+            help='Processos que montam e gravam os lotes'
+        )
+        parser.add_argument(
+            '--prefixo', default='carga',
+            help='Prefixo do username dos usuários gerados'
+        )
+
+    def handle(self, *args, **options):
+        for opcao in ('chamados', 'usuarios', 'lote', 'dias', 'processos'):
+            if options[opcao] < 1:
+                raise CommandError(f'--{opcao} deve ser maior que zero.')
+
+        inicio = time.perf_counter()
+        agora = carga.inicio_do_dia()
+
+        if not carga.tipos_servico():
+            call_command('criar_tipos_servico', stdout=io.StringIO())
+        solicitantes, tecnicos = carga.garantir_usuarios(
+            options['usuarios'], options['prefixo'], options['semente'], agora)
+        self.stdout.write(
+            f'{len(solicitantes)} solicitantes e {len(tecnicos)} técnicos prontos.')
+
+        contexto = carga.Contexto(
+            semente=options['semente'],
+            total=options['chamados'],
+            tamanho_lote=options['lote'],
+            solicitantes=solicitantes,
+            tecnicos=tecnicos,
+            tipos=carga.tipos_servico(),
+            agora=agora,
+            dias=options['dias'],
+            historico=options['historico'],
+            anexos=options['anexos'],
+        )
+        processos = min(options['processos'], contexto.lotes)
+
+        totais = [0, 0, 0]
+        for gravados in carga.gerar(contexto, processos):
+            totais = [total + novo for total, novo in zip(totais, gravados)]
+            decorrido = time.perf_counter() - inicio
+            self.stdout.write(
+                f'{totais[0]}/{contexto.total} chamados, {totais[1]} históricos, '
+                f'{totais[2]} anexos ({totais[0] / decorrido:.0f} chamados/s)'
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Carga gerada em {time.perf_counter() - inicio:.1f}s: '
+            f'{totais[0]} chamados, {totais[1]} históricos e {totais[2]} anexos '
+            f'com {processos} processo(s).'
+        ))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from chamados import alteracoes
+
+
+class Command(BaseCommand):
+    help = 'Remove registros de exclusão de chamados mais antigos que a retenção'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dias',
+            type=int,
+            help='Retenção em dias (padrão: CHAMADOS_EXCLUSOES_DIAS)'
+        )
+
+    def handle(self, *args, **options):
+        removidos = alteracoes.limpar_exclusoes(options['dias'])
+        self.stdout.write(
+            self.style.SUCCESS(f'{removidos} registros de exclusão removidos.')
+        )
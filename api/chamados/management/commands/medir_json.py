@@ -0,0 +1,87 @@
+import io
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from chamados.models import Chamado
+from chamados.parsers import JSONRapidoParser
+from chamados.renderers import JSONRapidoRenderer, orjson
+from chamados.serializers import ChamadoDetailSerializer, ChamadoListSerializer
+
+
+def _melhor_tempo(funcao, repeticoes):
+    melhor = None
+    for _ in range(max(repeticoes, 1)):
+        inicio = time.perf_counter()
+        funcao()
+        decorrido = time.perf_counter() - inicio
+        melhor = decorrido if melhor is None else min(melhor, decorrido)
+    return melhor
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara JSONRenderer/JSONParser do DRF com JSONRapidoRenderer/'
+        'JSONRapidoParser sobre payloads de listagem e detalhe de chamados'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--linhas', type=int, default=1000,
+            help='Chamados no payload de listagem'
+        )
+        parser.add_argument(
+            '--detalhes', type=int, default=50,
+            help='Chamados no payload de detalhe'
+        )
+        parser.add_argument(
+            '--repeticoes', type=int, default=5,
+            help='Rodadas por caminho (vale o melhor tempo)'
+        )
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            self.stdout.write(self.style.WARNING(
+                'orjson não instalado: JSONRapidoRenderer usa o json padrão.'))
+
+        listagem = Chamado.objects.para_listagem().order_by('-criado_em', '-id')
+        detalhe = Chamado.objects.para_detalhe().order_by('-criado_em', '-id')
+        payloads = [
+            ('ChamadoListSerializer', ChamadoListSerializer(
+                listagem[:options['linhas']], many=True).data),
+            ('ChamadoDetailSerializer', ChamadoDetailSerializer(
+                detalhe[:options['detalhes']], many=True).data),
+        ]
+        if not payloads[0][1]:
+            self.stdout.write(self.style.WARNING('Nenhum chamado para medir.'))
+            return
+
+        repeticoes = options['repeticoes']
+        padrao, rapido = JSONRenderer(), JSONRapidoRenderer()
+        for nome, dados in payloads:
+            conteudo = padrao.render(dados)
+            if rapido.render(dados) != conteudo:
+                raise CommandError(f'{nome}: saídas diferentes entre os renderers.')
+            if JSONRapidoParser().parse(io.BytesIO(conteudo)) != \
+                    JSONParser().parse(io.BytesIO(conteudo)):
+                raise CommandError(f'{nome}: leituras diferentes entre os parsers.')
+
+            tempos = [
+                ('render', _melhor_tempo(lambda: padrao.render(dados), repeticoes),
+                 _melhor_tempo(lambda: rapido.render(dados), repeticoes)),
+                ('parse', _melhor_tempo(
+                    lambda: JSONParser().parse(io.BytesIO(conteudo)), repeticoes),
+                 _melhor_tempo(
+                    lambda: JSONRapidoParser().parse(io.BytesIO(conteudo)),
+                    repeticoes)),
+            ]
+            self.stdout.write(f'{nome}: {len(dados)} chamados, {len(conteudo)} bytes')
+            for etapa, base, novo in tempos:
+                self.stdout.write(
+                    f'  {etapa}: DRF {base * 1000:.2f} ms, '
+                    f'rápido {novo * 1000:.2f} ms ({base / novo:.1f}x)'
+                )
+
+        self.stdout.write(self.style.SUCCESS('Saídas idênticas.'))
@@ -0,0 +1,65 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from chamados.models import Chamado
+from chamados.projecoes import ChamadoListProjecao
+from chamados.serializers import ChamadoListSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara o tempo de ChamadoListSerializer e ChamadoListProjecao '
+        'sobre os chamados do banco'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--linhas', type=int, default=1000,
+            help='Quantidade de chamados serializados por rodada'
+        )
+        parser.add_argument(
+            '--repeticoes', type=int, default=5,
+            help='Rodadas por caminho (vale o melhor tempo)'
+        )
+
+    def handle(self, *args, **options):
+        queryset = Chamado.objects.para_listagem().order_by('-criado_em', '-id')
+        queryset = queryset[:options['linhas']]
+
+        caminhos = [
+            ('ChamadoListSerializer', lambda: ChamadoListSerializer(
+                queryset.all(), many=True).data),
+            ('ChamadoListProjecao', lambda: ChamadoListProjecao(
+                ChamadoListProjecao.projetar(queryset.all()), many=True).data),
+        ]
+
+        renderer = JSONRenderer()
+        saidas = {}
+        tempos = {}
+        for nome, serializar in caminhos:
+            melhor = None
+            for _ in range(max(options['repeticoes'], 1)):
+                inicio = time.perf_counter()
+                dados = serializar()
+                decorrido = time.perf_counter() - inicio
+                melhor = decorrido if melhor is None else min(melhor, decorrido)
+            saidas[nome] = renderer.render(dados)
+            tempos[nome] = melhor
+
+        linhas = len(dados)
+        if not linhas:
+            self.stdout.write(self.style.WARNING('Nenhum chamado para medir.'))
+            return
+        if len(set(saidas.values())) != 1:
+            raise CommandError('As saídas dos dois caminhos são diferentes.')
+
+        for nome, decorrido in tempos.items():
+            self.stdout.write(
+                f'{nome}: {decorrido * 1000:.1f} ms para {linhas} chamados '
+                f'({linhas / decorrido:.0f} chamados/s)'
+            )
+        base, projecao = tempos.values()
+        self.stdout.write(self.style.SUCCESS(
+            f'Saídas idênticas. Projeção {base / projecao:.1f}x mais rápida.'))
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from chamados import contadores
+
+
+class Command(BaseCommand):
+    help = 'Reconstrói ou verifica os contadores de chamados do dashboard'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verificar',
+            action='store_true',
+            help='Apenas compara os contadores com a tabela de chamados'
+        )
+
+    def handle(self, *args, **options):
+        if options['verificar']:
+            erradas = contadores.divergencias()
+            for (dimensao, chave, status), armazenado, esperado in erradas:
+                self.stdout.write(self.style.WARNING(
+                    f'{dimensao} {chave or "-"} {status}: '
+                    f'armazenado {armazenado}, esperado {esperado}'
+                ))
+            if erradas:
+                raise CommandError(
+                    f'{len(erradas)} contadores divergentes. '
+                    'Execute recalcular_contadores para corrigir.'
+                )
+            self.stdout.write(self.style.SUCCESS('Contadores corretos.'))
+            return
+
+        totais = contadores.recalcular()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Contadores recalculados! {len(totais)} contadores gravados.')
+        )
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from chamados import numeracao
+
+
+class Command(BaseCommand):
+    help = 'Ajusta a numeração de chamados para continuar após o maior número existente'
+
+    def handle(self, *args, **options):
+        maior = numeracao.sincronizar()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Numeração sincronizada! Próximo chamado: '
+                f'{numeracao.formatar(maior + 1)}')
+        )
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.7 on 2026-10-17 19:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chamados', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='anexochamado',
+            index=models.Index(fields=['chamado', '-criado_em'], name='anexos_chamado_criado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='chamado',
+            index=models.Index(fields=['solicitante', 'status'], name='chamados_solic_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='chamado',
+            index=models.Index(fields=['tecnico_responsavel', 'status'], name='chamados_tecnico_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='chamado',
+            index=models.Index(fields=['-criado_em'], name='chamados_criado_em_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='chamado',
+            index=models.Index(fields=['status', 'prioridade'], name='chamados_status_prio_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='historicochamado',
+            index=models.Index(fields=['chamado', '-criado_em'], name='historico_chamado_criado_idx'),
+        ),
+    ]
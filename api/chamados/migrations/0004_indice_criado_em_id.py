@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-17 19:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chamados', '0003_indices_consultas'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='chamado',
+            name='chamados_criado_em_idx',
+        ),
+        migrations.AddIndex(
+            model_name='chamado',
+            index=models.Index(fields=['-criado_em', '-id'], name='chamados_criado_em_id_idx'),
+        ),
+    ]
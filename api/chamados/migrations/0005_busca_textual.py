@@ -0,0 +1,109 @@
+from django.db import migrations
+
+# SQL congelado nesta migração: mudanças em chamados.busca pedem uma nova
+
+SQL_POSTGRESQL = [
+    'CREATE EXTENSION IF NOT EXISTS unaccent',
+    '''
+    DO $$
+    BEGIN
+        IF NOT EXISTS (
+            SELECT 1 FROM pg_ts_config WHERE cfgname = 'portuguese_unaccent'
+        ) THEN
+            CREATE TEXT SEARCH CONFIGURATION portuguese_unaccent
+                (COPY = portuguese);
+            ALTER TEXT SEARCH CONFIGURATION portuguese_unaccent
+                ALTER MAPPING FOR hword, hword_part, word
+                WITH unaccent, portuguese_stem;
+        END IF;
+    END
+    $$
+    ''',
+    '''
+    ALTER TABLE chamados ADD COLUMN busca_vetor tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('portuguese_unaccent'::regconfig, coalesce(numero, '')), 'A') ||
+        setweight(to_tsvector('portuguese_unaccent'::regconfig, coalesce(titulo, '')), 'A') ||
+        setweight(to_tsvector('portuguese_unaccent'::regconfig, coalesce(equipamento, '')), 'B') ||
+        setweight(to_tsvector('portuguese_unaccent'::regconfig, coalesce(localizacao, '')), 'C') ||
+        setweight(to_tsvector('portuguese_unaccent'::regconfig, coalesce(descricao, '')), 'D')
+    ) STORED
+    ''',
+    'CREATE INDEX chamados_busca_vetor_gin ON chamados USING GIN (busca_vetor)',
+]
+
+SQL_POSTGRESQL_REVERSO = [
+    'DROP INDEX IF EXISTS chamados_busca_vetor_gin',
+    'ALTER TABLE chamados DROP COLUMN IF EXISTS busca_vetor',
+    'DROP TEXT SEARCH CONFIGURATION IF EXISTS portuguese_unaccent',
+]
+
+SQL_SQLITE = [
+    '''
+    CREATE VIRTUAL TABLE chamados_busca USING fts5(
+        numero, titulo, equipamento, localizacao, descricao,
+        content='chamados', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    ''',
+    '''
+    CREATE TRIGGER chamados_busca_ai AFTER INSERT ON chamados BEGIN
+        INSERT INTO chamados_busca(rowid, numero, titulo, equipamento, localizacao, descricao)
+        VALUES (new.id, new.numero, new.titulo, new.equipamento, new.localizacao, new.descricao);
+    END
+    ''',
+    '''
+    CREATE TRIGGER chamados_busca_ad AFTER DELETE ON chamados BEGIN
+        INSERT INTO chamados_busca(chamados_busca, rowid, numero, titulo, equipamento, localizacao, descricao)
+        VALUES ('delete', old.id, old.numero, old.titulo, old.equipamento, old.localizacao, old.descricao);
+    END
+    ''',
+    '''
+    CREATE TRIGGER chamados_busca_au
+    AFTER UPDATE OF numero, titulo, equipamento, localizacao, descricao ON chamados
+    BEGIN
+        INSERT INTO chamados_busca(chamados_busca, rowid, numero, titulo, equipamento, localizacao, descricao)
+        VALUES ('delete', old.id, old.numero, old.titulo, old.equipamento, old.localizacao, old.descricao);
+        INSERT INTO chamados_busca(rowid, numero, titulo, equipamento, localizacao, descricao)
+        VALUES (new.id, new.numero, new.titulo, new.equipamento, new.localizacao, new.descricao);
+    END
+    ''',
+    "INSERT INTO chamados_busca(chamados_busca) VALUES ('rebuild')",
+]
+
+SQL_SQLITE_REVERSO = [
+    'DROP TRIGGER IF EXISTS chamados_busca_au',
+    'DROP TRIGGER IF EXISTS chamados_busca_ad',
+    'DROP TRIGGER IF EXISTS chamados_busca_ai',
+    'DROP TABLE IF EXISTS chamados_busca',
+]
+
+
+def criar_indice_busca(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    comandos = {
+        'postgresql': SQL_POSTGRESQL,
+        'sqlite': SQL_SQLITE,
+    }.get(vendor, [])
+    for sql in comandos:
+        schema_editor.execute(sql)
+
+
+def remover_indice_busca(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    comandos = {
+        'postgresql': SQL_POSTGRESQL_REVERSO,
+        'sqlite': SQL_SQLITE_REVERSO,
+    }.get(vendor, [])
+    for sql in comandos:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chamados', '0004_indice_criado_em_id'),
+    ]
+
+    operations = [
+        migrations.RunPython(criar_indice_busca, remover_indice_busca),
+    ]
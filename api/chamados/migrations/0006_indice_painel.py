@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-17 20:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chamados', '0005_busca_textual'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='chamado',
+            name='chamados_status_prio_idx',
+        ),
+        migrations.AddIndex(
+            model_name='chamado',
+            index=models.Index(fields=['status', 'prioridade', 'solicitante', 'tecnico_responsavel'], name='chamados_painel_idx'),
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 4.2.7 on 2026-10-17 20:03
+
+from django.db import migrations, models
+
+# Cópia congelada de chamados.contadores.DIMENSOES: dimensão -> atributo
+DIMENSOES = (
+    ('geral', None),
+    ('prioridade', 'prioridade'),
+    ('tipo_servico', 'tipo_servico_id'),
+    ('solicitante', 'solicitante_id'),
+    ('tecnico', 'tecnico_responsavel_id'),
+)
+
+
+def popular_contadores(apps, schema_editor):
+    Chamado = apps.get_model('chamados', 'Chamado')
+    ContadorChamados = apps.get_model('chamados', 'ContadorChamados')
+    alias = schema_editor.connection.alias
+
+    contadores = []
+    for dimensao, campo in DIMENSOES:
+        agrupamento = ['status'] + ([campo] if campo else [])
+        linhas = Chamado.objects.using(alias).order_by().values(
+            *agrupamento).annotate(total=models.Count('id'))
+        for linha in linhas:
+            if campo is None:
+                chave = ''
+            elif linha[campo] is None:
+                continue
+            else:
+                chave = str(linha[campo])
+            contadores.append(ContadorChamados(
+                dimensao=dimensao, chave=chave, status=linha['status'],
+                total=linha['total']))
+    ContadorChamados.objects.using(alias).bulk_create(contadores)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chamados', '0006_indice_painel'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContadorChamados',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimensao', models.CharField(choices=[('geral', 'Geral'), ('prioridade', 'Prioridade'), ('tipo_servico', 'Tipo de Serviço'), ('solicitante', 'Solicitante'), ('tecnico', 'Técnico')], max_length=20, verbose_name='Dimensão')),
+                ('chave', models.CharField(blank=True, max_length=50, verbose_name='Chave')),
+                ('status', models.CharField(choices=[('aberto', 'Aberto'), ('em_atendimento', 'Em Atendimento'), ('encerrado', 'Encerrado'), ('cancelado', 'Cancelado')], max_length=20, verbose_name='Status')),
+                ('total', models.IntegerField(default=0, verbose_name='Total')),
+            ],
+            options={
+                'verbose_name': 'Contador de Chamados',
+                'verbose_name_plural': 'Contadores de Chamados',
+                'db_table': 'contadores_chamados',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='contadorchamados',
+            constraint=models.UniqueConstraint(fields=('dimensao', 'chave', 'status'), name='contadores_chamados_unico'),
+        ),
+        migrations.RunPython(popular_contadores, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 4.2.7 on 2026-10-17 20:05
+
+from django.db import migrations, models
+from django.db.models import BigIntegerField, Max
+from django.db.models.functions import Cast
+
+# Nomes congelados de chamados.numeracao
+SEQUENCIA_PG = 'chamados_numero_seq'
+NOME_SEQUENCIA = 'chamado'
+
+
+def sincronizar_numeracao(apps, schema_editor):
+    """Alocador continua após o maior número numérico já gravado"""
+    Chamado = apps.get_model('chamados', 'Chamado')
+    SequenciaChamado = apps.get_model('chamados', 'SequenciaChamado')
+    alias = schema_editor.connection.alias
+
+    maior = Chamado.objects.using(alias).filter(
+        numero__regex=r'^[0-9]+$'
+    ).aggregate(
+        maior=Max(Cast('numero', BigIntegerField()))
+    )['maior'] or 0
+
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            f'CREATE SEQUENCE IF NOT EXISTS {SEQUENCIA_PG} MINVALUE 1')
+        # is_called=false faz o próximo nextval devolver o próprio valor
+        schema_editor.execute(
+            'SELECT setval(%s, %s, false)', [SEQUENCIA_PG, maior + 1])
+    else:
+        SequenciaChamado.objects.using(alias).update_or_create(
+            nome=NOME_SEQUENCIA, defaults={'valor': maior})
+
+
+def remover_sequencia(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(f'DROP SEQUENCE IF EXISTS {SEQUENCIA_PG}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chamados', '0007_contadores_chamados'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SequenciaChamado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nome', models.CharField(max_length=50, unique=True, verbose_name='Nome')),
+                ('valor', models.BigIntegerField(default=0, verbose_name='Último Valor')),
+            ],
+            options={
+                'verbose_name': 'Sequência de Chamados',
+                'verbose_name_plural': 'Sequências de Chamados',
+                'db_table': 'sequencias_chamados',
+            },
+        ),
+        migrations.RunPython(sincronizar_numeracao, remover_sequencia),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.7 on 2026-10-17 20:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chamados', '0008_numeracao_chamados'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChamadoExcluido',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('chamado_id', models.BigIntegerField(verbose_name='Chamado')),
+                ('numero', models.CharField(max_length=10, verbose_name='Número')),
+                ('excluido_em', models.DateTimeField(auto_now_add=True, verbose_name='Excluído em')),
+            ],
+            options={
+                'verbose_name': 'Chamado Excluído',
+                'verbose_name_plural': 'Chamados Excluídos',
+                'db_table': 'chamados_excluidos',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='chamado',
+            index=models.Index(fields=['atualizado_em', 'id'], name='chamados_atualizado_em_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='chamadoexcluido',
+            index=models.Index(fields=['excluido_em', 'id'], name='chamados_excl_em_id_idx'),
+        ),
+    ]
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, router, transaction
 from django.conf import settings
 import os
 
@@ -38,6 +38,69 @@ class TipoServico(models.Model):
         return self.nome
 
 
+class ChamadoQuerySet(models.QuerySet):
+    """Planos de carga usados pelas views de chamados"""
+
+    # Colunas lidas pelo ChamadoListSerializer
+    CAMPOS_LISTAGEM = [
+        'id', 'numero', 'titulo', 'status', 'prioridade',
+        'criado_em', 'atualizado_em',
+        'tipo_servico__nome',
+        'solicitante__nome_completo',
+        'tecnico_responsavel__nome_completo',
+        'tecnico_responsavel__email',
+        'tecnico_responsavel__telefone',
+    ]
+
+    def para_listagem(self, colunas=None):
+        """Junta as relações da listagem e projeta apenas as colunas usadas
+
+        `colunas` substitui CAMPOS_LISTAGEM quando a requisição pede menos
+        campos (ver chamados.campos).
+        """
+        from .campos import projetar
+        return projetar(self, colunas or self.CAMPOS_LISTAGEM)
+
+    def para_detalhe(self, colunas=None, reversas=('anexos', 'historico')):
+        """Junta e pré-carrega as relações exibidas no detalhe
+
+        O histórico vem limitado às `limite_historico() + 1` entradas mais
+        recentes em `historico_recente`; a entrada extra indica que há mais.
+        Com `colunas`, lê só essas colunas e pré-carrega só as `reversas`.
+        """
+        if colunas is None:
+            queryset = self.select_related(
+                'tipo_servico', 'solicitante', 'tecnico_responsavel')
+        else:
+            from .campos import projetar
+            queryset = projetar(self, colunas)
+
+        prefetches = []
+        if 'anexos' in reversas:
+            prefetches.append(models.Prefetch(
+                'anexos',
+                queryset=AnexoChamado.objects.select_related('enviado_por')
+            ))
+        if 'historico' in reversas:
+            prefetches.append(models.Prefetch(
+                'historico',
+                queryset=HistoricoChamado.objects.select_related(
+                    'usuario'
+                ).order_by(*ORDEM_HISTORICO)[:limite_historico() + 1],
+                to_attr='historico_recente'
+            ))
+        return queryset.prefetch_related(*prefetches)
+
+
+# Mais recentes primeiro, com desempate estável para a paginação por cursor
+ORDEM_HISTORICO = ['-criado_em', '-id']
+
+
+def limite_historico():
+    """Quantidade de entradas de histórico embutidas no detalhe"""
+    return getattr(settings, 'CHAMADOS_HISTORICO_DETALHE', 20)
+
+
 class Chamado(models.Model):
     """Modelo para chamados de TI"""
     
@@ -154,54 +217,174 @@ class Chamado(models.Model):
         verbose_name='Encerrado em'
     )
     
+    objects = ChamadoQuerySet.as_manager()
+    
     class Meta:
         verbose_name = 'Chamado'
         verbose_name_plural = 'Chamados'
         db_table = 'chamados'
         ordering = ['-criado_em']
+        indexes = [
+            # meus_chamados e estatísticas do solicitante
+            models.Index(
+                fields=['solicitante', 'status'],
+                name='chamados_solic_status_idx'
+            ),
+            # chamados_tecnico e filtro tecnico_ou_aberto
+            models.Index(
+                fields=['tecnico_responsavel', 'status'],
+                name='chamados_tecnico_status_idx'
+            ),
+            # Ordenação padrão da listagem e paginação por cursor
+            models.Index(
+                fields=['-criado_em', '-id'],
+                name='chamados_criado_em_id_idx'
+            ),
+            # Contagens por status/prioridade do dashboard; as colunas de
+            # usuário tornam o índice "cobridor" para a agregação única de
+            # estatisticas_dashboard, que o lê sem tocar na tabela
+            models.Index(
+                fields=[
+                    'status', 'prioridade',
+                    'solicitante', 'tecnico_responsavel'
+                ],
+                name='chamados_painel_idx'
+            ),
+            # Sincronização incremental (chamados.alteracoes)
+            models.Index(
+                fields=['atualizado_em', 'id'],
+                name='chamados_atualizado_em_id_idx'
+            ),
+        ]
     
     def __str__(self):
         return f"#{self.numero} - {self.titulo}"
     
+    # Valores lidos do banco (attname -> valor), capturados em from_db e
+    # renovados a cada save; None enquanto o chamado não foi carregado/salvo
+    _estado_original = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._estado_original = instance._capturar_estado()
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None):
+        super().refresh_from_db(using=using, fields=fields)
+        estado = self._capturar_estado()
+        if fields is not None and self._estado_original is not None:
+            # Carga de campo adiado: as demais colunas podem ter sido
+            # alteradas em memória e mantêm o valor lido antes
+            recarregados = {
+                self._meta.get_field(campo).attname for campo in fields
+            }
+            self._estado_original.update({
+                attname: valor for attname, valor in estado.items()
+                if attname in recarregados
+            })
+        else:
+            self._estado_original = estado
+
+    def _capturar_estado(self):
+        """Valores atuais das colunas carregadas (as adiadas ficam de fora)"""
+        return {
+            field.attname: self.__dict__[field.attname]
+            for field in self._meta.concrete_fields
+            if field.attname in self.__dict__
+        }
+
+    @property
+    def campos_alterados(self):
+        """Attnames das colunas modificadas desde a leitura ou o último save
+
+        Sem estado capturado (chamado ainda não salvo), todas as colunas
+        carregadas contam como alteradas.
+        """
+        original = self._estado_original or {}
+        return {
+            attname for attname, valor in self._capturar_estado().items()
+            if attname not in original or original[attname] != valor
+        }
+
+    def valor_anterior(self, attname):
+        """Valor da coluna na leitura/último save (o atual se não capturado)"""
+        original = self._estado_original or {}
+        if attname in original:
+            return original[attname]
+        return getattr(self, attname)
+
     def save(self, *args, **kwargs):
         # Gerar número automático se não existir
         if not self.numero:
-            ultimo_numero = Chamado.objects.filter(
-                numero__isnull=False
-            ).order_by('-numero').first()
-            
-            if ultimo_numero and ultimo_numero.numero:
-                try:
-                    proximo_numero = int(ultimo_numero.numero) + 1
-                except (ValueError, TypeError):
-                    proximo_numero = 1
-            else:
-                proximo_numero = 1
-            
-            self.numero = str(proximo_numero).zfill(5)
-        
-        # Atualizar datas baseadas no status
-        if self.pk:  # Se já existe
+            from .numeracao import proximo_numero
+            self.numero = proximo_numero(using=kwargs.get('using'))
+
+        from .contadores import CAMPOS, registrar_variacao, valores_contados
+
+        valores_anteriores = None
+
+        # Instância montada à mão com pk: sem estado capturado, lê o banco
+        if self.pk and self._estado_original is None:
             try:
-                chamado_anterior = Chamado.objects.get(pk=self.pk)
-                
-                # Se mudou para em_atendimento e não tinha data de atendimento
-                if (self.status == 'em_atendimento' and 
-                    chamado_anterior.status != 'em_atendimento' and 
-                    not self.atendido_em):
-                    from django.utils import timezone
-                    self.atendido_em = timezone.now()
-                
-                # Se mudou para encerrado e não tinha data de encerramento
-                if (self.status == 'encerrado' and 
-                    chamado_anterior.status != 'encerrado' and 
-                    not self.encerrado_em):
-                    from django.utils import timezone
-                    self.encerrado_em = timezone.now()
+                self._estado_original = Chamado.objects.using(
+                    kwargs.get('using') or self._state.db
+                ).get(pk=self.pk)._estado_original
             except Chamado.DoesNotExist:
                 pass
-        
-        super().save(*args, **kwargs)
+
+        # Atualizar datas baseadas no status
+        if self.pk and self._estado_original is not None:  # Se já existe
+            status_anterior = self.valor_anterior('status')
+            valores_anteriores = {
+                campo: self.valor_anterior(campo) for campo in CAMPOS
+            }
+
+            # Se mudou para em_atendimento e não tinha data de atendimento
+            if (self.status == 'em_atendimento' and
+                status_anterior != 'em_atendimento' and
+                not self.atendido_em):
+                from django.utils import timezone
+                self.atendido_em = timezone.now()
+
+            # Se mudou para encerrado e não tinha data de encerramento
+            if (self.status == 'encerrado' and
+                status_anterior != 'encerrado' and
+                not self.encerrado_em):
+                from django.utils import timezone
+                self.encerrado_em = timezone.now()
+
+            # Gravar só as colunas modificadas (e o atualizado_em); sem
+            # modificações o UPDATE não é executado
+            if (not self._state.adding and
+                    kwargs.get('update_fields') is None and
+                    not kwargs.get('force_insert') and not args):
+                alterados = self.campos_alterados
+                if alterados:
+                    alterados.add('atualizado_em')
+                kwargs['update_fields'] = alterados
+
+        # Contadores do dashboard mudam na mesma transação do chamado
+        using = kwargs.get('using') or router.db_for_write(
+            Chamado, instance=self)
+        with transaction.atomic(using=using, savepoint=False):
+            super().save(*args, **kwargs)
+            registrar_variacao(
+                valores_anteriores, valores_contados(self), using=using)
+
+        self._estado_original = self._capturar_estado()
+
+    def delete(self, *args, **kwargs):
+        from .contadores import CAMPOS, registrar_variacao
+
+        # O banco ainda tem os valores lidos, não os alterados em memória
+        valores = {campo: self.valor_anterior(campo) for campo in CAMPOS}
+        using = kwargs.get('using') or router.db_for_write(
+            Chamado, instance=self)
+        with transaction.atomic(using=using, savepoint=False):
+            resultado = super().delete(*args, **kwargs)
+            registrar_variacao(valores, None, using=using)
+        return resultado
 
 
 def upload_anexo_path(instance, filename):
@@ -254,6 +437,12 @@ class AnexoChamado(models.Model):
         verbose_name_plural = 'Anexos dos Chamados'
         db_table = 'anexos_chamados'
         ordering = ['-criado_em']
+        indexes = [
+            models.Index(
+                fields=['chamado', '-criado_em'],
+                name='anexos_chamado_criado_idx'
+            ),
+        ]
     
     def __str__(self):
         return f"{self.nome_original} - Chamado #{self.chamado.numero}"
@@ -325,6 +514,117 @@ class HistoricoChamado(models.Model):
         verbose_name_plural = 'Histórico dos Chamados'
         db_table = 'historico_chamados'
         ordering = ['-criado_em']
+        indexes = [
+            models.Index(
+                fields=['chamado', '-criado_em'],
+                name='historico_chamado_criado_idx'
+            ),
+        ]
     
     def __str__(self):
         return f"#{self.chamado.numero} - {self.get_tipo_acao_display()}"
+
+
+class ContadorChamados(models.Model):
+    """Totais de chamados por status em cada dimensão (ver chamados.contadores)"""
+    
+    DIMENSAO_CHOICES = [
+        ('geral', 'Geral'),
+        ('prioridade', 'Prioridade'),
+        ('tipo_servico', 'Tipo de Serviço'),
+        ('solicitante', 'Solicitante'),
+        ('tecnico', 'Técnico'),
+    ]
+    
+    dimensao = models.CharField(
+        max_length=20,
+        choices=DIMENSAO_CHOICES,
+        verbose_name='Dimensão'
+    )
+    
+    # Valor da dimensão: prioridade ou id do tipo/usuário ('' para geral)
+    chave = models.CharField(
+        max_length=50,
+        blank=True,
+        verbose_name='Chave'
+    )
+    
+    status = models.CharField(
+        max_length=20,
+        choices=Chamado.STATUS_CHOICES,
+        verbose_name='Status'
+    )
+    
+    total = models.IntegerField(
+        default=0,
+        verbose_name='Total'
+    )
+    
+    class Meta:
+        verbose_name = 'Contador de Chamados'
+        verbose_name_plural = 'Contadores de Chamados'
+        db_table = 'contadores_chamados'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['dimensao', 'chave', 'status'],
+                name='contadores_chamados_unico'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_dimensao_display()} {self.chave} {self.status}: {self.total}"
+
+
+class ChamadoExcluido(models.Model):
+    """Registro de exclusão de um chamado, lido pela sincronização incremental"""
+    
+    chamado_id = models.BigIntegerField(
+        verbose_name='Chamado'
+    )
+    
+    numero = models.CharField(
+        max_length=10,
+        verbose_name='Número'
+    )
+    
+    excluido_em = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Excluído em'
+    )
+    
+    class Meta:
+        verbose_name = 'Chamado Excluído'
+        verbose_name_plural = 'Chamados Excluídos'
+        db_table = 'chamados_excluidos'
+        indexes = [
+            models.Index(
+                fields=['excluido_em', 'id'],
+                name='chamados_excl_em_id_idx'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"#{self.numero} excluído em {self.excluido_em}"
+
+
+class SequenciaChamado(models.Model):
+    """Contador usado para numerar chamados fora do PostgreSQL (ver chamados.numeracao)"""
+    
+    nome = models.CharField(
+        max_length=50,
+        unique=True,
+        verbose_name='Nome'
+    )
+    
+    valor = models.BigIntegerField(
+        default=0,
+        verbose_name='Último Valor'
+    )
+    
+    class Meta:
+        verbose_name = 'Sequência de Chamados'
+        verbose_name_plural = 'Sequências de Chamados'
+        db_table = 'sequencias_chamados'
+    
+    def __str__(self):
+        return f"{self.nome}: {self.valor}"
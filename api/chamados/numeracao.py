@@ -0,0 +1,160 @@
+"""Alocação do número sequencial dos chamados
+
+No PostgreSQL os números vêm da sequência `chamados_numero_seq`; nos demais
+bancos, de uma linha de `SequenciaChamado` incrementada atomicamente com um
+único UPDATE. Nos dois casos a alocação é O(1) e segura entre requisições
+concorrentes.
+
+`CHAMADOS_NUMERO_BLOCO` (padrão 1) permite que cada processo reserve um bloco
+de números de uma vez e os entregue da memória. Com blocos maiores que 1 a
+numeração deixa de ser estritamente crescente entre workers e números
+reservados e não usados (ao reiniciar o processo) ficam como lacunas.
+"""
+import threading
+
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.db.models import BigIntegerField, Max
+from django.db.models.functions import Cast
+
+from .bancos import suporta_update_returning
+
+SEQUENCIA_PG = 'chamados_numero_seq'
+NOME_SEQUENCIA = 'chamado'
+DIGITOS = 5
+
+_lock = threading.Lock()
+_reservados = {}
+
+
+def formatar(valor):
+    """Número do chamado com zeros à esquerda (mínimo de cinco dígitos)"""
+    return str(valor).zfill(DIGITOS)
+
+
+def _reservar_postgresql(conexao, quantidade):
+    with conexao.cursor() as cursor:
+        cursor.execute(
+            'SELECT nextval(%s) FROM generate_series(1, %s)',
+            [SEQUENCIA_PG, quantidade]
+        )
+        return [linha[0] for linha in cursor.fetchall()]
+
+
+def _incrementar_contador(conexao, quantidade):
+    from .models import SequenciaChamado
+
+    tabela = conexao.ops.quote_name(SequenciaChamado._meta.db_table)
+    atualizar = f'UPDATE {tabela} SET valor = valor + %s WHERE nome = %s'
+    with conexao.cursor() as cursor:
+        # O UPDATE obtém o bloqueio de escrita antes de ler o valor, então
+        # duas alocações nunca veem o mesmo número
+        if suporta_update_returning(conexao):
+            cursor.execute(
+                f'{atualizar} RETURNING valor', [quantidade, NOME_SEQUENCIA])
+            linha = cursor.fetchone()
+        else:
+            cursor.execute(atualizar, [quantidade, NOME_SEQUENCIA])
+            linha = None
+            if cursor.rowcount:
+                cursor.execute(
+                    f'SELECT valor FROM {tabela} WHERE nome = %s',
+                    [NOME_SEQUENCIA]
+                )
+                linha = cursor.fetchone()
+
+    if linha is None:
+        SequenciaChamado.objects.using(conexao.alias).create(
+            nome=NOME_SEQUENCIA, valor=quantidade)
+        return quantidade
+    return linha[0]
+
+
+def _reservar_contador(conexao, quantidade):
+    if conexao.vendor == 'sqlite' and conexao.get_autocommit():
+        # O BEGIN padrão (DEFERRED) do SQLite pode falhar com "database is
+        # locked" ao promover a leitura para escrita sob concorrência; o
+        # IMMEDIATE pega o bloqueio de escrita no início e espera pelo
+        # timeout da conexão.
+        conexao.ensure_connection()
+        with conexao.cursor() as cursor:
+            cursor.execute('BEGIN IMMEDIATE')
+            try:
+                ultimo = _incrementar_contador(conexao, quantidade)
+            except Exception:
+                cursor.execute('ROLLBACK')
+                raise
+            cursor.execute('COMMIT')
+    else:
+        with transaction.atomic(using=conexao.alias, savepoint=False):
+            ultimo = _incrementar_contador(conexao, quantidade)
+    return list(range(ultimo - quantidade + 1, ultimo + 1))
+
+
+def reservar(quantidade=1, using=None):
+    """Reserva `quantidade` números novos diretamente no banco"""
+    conexao = connections[using or router.db_for_write(_modelo_chamado())]
+    if conexao.vendor == 'postgresql':
+        return _reservar_postgresql(conexao, quantidade)
+    return _reservar_contador(conexao, quantidade)
+
+
+def proximo_numero(using=None):
+    """Próximo número de chamado, já formatado"""
+    bloco = getattr(settings, 'CHAMADOS_NUMERO_BLOCO', 1)
+    if bloco <= 1:
+        return formatar(reservar(1, using=using)[0])
+
+    alias = using or router.db_for_write(_modelo_chamado())
+    with _lock:
+        disponiveis = _reservados.setdefault(alias, [])
+        if not disponiveis:
+            disponiveis.extend(reversed(reservar(bloco, using=alias)))
+        return formatar(disponiveis.pop())
+
+
+def descartar_reservados():
+    """Esquece os números reservados em memória por este processo"""
+    with _lock:
+        _reservados.clear()
+
+
+def maior_numero_existente(chamado_model=None, using=None):
+    """Maior `numero` numérico já gravado (0 se não houver chamados)"""
+    chamado_model = chamado_model or _modelo_chamado()
+    maior = chamado_model.objects.using(using).filter(
+        numero__regex=r'^[0-9]+$'
+    ).aggregate(
+        maior=Max(Cast('numero', BigIntegerField()))
+    )['maior']
+    return maior or 0
+
+
+def sincronizar(chamado_model=None, sequencia_model=None, using=None):
+    """Ajusta o alocador para continuar após o maior número existente"""
+    chamado_model = chamado_model or _modelo_chamado()
+    if sequencia_model is None:
+        from .models import SequenciaChamado as sequencia_model
+
+    alias = using or router.db_for_write(chamado_model)
+    conexao = connections[alias]
+    maior = maior_numero_existente(chamado_model, using=alias)
+
+    if conexao.vendor == 'postgresql':
+        with conexao.cursor() as cursor:
+            cursor.execute(
+                f'CREATE SEQUENCE IF NOT EXISTS {SEQUENCIA_PG} MINVALUE 1')
+            # is_called=false faz o próximo nextval devolver o próprio valor
+            cursor.execute(
+                'SELECT setval(%s, %s, false)', [SEQUENCIA_PG, maior + 1])
+    else:
+        sequencia_model.objects.using(alias).update_or_create(
+            nome=NOME_SEQUENCIA, defaults={'valor': maior})
+
+    descartar_reservados()
+    return maior
+
+
+def _modelo_chamado():
+    from .models import Chamado
+    return Chamado
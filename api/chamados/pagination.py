@@ -0,0 +1,257 @@
+import base64
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator as DjangoPaginator
+from django.db import models
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Paginação por chave (keyset) sem COUNT e sem OFFSET
+
+    Cada página continua a partir dos valores de ordenação da última linha
+    da página anterior, com `id` como desempate. O custo de qualquer página
+    é o mesmo da primeira e as linhas inseridas durante a navegação não
+    deslocam as páginas seguintes.
+
+    A ordenação vem do queryset já filtrado (OrderingFilter ou
+    `Meta.ordering`); apenas campos não nulos são suportados.
+    """
+
+    page_size = PageNumberPagination.page_size
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Cursor inválido'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = remove_query_param(
+            request.build_absolute_uri(), 'page')
+        self.model = queryset.model
+        self.ordering = self.get_ordering(queryset)
+        cursor = self.decode_cursor(request, queryset.model)
+
+        queryset = queryset.order_by(*self.ordering)
+        campos, adiados = queryset.query.deferred_loading
+        if campos and not adiados and not queryset.query.values_select:
+            # Projeção com only() (?fields=): o cursor precisa dos valores
+            # de ordenação sem carregá-los um a um depois
+            queryset = queryset.only(
+                *campos, *(campo.lstrip('-') for campo in self.ordering))
+        if cursor is None:
+            reverso = False
+        else:
+            reverso = cursor['r']
+            queryset = queryset.filter(
+                self.seek_filter(cursor['v'], reverso))
+        if reverso:
+            queryset = queryset.reverse()
+
+        pagina = queryset[:self.page_size + 1]
+        projecao = getattr(view, 'projecao', None)
+        if projecao:
+            pagina = projecao(pagina)
+        resultados = list(pagina)
+        tem_mais = len(resultados) > self.page_size
+        resultados = resultados[:self.page_size]
+
+        if reverso:
+            resultados.reverse()
+            self.has_next = True
+            self.has_previous = tem_mais
+        else:
+            self.has_next = tem_mais
+            self.has_previous = cursor is not None
+
+        self.page = resultados
+        return resultados
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverso=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverso=True)
+
+    def get_ordering(self, queryset):
+        """Ordenação efetiva do queryset com `id` como desempate final"""
+        ordering = list(queryset.query.order_by or queryset.model._meta.ordering)
+        # Anotações (ex.: relevância da busca) não têm valor estável para
+        # servir de chave e ficam de fora
+        ordering = [
+            campo for campo in ordering
+            if isinstance(campo, str) and
+            campo.lstrip('-') not in queryset.query.annotations
+        ]
+        if not ordering:
+            ordering = ['-pk']
+        if ordering[-1].lstrip('-') not in ('pk', 'id'):
+            prefixo = '-' if ordering[0].startswith('-') else ''
+            ordering.append(f'{prefixo}pk')
+        return ordering
+
+    def seek_filter(self, valores, reverso):
+        """Monta `(a, b, ...) > (va, vb, ...)` respeitando a direção de cada campo
+
+        O primeiro campo também recebe um limite não estrito isolado para que
+        o banco use o índice como intervalo em vez de filtrar linha a linha.
+        """
+        condicoes = []
+        for i, campo in enumerate(self.ordering):
+            nome = campo.lstrip('-')
+            descendente = campo.startswith('-') != reverso
+            lookup = 'lt' if descendente else 'gt'
+            igualdades = {
+                anterior.lstrip('-'): valores[j]
+                for j, anterior in enumerate(self.ordering[:i])
+            }
+            condicoes.append(models.Q(
+                **igualdades, **{f'{nome}__{lookup}': valores[i]}))
+
+        seek = condicoes[0]
+        for condicao in condicoes[1:]:
+            seek |= condicao
+
+        primeiro = self.ordering[0]
+        descendente = primeiro.startswith('-') != reverso
+        limite = 'lte' if descendente else 'gte'
+        return models.Q(**{f'{primeiro.lstrip("-")}__{limite}': valores[0]}) & seek
+
+    def encode_cursor(self, obj, reverso):
+        valores = []
+        for campo in self.ordering:
+            nome = campo.lstrip('-')
+            if isinstance(obj, dict):
+                # Linhas de values(): o pk está sob o nome do campo
+                if nome == 'pk':
+                    nome = self.model._meta.pk.attname
+                valor = obj[nome]
+            else:
+                valor = getattr(obj, nome)
+            if hasattr(valor, 'isoformat'):
+                valor = valor.isoformat()
+            valores.append(valor)
+
+        conteudo = json.dumps(
+            {'o': self.ordering, 'v': valores, 'r': reverso},
+            separators=(',', ':')
+        )
+        token = base64.urlsafe_b64encode(conteudo.encode()).decode()
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request, model):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(token.encode()))
+            if cursor['o'] != self.ordering:
+                raise ValueError('Ordenação diferente da do cursor')
+            if len(cursor['v']) != len(self.ordering):
+                raise ValueError('Quantidade de valores inválida')
+            cursor['v'] = [
+                self.get_field(model, campo).to_python(valor)
+                for campo, valor in zip(self.ordering, cursor['v'])
+            ]
+            cursor['r'] = bool(cursor['r'])
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return cursor
+
+    def get_field(self, model, campo):
+        nome = campo.lstrip('-')
+        if nome == 'pk':
+            return model._meta.pk
+        return model._meta.get_field(nome)
+
+
+class ProjecaoPaginator(DjangoPaginator):
+    """Paginator que aplica uma projeção (ex.: values()) só à página
+
+    O COUNT continua sobre o queryset original, sem os JOINs da projeção.
+    """
+
+    def __init__(self, object_list, per_page, projecao=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.projecao = projecao
+
+    def _get_page(self, object_list, *args, **kwargs):
+        if self.projecao:
+            object_list = self.projecao(object_list)
+        return super()._get_page(object_list, *args, **kwargs)
+
+
+class ChamadoPagination(PageNumberPagination):
+    """Paginação por página com modo cursor opcional
+
+    `?paginacao=cursor` (ou a presença de `?cursor=`) troca para
+    `KeysetPagination`, que não executa COUNT nem OFFSET. Se a view tiver um
+    atributo `projecao`, ele é aplicado ao queryset de cada página.
+    """
+
+    mode_query_param = 'paginacao'
+    projecao = None
+
+    def django_paginator_class(self, queryset, page_size):
+        return ProjecaoPaginator(queryset, page_size, projecao=self.projecao)
+
+    def usa_cursor(self, request):
+        return (
+            request.query_params.get(self.mode_query_param) == 'cursor' or
+            KeysetPagination.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        self.projecao = getattr(view, 'projecao', None)
+        if self.usa_cursor(request):
+            self.keyset = KeysetPagination()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_next_link(self):
+        if self.keyset is not None:
+            return self.keyset.get_next_link()
+        return super().get_next_link()
+
+    def get_previous_link(self):
+        if self.keyset is not None:
+            return self.keyset.get_previous_link()
+        return super().get_previous_link()
+
+    def total(self):
+        """Total de itens, ou None no modo cursor"""
+        if self.keyset is not None:
+            return None
+        return self.page.paginator.count
@@ -0,0 +1,83 @@
+"""Serialização da listagem de chamados sem instanciar modelos
+
+`ChamadoListProjecao` lê tuplas de `values()` (com as colunas das relações
+já juntadas) e monta os dicionários diretamente, com os rótulos de status e
+prioridade pré-calculados. A saída é idêntica, byte a byte, à do
+`ChamadoListSerializer`; o ganho vem de não construir um `Chamado`, um
+`TipoServico` e até dois `Usuario` por linha nem percorrer os campos
+genéricos do DRF.
+
+`manage.py medir_serializacao` compara os dois caminhos.
+"""
+from rest_framework import serializers
+from rest_framework.utils.serializer_helpers import ReturnDict, ReturnList
+from sistema_chamados.metricas import cronometro_serializacao
+from usuarios.models import iniciais_do_nome
+
+from .models import Chamado
+
+
+class ChamadoListProjecao:
+    """Equivalente ao ChamadoListSerializer para linhas de `values()`"""
+
+    COLUNAS = (
+        'id', 'numero', 'titulo', 'tipo_servico__nome', 'status',
+        'prioridade', 'solicitante__nome_completo', 'tecnico_responsavel_id',
+        'tecnico_responsavel__nome_completo', 'tecnico_responsavel__email',
+        'tecnico_responsavel__telefone', 'criado_em', 'atualizado_em',
+    )
+
+    STATUS = dict(Chamado.STATUS_CHOICES)
+    PRIORIDADES = dict(Chamado.PRIORIDADE_CHOICES)
+
+    def __init__(self, instance=None, many=False, context=None):
+        self.instance = instance
+        self.many = many
+        self.context = context or {}
+        # Mesmo formato e fuso do DateTimeField usado pelo ModelSerializer
+        self.data_hora = serializers.DateTimeField().to_representation
+
+    @classmethod
+    def projetar(cls, queryset):
+        """Troca o queryset de modelos pelas linhas lidas pela projeção"""
+        return queryset.values(*cls.COLUNAS)
+
+    def to_representation(self, linha):
+        data_hora = self.data_hora
+        status = linha['status']
+        prioridade = linha['prioridade']
+        if linha['tecnico_responsavel_id'] is None:
+            tecnico = None
+        else:
+            nome = linha['tecnico_responsavel__nome_completo']
+            tecnico = {
+                'id': linha['tecnico_responsavel_id'],
+                'nome_completo': nome,
+                'iniciais': iniciais_do_nome(nome),
+                'email': linha['tecnico_responsavel__email'],
+                'telefone': linha['tecnico_responsavel__telefone'],
+            }
+        return {
+            'id': linha['id'],
+            'numero': linha['numero'],
+            'titulo': linha['titulo'],
+            'tipo_servico_nome': linha['tipo_servico__nome'],
+            'status': status,
+            'status_display': self.STATUS.get(status, status),
+            'prioridade': prioridade,
+            'prioridade_display': self.PRIORIDADES.get(prioridade, prioridade),
+            'solicitante_nome': linha['solicitante__nome_completo'],
+            'tecnico_responsavel': tecnico,
+            'criado_em': data_hora(linha['criado_em']),
+            'atualizado_em': data_hora(linha['atualizado_em']),
+        }
+
+    @property
+    def data(self):
+        with cronometro_serializacao():
+            if self.many:
+                return ReturnList(
+                    [self.to_representation(linha) for linha in self.instance],
+                    serializer=self
+                )
+            return ReturnDict(self.to_representation(self.instance), serializer=self)
@@ -0,0 +1,165 @@
+"""Cache em memória dos dados de referência: tipos de serviço e técnicos
+
+Mudam poucas vezes por ano e são lidos a cada listagem e a cada escrita de
+chamado (validação de `tipo_servico` e `tecnico_responsavel`). Cada processo
+guarda os dados junto com a geração em que foram lidos; a geração fica no
+cache do Django (`CACHES`) e é incrementada depois do commit de qualquer
+save/delete de `TipoServico` ou `Usuario`. Na leitura seguinte, cada
+processo vê a geração nova e recarrega.
+
+Com vários workers o cache do Django precisa ser compartilhado (Redis,
+Memcached); o LocMemCache padrão só coordena o próprio processo. Escritas
+que não emitem sinais (`QuerySet.update()`, `bulk_create`) não invalidam:
+chame `invalidar()`.
+
+Dentro de uma transação o cache é ignorado e views e validação seguem o
+caminho normal pelo banco: a leitura poderia ver escritas ainda não
+confirmadas e guardá-las para todos.
+"""
+import copy
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework import serializers
+from rest_framework.response import Response
+
+from .campos import PARAMETRO_CAMPOS, PARAMETRO_EXPANDIR
+from .models import TipoServico
+
+CHAVE_GERACAO = 'chamados:referencia:geracao'
+
+
+def geracao_atual():
+    """Geração compartilhada, ou None se o backend de cache não guarda nada"""
+    geracao = cache.get(CHAVE_GERACAO)
+    if geracao is None:
+        # Início único: se a chave se perder (reinício do Redis, expulsão),
+        # a nova sequência não repete gerações que os processos já viram
+        cache.add(CHAVE_GERACAO, time.time_ns(), timeout=None)
+        geracao = cache.get(CHAVE_GERACAO)
+    return geracao
+
+
+def invalidar():
+    """Faz todos os processos recarregarem os dados de referência"""
+    try:
+        cache.incr(CHAVE_GERACAO)
+    except ValueError:
+        cache.add(CHAVE_GERACAO, time.time_ns(), timeout=None)
+
+
+class DadosReferencia:
+    """Dicionário pk -> instância recarregado quando a geração muda"""
+
+    def __init__(self, carregar):
+        self.carregar = carregar
+        self._atual = None  # (geração, dados)
+
+    def obter(self):
+        """Dados em memória, ou None quando o cache não pode ser usado"""
+        if connection.in_atomic_block:
+            return None
+        # Lida antes de carregar: os dados guardados são no mínimo tão
+        # novos quanto a geração associada a eles
+        geracao = geracao_atual()
+        if geracao is None:
+            return None
+        atual = self._atual
+        if atual is not None and atual[0] == geracao:
+            return atual[1]
+        dados = self.carregar()
+        self._atual = (geracao, dados)
+        return dados
+
+    def limpar(self):
+        self._atual = None
+
+
+def _carregar_tipos_servico():
+    return {
+        tipo.pk: tipo
+        for tipo in TipoServico.objects.filter(ativo=True).order_by('nome')
+    }
+
+
+def _carregar_tecnicos():
+    from usuarios.models import Usuario
+    tecnicos = Usuario.objects.filter(
+        tipo_usuario='tecnico', ativo=True).order_by('nome_completo')
+    return {tecnico.pk: tecnico for tecnico in tecnicos}
+
+
+TIPOS_SERVICO = DadosReferencia(_carregar_tipos_servico)
+TECNICOS = DadosReferencia(_carregar_tecnicos)
+
+
+@receiver([post_save, post_delete], sender=TipoServico)
+@receiver([post_save, post_delete], sender=settings.AUTH_USER_MODEL)
+def _invalidar_ao_salvar(sender, update_fields=None, **kwargs):
+    # O login só atualiza last_login, que nenhum dado de referência usa
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    transaction.on_commit(invalidar)
+
+
+class ReferenciaRelatedField(serializers.PrimaryKeyRelatedField):
+    """PrimaryKeyRelatedField que resolve o pk pelo cache antes do banco
+
+    Pks fora do cache (inativos, inexistentes) seguem a validação normal.
+    """
+
+    def __init__(self, referencia, **kwargs):
+        self.referencia = referencia
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        dados = self.referencia.obter()
+        if dados and not isinstance(data, bool) and self.pk_field is None:
+            try:
+                obj = dados.get(int(data))
+            except (TypeError, ValueError):
+                obj = None
+            if obj is not None:
+                # Cópia: a instância guardada é compartilhada entre requisições
+                return copy.copy(obj)
+        return super().to_internal_value(data)
+
+
+class ValidacaoReferenciaMixin:
+    """ModelSerializer que valida as FKs de `Meta.referencias` pelo cache
+
+        class Meta:
+            referencias = {'tipo_servico': TIPOS_SERVICO}
+    """
+
+    def build_relational_field(self, field_name, relation_info):
+        classe, kwargs = super().build_relational_field(field_name, relation_info)
+        referencia = getattr(self.Meta, 'referencias', {}).get(field_name)
+        if referencia is not None and classe is serializers.PrimaryKeyRelatedField:
+            return ReferenciaRelatedField, {**kwargs, 'referencia': referencia}
+        return classe, kwargs
+
+
+class ListaReferenciaMixin:
+    """ListAPIView servida pelo cache quando não há busca nem ordenação"""
+
+    referencia = None
+    parametros_em_memoria = {PARAMETRO_CAMPOS, PARAMETRO_EXPANDIR, 'format', 'page'}
+
+    def list(self, request, *args, **kwargs):
+        dados = None
+        if not set(request.query_params) - self.parametros_em_memoria:
+            dados = self.referencia.obter()
+        if dados is None:
+            return super().list(request, *args, **kwargs)
+
+        objetos = list(dados.values())
+        page = self.paginate_queryset(objetos)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        return Response(self.get_serializer(objetos, many=True).data)
@@ -0,0 +1,58 @@
+"""Renderer JSON com orjson quando disponível
+
+O orjson é opcional: sem ele, ou nos casos que ele não cobre (indentação do
+navegador da API, `COMPACT_JSON`/`UNICODE_JSON` desligados, inteiros acima
+de 64 bits), o renderer se comporta exatamente como o `JSONRenderer` do DRF.
+Com ele a saída é a mesma, byte a byte, para os payloads da API (a única
+diferença é NaN/Infinity, que o orjson escreve como null em vez de falhar).
+"""
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depende do ambiente
+    orjson = None
+
+# Datas com "Z" como o JSONEncoder do DRF; chaves não-str viram texto como
+# no json da biblioteca padrão
+OPCOES_ORJSON = (
+    (orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS) if orjson else 0
+)
+
+_encoder = JSONEncoder()
+
+
+def _padrao(obj):
+    """Tipos que o orjson não conhece (Decimal, textos lazy, QuerySet...)"""
+    return _encoder.default(obj)
+
+
+def _escapar_separadores(conteudo):
+    # O DRF sempre escapa U+2028/U+2029 para manter o JSON válido em JS
+    if b'\xe2\x80\xa8' in conteudo or b'\xe2\x80\xa9' in conteudo:
+        conteudo = conteudo.replace(b'\xe2\x80\xa8', b'\\u2028')
+        conteudo = conteudo.replace(b'\xe2\x80\xa9', b'\\u2029')
+    return conteudo
+
+
+class JSONRapidoRenderer(JSONRenderer):
+    """JSONRenderer que usa orjson no caminho comum"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or data is None
+            or not self.compact
+            or self.ensure_ascii
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            return _escapar_separadores(
+                orjson.dumps(data, default=_padrao, option=OPCOES_ORJSON))
+        except orjson.JSONEncodeError:
+            # Ex.: inteiro fora de 64 bits; o json padrão resolve ou levanta
+            # o mesmo erro de antes
+            return super().render(data, accepted_media_type, renderer_context)
+
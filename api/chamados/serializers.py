@@ -1,10 +1,13 @@
 from rest_framework import serializers
 from usuarios.serializers import TecnicoSerializer, UsuarioListSerializer
 
-from .models import AnexoChamado, Chamado, HistoricoChamado, TipoServico
+from .campos import CamposDinamicosMixin
+from .models import (ORDEM_HISTORICO, AnexoChamado, Chamado, HistoricoChamado,
+                     TipoServico, limite_historico)
+from .referencia import TECNICOS, TIPOS_SERVICO, ValidacaoReferenciaMixin
 
 
-class TipoServicoSerializer(serializers.ModelSerializer):
+class TipoServicoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializer para TipoServico"""
 
     class Meta:
@@ -53,7 +56,7 @@ class HistoricoChamadoSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'criado_em']
 
 
-class ChamadoListSerializer(serializers.ModelSerializer):
+class ChamadoListSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializer para listagem de chamados"""
 
     tipo_servico_nome = serializers.CharField(
@@ -73,16 +76,24 @@ class ChamadoListSerializer(serializers.ModelSerializer):
             'prioridade', 'prioridade_display', 'solicitante_nome', 'tecnico_responsavel',
             'criado_em', 'atualizado_em'
         ]
+        colunas = {
+            'tipo_servico_nome': ['tipo_servico__nome'],
+            'status_display': ['status'],
+            'prioridade_display': ['prioridade'],
+            'solicitante_nome': ['solicitante__nome_completo'],
+        }
+        expansiveis = ['tecnico_responsavel']
 
 
-class ChamadoDetailSerializer(serializers.ModelSerializer):
+class ChamadoDetailSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializer detalhado para chamados"""
 
     tipo_servico = TipoServicoSerializer(read_only=True)
     solicitante = UsuarioListSerializer(read_only=True)
     tecnico_responsavel = TecnicoSerializer(read_only=True)
     anexos = AnexoChamadoSerializer(many=True, read_only=True)
-    historico = HistoricoChamadoSerializer(many=True, read_only=True)
+    historico = serializers.SerializerMethodField()
+    historico_truncado = serializers.SerializerMethodField()
     status_display = serializers.CharField(
         source='get_status_display', read_only=True)
     prioridade_display = serializers.CharField(
@@ -94,12 +105,41 @@ class ChamadoDetailSerializer(serializers.ModelSerializer):
             'id', 'numero', 'titulo', 'descricao', 'tipo_servico', 'status',
             'status_display', 'prioridade', 'prioridade_display', 'equipamento',
             'localizacao', 'solicitante', 'tecnico_responsavel', 'observacoes_tecnico',
-            'anexos', 'historico', 'criado_em', 'atualizado_em', 'atendido_em',
-            'encerrado_em'
+            'anexos', 'historico', 'historico_truncado', 'criado_em',
+            'atualizado_em', 'atendido_em', 'encerrado_em'
         ]
-
-
-class ChamadoCreateSerializer(serializers.ModelSerializer):
+        colunas = {
+            'status_display': ['status'],
+            'prioridade_display': ['prioridade'],
+        }
+        expansiveis = ['tipo_servico', 'solicitante', 'tecnico_responsavel']
+        prefetch = {
+            'anexos': 'anexos',
+            'historico': 'historico',
+            'historico_truncado': 'historico',
+        }
+
+    def historico_recente(self, obj):
+        """Entradas mais recentes (limite + 1), pré-carregadas por para_detalhe"""
+        if not hasattr(obj, 'historico_recente'):
+            obj.historico_recente = list(
+                obj.historico.select_related('usuario').order_by(
+                    *ORDEM_HISTORICO)[:limite_historico() + 1]
+            )
+        return obj.historico_recente
+
+    def get_historico(self, obj):
+        entradas = self.historico_recente(obj)[:limite_historico()]
+        return HistoricoChamadoSerializer(
+            entradas, many=True, context=self.context).data
+
+    def get_historico_truncado(self, obj):
+        """Indica que há entradas além das embutidas (ver /historico/)"""
+        return len(self.historico_recente(obj)) > limite_historico()
+
+
+class ChamadoCreateSerializer(ValidacaoReferenciaMixin,
+                              serializers.ModelSerializer):
     """Serializer para criação de chamados"""
 
     class Meta:
@@ -108,13 +148,15 @@ class ChamadoCreateSerializer(serializers.ModelSerializer):
             'titulo', 'descricao', 'tipo_servico', 'prioridade',
             'equipamento', 'localizacao'
         ]
+        referencias = {'tipo_servico': TIPOS_SERVICO}
 
     def create(self, validated_data):
         # O solicitante será definido automaticamente na view
         return super().create(validated_data)
 
 
-class ChamadoUpdateSerializer(serializers.ModelSerializer):
+class ChamadoUpdateSerializer(ValidacaoReferenciaMixin,
+                              serializers.ModelSerializer):
     """Serializer para atualização de chamados"""
 
     class Meta:
@@ -123,6 +165,10 @@ class ChamadoUpdateSerializer(serializers.ModelSerializer):
             'titulo', 'descricao', 'tipo_servico', 'status', 'prioridade',
             'equipamento', 'localizacao', 'tecnico_responsavel', 'observacoes_tecnico'
         ]
+        referencias = {
+            'tipo_servico': TIPOS_SERVICO,
+            'tecnico_responsavel': TECNICOS,
+        }
 
     def validate_tecnico_responsavel(self, value):
         """Valida se o usuário é realmente um técnico"""
@@ -135,9 +181,15 @@ class ChamadoUpdateSerializer(serializers.ModelSerializer):
 class ChamadoStatusUpdateSerializer(serializers.ModelSerializer):
     """Serializer para atualização apenas do status"""
 
+    # Status que o cliente exibia; validado como o novo status
+    status_esperado = serializers.ChoiceField(
+        choices=Chamado.STATUS_CHOICES, required=False, write_only=True,
+        allow_blank=True, allow_null=True
+    )
+
     class Meta:
         model = Chamado
-        fields = ['status', 'observacoes_tecnico']
+        fields = ['status', 'status_esperado', 'observacoes_tecnico']
 
 
 class AnexoChamadoUploadSerializer(serializers.ModelSerializer):
@@ -0,0 +1,80 @@
+"""Respostas em stream (listas JSON e exportações) sob WSGI e ASGI
+
+Sob ASGI o Django 4.2 consome um iterador síncrono inteiro
+(`sync_to_async(list)`) antes de enviar o primeiro byte. `resposta_stream`
+entrega ao servidor ASGI um iterador assíncrono que lê o gerador síncrono
+em blocos de até TAMANHO_BLOCO bytes, cada bloco numa chamada
+`sync_to_async` (a mesma thread da view, com a mesma conexão do banco).
+Sob WSGI o gerador é usado diretamente.
+"""
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+
+from .renderers import JSONRapidoRenderer
+
+# Linhas lidas do banco por vez; o cursor do servidor (PostgreSQL) ou o
+# fetchmany (SQLite) mantém a memória do worker constante.
+TAMANHO_LOTE = 500
+
+# Bytes juntados por ida à thread da view sob ASGI
+TAMANHO_BLOCO = 64 * 1024
+
+
+def gerar_json_lista(queryset, serializer, chunk_size=TAMANHO_LOTE):
+    """Gera um array JSON item a item a partir do queryset"""
+    renderer = JSONRapidoRenderer()
+
+    yield b'['
+    primeiro = True
+    for obj in queryset.iterator(chunk_size=chunk_size):
+        item = renderer.render(serializer.to_representation(obj))
+        if primeiro:
+            primeiro = False
+            yield item
+        else:
+            yield b',' + item
+    yield b']'
+
+
+def _proximo_bloco(partes):
+    """Partes seguintes do gerador até TAMANHO_BLOCO bytes; b'' no fim"""
+    bloco = []
+    tamanho = 0
+    for parte in partes:
+        if isinstance(parte, str):
+            parte = parte.encode()
+        bloco.append(parte)
+        tamanho += len(parte)
+        if tamanho >= TAMANHO_BLOCO:
+            break
+    return b''.join(bloco)
+
+
+async def iterar_async(partes):
+    """Iterador assíncrono sobre um gerador síncrono, um bloco por vez"""
+    partes = iter(partes)
+    proximo = sync_to_async(_proximo_bloco, thread_sensitive=True)
+    try:
+        while bloco := await proximo(partes):
+            yield bloco
+    finally:
+        # Cliente desconectado: libera o cursor do gerador
+        if hasattr(partes, 'close'):
+            await sync_to_async(partes.close, thread_sensitive=True)()
+
+
+def resposta_stream(request, partes, **kwargs):
+    """StreamingHttpResponse que transmite `partes` também sob ASGI"""
+    if isinstance(getattr(request, '_request', request), ASGIRequest):
+        partes = iterar_async(partes)
+    return StreamingHttpResponse(partes, **kwargs)
+
+
+def resposta_json_stream(request, queryset, serializer_class, context=None):
+    """StreamingHttpResponse com a lista serializada sem carregar tudo em memória"""
+    serializer = serializer_class(context=context or {})
+    return resposta_stream(
+        request, gerar_json_lista(queryset, serializer),
+        content_type='application/json'
+    )
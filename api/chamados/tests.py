@@ -1,3 +1,2078 @@
-from django.test import TestCase
+import asyncio
+import csv
+import io
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from datetime import timedelta
+from decimal import Decimal
+from importlib import import_module
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from django.apps import apps as global_apps
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management import CommandError, call_command
+from django.db import OperationalError, connection, transaction
+from django.test import (AsyncClient, TestCase, TransactionTestCase,
+                         override_settings)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from drf_spectacular.drainage import GENERATOR_STATS
+from drf_spectacular.generators import SchemaGenerator
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework_simplejwt.tokens import AccessToken
+
+from sistema_chamados import consultas_lentas, metricas
+from usuarios.models import Usuario
+
+from . import (alteracoes, carga, contadores, eventos, exportacao,
+               numeracao, referencia, streaming)
+from .historico import registro_historico
+from .models import (AnexoChamado, Chamado, ChamadoExcluido, ChamadoQuerySet,
+                     ContadorChamados, HistoricoChamado, TipoServico)
+from .pagination import KeysetPagination
+from .parsers import JSONRapidoParser
+from .projecoes import ChamadoListProjecao
+from .renderers import JSONRapidoRenderer
+from .serializers import ChamadoDetailSerializer, ChamadoListSerializer
+from .transicoes import TransicaoConflitante, transicionar_status
+
+
+class ArquivosIsolados(override_settings):
+    """Baldes de limite (usuarios.limites) e registro de consultas lentas
+    numa pasta temporária própria"""
+
+    def __init__(self):
+        super().__init__()
+
+    def enable(self):
+        self.pasta = tempfile.mkdtemp()
+        self.options = {
+            'LIMITES_ARQUIVO': os.path.join(self.pasta, 'limites'),
+            'CONSULTAS_LENTAS_ARQUIVO': os.path.join(self.pasta, 'consultas_lentas.log'),
+        }
+        super().enable()
+
+    def disable(self):
+        super().disable()
+        shutil.rmtree(self.pasta, ignore_errors=True)
+
+
+_arquivos = ArquivosIsolados()
+
+
+def setUpModule():
+    # Sem herdar os baldes de outras execuções dos testes nem gravar na
+    # pasta de logs do projeto
+    _arquivos.enable()
+
+
+def tearDownModule():
+    _arquivos.disable()
+
+
+class ChamadosTestMixin:
+    """Dados comuns para os testes da API de chamados"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tipo = TipoServico.objects.create(nome='Suporte Técnico')
+        cls.usuario = Usuario.objects.create_user(
+            username='maria', password='senha123',
+            nome_completo='Maria Costa', tipo_usuario='usuario'
+        )
+        cls.tecnico = Usuario.objects.create_user(
+            username='carlos', password='senha123',
+            nome_completo='Carlos Silva', tipo_usuario='tecnico'
+        )
+        cls.admin = Usuario.objects.create_user(
+            username='admin', password='senha123',
+            nome_completo='Administrador', tipo_usuario='admin'
+        )
+        for i in range(5):
+            chamado = Chamado.objects.create(
+                titulo=f'Chamado {i}',
+                descricao='Computador não liga',
+                tipo_servico=cls.tipo,
+                solicitante=cls.usuario,
+                tecnico_responsavel=cls.tecnico if i % 2 else None,
+                status='em_atendimento' if i % 2 else 'aberto',
+                prioridade='urgente' if i == 0 else 'media',
+            )
+            HistoricoChamado.objects.create(
+                chamado=chamado, tipo_acao='criado',
+                descricao='Chamado criado', usuario=cls.usuario
+            )
+        cls.chamado = Chamado.objects.order_by('id').first()
+
+    def cliente(self, usuario):
+        client = APIClient()
+        client.force_authenticate(usuario)
+        return client
+
+
+# Uma requisição a ser medida: `usuario` é o nome do atributo da classe de
+# teste (None para rotas anônimas); `kwargs` e `dados` recebem o próprio
+# teste e montam os argumentos da URL e o corpo da requisição.
+Requisicao = namedtuple(
+    'Requisicao',
+    ['metodo', 'usuario', 'maximo', 'kwargs', 'dados', 'formato'],
+    defaults=[None, None, 'json']
+)
+
+
+class OrcamentoConsultasMixin:
+    """Falha quando uma rota excede o número máximo de consultas SQL
+
+    As classes concretas definem `urlconf` e, em `ORCAMENTOS`, uma lista de
+    `Requisicao` para cada nome de rota do módulo. Rotas novas sem orçamento
+    também fazem o teste falhar.
+    """
+
+    urlconf = None
+    ORCAMENTOS = {}
+
+    def test_todas_as_rotas_tem_orcamento(self):
+        modulo = import_module(self.urlconf)
+        nomes = {padrao.name for padrao in modulo.urlpatterns}
+        self.assertEqual(nomes - set(self.ORCAMENTOS), set())
+
+    def test_orcamentos(self):
+        app_name = import_module(self.urlconf).app_name
+        for nome, requisicoes in self.ORCAMENTOS.items():
+            for requisicao in requisicoes:
+                with self.subTest(rota=nome, metodo=requisicao.metodo):
+                    self.verificar_orcamento(f'{app_name}:{nome}', requisicao)
+
+    def verificar_orcamento(self, rota, requisicao):
+        kwargs = requisicao.kwargs(self) if requisicao.kwargs else {}
+        dados = requisicao.dados(self) if requisicao.dados else None
+        client = APIClient()
+        if requisicao.usuario:
+            client.force_authenticate(getattr(self, requisicao.usuario))
+
+        # Cada requisição roda num savepoint descartado para não afetar as
+        # demais
+        with transaction.atomic():
+            with CaptureQueriesContext(connection) as ctx:
+                response = getattr(client, requisicao.metodo.lower())(
+                    reverse(rota, kwargs=kwargs), dados,
+                    format=requisicao.formato
+                )
+                # Respostas em stream só consultam o banco ao serem lidas
+                if response.streaming:
+                    conteudo = b''.join(response.streaming_content)
+                else:
+                    conteudo = response.content
+            transaction.set_rollback(True)
+
+        self.assertLess(response.status_code, 400, conteudo)
+        self.assertLessEqual(
+            len(ctx.captured_queries), requisicao.maximo,
+            '\n'.join(q['sql'] for q in ctx.captured_queries)
+        )
+
+
+class PlanoConsultaTests(ChamadosTestMixin, TestCase):
+    """Garante que as consultas dos endpoints usam os índices planejados"""
+
+    TABELAS = (
+        Chamado._meta.db_table,
+        HistoricoChamado._meta.db_table,
+        AnexoChamado._meta.db_table,
+    )
+
+    def varreduras_completas(self, sql):
+        """Retorna as linhas do plano que indicam varredura sequencial"""
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                # Tabelas pequenas sempre favorecem seq scan; forçar o
+                # planejador a mostrar se existe um caminho por índice.
+                cursor.execute('SET LOCAL enable_seqscan = off')
+                cursor.execute(f'EXPLAIN {sql}')
+                linhas = [row[0] for row in cursor.fetchall()]
+                return [
+                    linha for linha in linhas
+                    if any(f'Seq Scan on {t}' in linha for t in self.TABELAS)
+                ]
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            linhas = [row[-1] for row in cursor.fetchall()]
+        return [
+            linha for linha in linhas
+            if any(
+                re.match(rf'SCAN {t}\b', linha) and 'USING' not in linha
+                for t in self.TABELAS
+            )
+        ]
+
+    def assertSemVarreduraCompleta(self, client, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+
+        for query in ctx.captured_queries:
+            sql = query['sql']
+            if not sql.startswith('SELECT'):
+                continue
+            if not any(t in sql for t in self.TABELAS):
+                continue
+            varreduras = self.varreduras_completas(sql)
+            self.assertEqual(
+                varreduras, [],
+                f'{url} executou varredura completa: {sql}'
+            )
+
+    def test_listagem(self):
+        client = self.cliente(self.tecnico)
+        base = reverse('chamados:chamado-list-create')
+        self.assertSemVarreduraCompleta(client, base)
+        self.assertSemVarreduraCompleta(client, f'{base}?status=aberto')
+        self.assertSemVarreduraCompleta(
+            client, f'{base}?tecnico_responsavel={self.tecnico.pk}')
+        self.assertSemVarreduraCompleta(
+            client, f'{base}?tecnico_ou_aberto={self.tecnico.pk}')
+
+        self.assertSemVarreduraCompleta(client, f'{base}?busca_geral=liga')
+        self.assertSemVarreduraCompleta(client, f'{base}?search=00001')
+
+        with mock.patch.object(KeysetPagination, 'page_size', 2):
+            proxima = client.get(f'{base}?paginacao=cursor').data['next']
+            self.assertSemVarreduraCompleta(client, proxima)
+
+    def test_meus_chamados(self):
+        client = self.cliente(self.usuario)
+        base = reverse('chamados:meus-chamados')
+        self.assertSemVarreduraCompleta(client, base)
+        self.assertSemVarreduraCompleta(client, f'{base}?status=aberto')
+
+    def test_chamados_tecnico(self):
+        client = self.cliente(self.tecnico)
+        base = reverse('chamados:chamados-tecnico')
+        self.assertSemVarreduraCompleta(client, base)
+        self.assertSemVarreduraCompleta(
+            client, f'{base}?status=em_atendimento')
+
+    def test_detalhe(self):
+        client = self.cliente(self.usuario)
+        self.assertSemVarreduraCompleta(
+            client, reverse('chamados:chamado-detail', args=[self.chamado.pk]))
+        self.assertSemVarreduraCompleta(
+            client, reverse('chamados:historico-chamado', args=[self.chamado.pk]))
+        self.assertSemVarreduraCompleta(
+            client, reverse('chamados:anexos-chamado', args=[self.chamado.pk]))
+
+    def test_estatisticas(self):
+        url = reverse('chamados:estatisticas')
+        self.assertSemVarreduraCompleta(self.cliente(self.usuario), url)
+        self.assertSemVarreduraCompleta(self.cliente(self.tecnico), url)
+
+
+@mock.patch.object(KeysetPagination, 'page_size', 2)
+class PaginacaoCursorTests(ChamadosTestMixin, TestCase):
+    """Paginação por cursor da listagem de chamados"""
+
+    url = reverse('chamados:chamado-list-create')
+
+    def percorrer(self, client, url):
+        ids = []
+        while url:
+            response = client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('count', response.data)
+            ids += [item['id'] for item in response.data['results']]
+            url = response.data['next']
+        return ids
+
+    def test_percorre_todas_as_paginas_na_ordem(self):
+        client = self.cliente(self.tecnico)
+        esperado = list(
+            Chamado.objects.order_by('-criado_em', '-id')
+            .values_list('id', flat=True)
+        )
+        ids = self.percorrer(client, f'{self.url}?paginacao=cursor')
+        self.assertEqual(ids, esperado)
+
+    def test_ordenacao_permitida(self):
+        client = self.cliente(self.tecnico)
+        esperado = list(
+            Chamado.objects.order_by('prioridade', 'id')
+            .values_list('id', flat=True)
+        )
+        ids = self.percorrer(
+            client, f'{self.url}?paginacao=cursor&ordering=prioridade')
+        self.assertEqual(ids, esperado)
+
+    def test_insercoes_nao_deslocam_paginas(self):
+        client = self.cliente(self.tecnico)
+        primeira = client.get(f'{self.url}?paginacao=cursor').data
+        Chamado.objects.create(
+            titulo='Novo', descricao='Novo', tipo_servico=self.tipo,
+            solicitante=self.usuario
+        )
+        ids = [item['id'] for item in primeira['results']]
+        ids += self.percorrer(client, primeira['next'])
+        self.assertEqual(len(ids), len(set(ids)))
+        self.assertEqual(len(ids), 5)
+
+    def test_pagina_anterior(self):
+        client = self.cliente(self.tecnico)
+        primeira = client.get(f'{self.url}?paginacao=cursor').data
+        self.assertIsNone(primeira['previous'])
+        segunda = client.get(primeira['next']).data
+        anterior = client.get(segunda['previous']).data
+        self.assertEqual(anterior['results'], primeira['results'])
+
+    def test_cursor_invalido(self):
+        client = self.cliente(self.tecnico)
+        response = client.get(f'{self.url}?cursor=invalido')
+        self.assertEqual(response.status_code, 404)
+
+
+class DetalheLimitadoTests(ChamadosTestMixin, TestCase):
+    """Histórico limitado no detalhe e sub-recursos paginados por cursor"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        HistoricoChamado.objects.bulk_create([
+            HistoricoChamado(
+                chamado=cls.chamado, tipo_acao='editado',
+                descricao=f'Edição {i}', usuario=cls.tecnico
+            )
+            for i in range(6)
+        ])
+
+    @override_settings(CHAMADOS_HISTORICO_DETALHE=3)
+    def test_detalhe_embute_apenas_o_mais_recente(self):
+        client = self.cliente(self.usuario)
+        url = reverse('chamados:chamado-detail', args=[self.chamado.pk])
+        with self.assertNumQueries(4):
+            response = client.get(url)
+
+        esperado = list(
+            self.chamado.historico.order_by('-criado_em', '-id')
+            .values_list('id', flat=True)[:3]
+        )
+        self.assertEqual(
+            [item['id'] for item in response.data['historico']], esperado)
+        self.assertTrue(response.data['historico_truncado'])
+
+        outro = Chamado.objects.exclude(pk=self.chamado.pk).first()
+        response = client.get(
+            reverse('chamados:chamado-detail', args=[outro.pk]))
+        self.assertEqual(len(response.data['historico']), 1)
+        self.assertFalse(response.data['historico_truncado'])
+
+    @mock.patch.object(KeysetPagination, 'page_size', 4)
+    def test_historico_paginado_por_cursor(self):
+        client = self.cliente(self.usuario)
+        url = reverse('chamados:historico-chamado', args=[self.chamado.pk])
+        ids = []
+        while url:
+            response = client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids.extend(item['id'] for item in response.data['results'])
+            url = response.data['next']
+
+        self.assertEqual(ids, list(
+            self.chamado.historico.order_by('-criado_em', '-id')
+            .values_list('id', flat=True)
+        ))
+
+    def test_anexos_e_chamado_inexistente(self):
+        client = self.cliente(self.usuario)
+        response = client.get(
+            reverse('chamados:anexos-chamado', args=[self.chamado.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'], [])
+
+        for rota in ('chamados:anexos-chamado', 'chamados:historico-chamado'):
+            response = client.get(reverse(rota, args=[0]))
+            self.assertEqual(response.status_code, 404)
+
+    def test_schema_openapi_dos_sub_recursos(self):
+        GENERATOR_STATS.reset()
+        with GENERATOR_STATS.silence():
+            schema = SchemaGenerator().get_schema(request=None, public=True)
+        avisos = [msg for msg in GENERATOR_STATS._warn_cache
+                  if 'chamado_id' in msg]
+        self.assertEqual(avisos, [])
+        for sub in ('historico', 'anexos'):
+            operacao = schema['paths'][f'/api/chamados/{{chamado_id}}/{sub}/']
+            parametro = operacao['get']['parameters'][0]
+            self.assertEqual(parametro['name'], 'chamado_id')
+            self.assertEqual(parametro['schema'], {'type': 'integer'})
+
+
+class CamposEsparsosTests(ChamadosTestMixin, TestCase):
+    """?fields= e ?expand= reduzem a resposta e as colunas lidas"""
+
+    def consultar(self, url, usuario=None):
+        client = self.cliente(usuario or self.tecnico)
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response, [q['sql'] for q in ctx.captured_queries]
+
+    def test_plano_padrao_da_listagem(self):
+        colunas, reversas = ChamadoListSerializer.plano()
+        self.assertEqual(set(colunas), set(ChamadoQuerySet.CAMPOS_LISTAGEM))
+        self.assertEqual(reversas, [])
+
+    def test_listagem_so_com_campos_pedidos(self):
+        base = reverse('chamados:chamado-list-create')
+        response, sqls = self.consultar(f'{base}?fields=id,numero,status')
+        self.assertEqual(
+            set(response.data['results'][0]), {'id', 'numero', 'status'})
+        selecao = sqls[-1]
+        self.assertNotIn('JOIN', selecao)
+        self.assertNotIn('"titulo"', selecao)
+
+    def test_relacao_como_id_ou_expandida(self):
+        base = reverse('chamados:chamado-list-create')
+        url = f'{base}?fields=id,tecnico_responsavel&status=em_atendimento'
+        response, sqls = self.consultar(url)
+        self.assertEqual(
+            response.data['results'][0]['tecnico_responsavel'],
+            self.tecnico.pk)
+        self.assertNotIn('JOIN', sqls[-1])
+
+        response, sqls = self.consultar(f'{url}&expand=tecnico_responsavel')
+        tecnico = response.data['results'][0]['tecnico_responsavel']
+        self.assertEqual(tecnico['nome_completo'], 'Carlos Silva')
+        self.assertIn('JOIN', sqls[-1])
+
+    def test_cursor_e_stream(self):
+        base = reverse('chamados:chamado-list-create')
+        client = self.cliente(self.tecnico)
+        with self.assertNumQueries(1):
+            response = client.get(f'{base}?paginacao=cursor&fields=id,numero')
+        self.assertEqual(set(response.data['results'][0]), {'id', 'numero'})
+
+        response = client.get(f'{base}?stream=true&fields=id')
+        dados = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(set(dados[0]), {'id'})
+
+    def test_detalhe_sem_relacoes_reversas(self):
+        url = reverse('chamados:chamado-detail', args=[self.chamado.pk])
+        response, sqls = self.consultar(f'{url}?fields=id,status,solicitante')
+        self.assertEqual(response.data, {
+            'id': self.chamado.pk, 'status': 'aberto',
+            'solicitante': self.usuario.pk,
+        })
+        # Validadores do GET condicional + o chamado
+        self.assertEqual(len(sqls), 2)
+
+        response, sqls = self.consultar(f'{url}?fields=id&expand=historico')
+        self.assertEqual(set(response.data), {'id', 'historico'})
+        self.assertEqual(len(response.data['historico']), 1)
+        self.assertEqual(len(sqls), 3)
+
+
+class ProjecaoListagemTests(ChamadosTestMixin, TestCase):
+    """A projeção sobre values() gera a mesma saída do ChamadoListSerializer"""
+
+    def test_saida_identica_ao_serializer(self):
+        Usuario.objects.filter(pk=self.tecnico.pk).update(
+            telefone=None, nome_completo='Carlos')
+        Chamado.objects.filter(pk=self.chamado.pk).update(prioridade='baixa')
+
+        queryset = Chamado.objects.para_listagem().order_by('id')
+        serializer = ChamadoListSerializer(queryset, many=True)
+        projecao = ChamadoListProjecao(
+            ChamadoListProjecao.projetar(queryset), many=True)
+
+        renderer = JSONRenderer()
+        self.assertEqual(
+            renderer.render(projecao.data), renderer.render(serializer.data))
+
+    def test_endpoint_usa_projecao(self):
+        client = self.cliente(self.tecnico)
+        response = client.get(reverse('chamados:chamado-list-create'))
+        esperado = ChamadoListSerializer(
+            Chamado.objects.para_listagem(), many=True).data
+        self.assertEqual(
+            json.loads(response.content)['results'],
+            json.loads(JSONRenderer().render(esperado))
+        )
+
+    def test_comando_de_medicao(self):
+        saida = io.StringIO()
+        call_command('medir_serializacao', '--repeticoes', '1', stdout=saida)
+        self.assertIn('ChamadoListProjecao', saida.getvalue())
+
+
+class JSONRapidoTests(ChamadosTestMixin, TestCase):
+    """Renderer e parser rápidos produzem o mesmo que os do DRF"""
+
+    def dados_variados(self):
+        return {
+            'data': timezone.now(),
+            'dia': timezone.now().date(),
+            'valor': Decimal('10.50'),
+            'rotulo': gettext_lazy('Aberto'),
+            'texto': 'linha\u2028separada – ç',
+            1: [None, True, 2.5],
+        }
+
+    def test_saida_identica_ao_jsonrenderer(self):
+        detalhe = ChamadoDetailSerializer(
+            Chamado.objects.para_detalhe().get(pk=self.chamado.pk)).data
+        lista = ChamadoListSerializer(
+            Chamado.objects.para_listagem(), many=True).data
+        for dados in (detalhe, lista, self.dados_variados()):
+            self.assertEqual(
+                JSONRapidoRenderer().render(dados), JSONRenderer().render(dados))
+
+    def test_sem_orjson_usa_json_padrao(self):
+        dados = self.dados_variados()
+        with mock.patch('chamados.renderers.orjson', None), \
+                mock.patch('chamados.parsers.orjson', None):
+            conteudo = JSONRapidoRenderer().render(dados)
+            lido = JSONRapidoParser().parse(io.BytesIO(conteudo))
+        self.assertEqual(conteudo, JSONRenderer().render(dados))
+        self.assertEqual(lido['valor'], 10.5)
+
+    def test_casos_fora_do_orjson(self):
+        renderer = JSONRapidoRenderer()
+        self.assertEqual(renderer.render({'n': 2 ** 70}), b'{"n":%d}' % 2 ** 70)
+        self.assertEqual(
+            renderer.render({'a': 1}, 'application/json; indent=2'),
+            JSONRenderer().render({'a': 1}, 'application/json; indent=2')
+        )
+
+    def test_parser(self):
+        parser = JSONRapidoParser()
+        self.assertEqual(
+            parser.parse(io.BytesIO('{"t": "ç"}'.encode())), {'t': 'ç'})
+        self.assertEqual(
+            parser.parse(io.BytesIO('{"t": "ç"}'.encode('latin-1')),
+                         parser_context={'encoding': 'latin-1'}),
+            {'t': 'ç'}
+        )
+        for invalido in (b'{"a": NaN}', b'{'):
+            with self.assertRaises(ParseError):
+                parser.parse(io.BytesIO(invalido))
+
+    def test_api_usa_renderer_e_parser(self):
+        client = self.cliente(self.tecnico)
+        response = client.patch(
+            reverse('chamados:chamado-detail', args=[self.chamado.pk]),
+            {'titulo': 'Título – novo'}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(response.accepted_renderer, JSONRapidoRenderer)
+        self.assertEqual(json.loads(response.content)['titulo'], 'Título – novo')
+
+    def test_comando_de_medicao(self):
+        saida = io.StringIO()
+        call_command('medir_json', '--repeticoes', '1', stdout=saida)
+        self.assertIn('ChamadoDetailSerializer', saida.getvalue())
+
+
+class ExportacaoTests(ChamadosTestMixin, TestCase):
+    """Exportação em stream pela API e pelo comando exportar_chamados"""
+
+    def exportar(self, usuario=None, **params):
+        client = self.cliente(usuario or self.tecnico)
+        return client.get(reverse('chamados:exportar-chamados'), params)
+
+    def test_csv_com_filtros(self):
+        response = self.exportar(prioridade='urgente')
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        linhas = list(csv.DictReader(
+            io.StringIO(b''.join(response.streaming_content).decode())))
+        esperados = Chamado.objects.filter(prioridade='urgente')
+        self.assertEqual(
+            sorted(int(linha['id']) for linha in linhas),
+            sorted(esperados.values_list('id', flat=True))
+        )
+        self.assertEqual(linhas[0]['solicitante'], self.usuario.nome_completo)
+
+    def test_ndjson_igual_ao_csv(self):
+        ndjson = b''.join(self.exportar(formato='ndjson').streaming_content)
+        csv_ = b''.join(self.exportar().streaming_content).decode()
+        objetos = [json.loads(linha) for linha in ndjson.splitlines()]
+        linhas = list(csv.DictReader(io.StringIO(csv_)))
+        self.assertEqual(len(objetos), Chamado.objects.count())
+        self.assertEqual(
+            [objeto['numero'] for objeto in objetos],
+            [linha['numero'] for linha in linhas]
+        )
+        self.assertEqual(objetos[0]['criado_em'], linhas[0]['criado_em'])
+
+    def test_transmite_em_lotes(self):
+        blocos = list(exportacao.gerar_csv(
+            Chamado.objects.order_by('id'), chunk_size=2))
+        # Cabeçalho e depois um bloco a cada duas linhas (5 chamados)
+        self.assertEqual(blocos[0].decode().strip(), ','.join(exportacao.CABECALHO))
+        self.assertEqual(len(blocos), 4)
+
+    def test_formato_invalido_e_permissao(self):
+        self.assertEqual(self.exportar(formato='xml').status_code, 400)
+        self.assertEqual(self.exportar(self.usuario).status_code, 403)
+
+    def test_comando(self):
+        saida = io.StringIO()
+        call_command('exportar_chamados', 'prioridade=urgente',
+                     '--formato', 'ndjson', stdout=saida)
+        objetos = [json.loads(linha) for linha in saida.getvalue().splitlines()]
+        self.assertEqual(
+            {objeto['id'] for objeto in objetos},
+            set(Chamado.objects.filter(prioridade='urgente')
+                .values_list('id', flat=True))
+        )
+
+        with self.assertRaises(CommandError):
+            call_command('exportar_chamados', 'inexistente=1')
+        with self.assertRaises(CommandError):
+            call_command('exportar_chamados', 'prioridade=nenhuma')
+
+
+class StreamAsgiTests(TransactionTestCase):
+    """Lista em stream e exportação enviadas aos poucos pelo servidor ASGI"""
+
+    def setUp(self):
+        tipo = TipoServico.objects.create(nome='Rede')
+        self.tecnico = Usuario.objects.create_user(
+            username='carlos', password='senha123',
+            nome_completo='Carlos Silva', tipo_usuario='tecnico'
+        )
+        self.token = str(AccessToken.for_user(self.tecnico))
+        for i in range(3):
+            Chamado.objects.create(
+                titulo=f'Chamado {i}', descricao='Sem rede',
+                tipo_servico=tipo, solicitante=self.tecnico)
+
+    async def requisitar(self, rota, query, progresso):
+        """Status e blocos do corpo, cada um com `progresso()` no envio"""
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+            'method': 'GET', 'scheme': 'http', 'root_path': '',
+            'path': reverse(rota), 'query_string': query.encode(),
+            'headers': [
+                (b'authorization', f'Bearer {self.token}'.encode())],
+        }
+        mensagens = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(mensagem):
+            if mensagem.get('body'):
+                mensagens.append((mensagem['body'], progresso()))
+            elif mensagem['type'] == 'http.response.start':
+                mensagens.append(mensagem['status'])
+
+        await ASGIHandler()(scope, receive, send)
+        return mensagens[0], mensagens[1:]
+
+    async def test_lista_em_stream(self):
+        serializados = []
+        original = ChamadoListProjecao.to_representation
+
+        def contar(serializer, linha):
+            serializados.append(linha['id'])
+            return original(serializer, linha)
+
+        with mock.patch.object(streaming, 'TAMANHO_BLOCO', 1), \
+                mock.patch.object(ChamadoListProjecao, 'to_representation', contar):
+            status, blocos = await self.requisitar(
+                'chamados:chamado-list-create', 'stream=true',
+                lambda: len(serializados))
+
+        self.assertEqual(status, 200)
+        # Cada bloco sai antes do chamado seguinte ser serializado
+        self.assertEqual(
+            [progresso for _, progresso in blocos], [0, 1, 2, 3, 3])
+        self.assertEqual(
+            len(json.loads(b''.join(bloco for bloco, _ in blocos))), 3)
+
+    async def test_exportacao(self):
+        lidos = []
+        original = exportacao._lotes
+
+        def lotes(*args):
+            for lote in original(*args):
+                lidos.append(len(lote))
+                yield lote
+
+        with mock.patch.object(streaming, 'TAMANHO_BLOCO', 1), \
+                mock.patch.object(exportacao, '_lotes', lotes):
+            status, blocos = await self.requisitar(
+                'chamados:exportar-chamados', 'formato=csv', lambda: sum(lidos))
+
+        self.assertEqual(status, 200)
+        # O cabeçalho sai antes da consulta
+        self.assertEqual(blocos[0], (
+            (','.join(exportacao.CABECALHO) + '\r\n').encode(), 0))
+        linhas = list(csv.DictReader(
+            io.StringIO(b''.join(bloco for bloco, _ in blocos).decode())))
+        self.assertEqual(len(linhas), 3)
+
+
+class GetCondicionalTests(ChamadosTestMixin, TestCase):
+    """ETag/Last-Modified no detalhe e nas listagens, com 304 sem serializar"""
+
+    def get(self, url, **headers):
+        return self.cliente(self.tecnico).get(url, **headers)
+
+    def test_detalhe_304(self):
+        url = reverse('chamados:chamado-detail', args=[self.chamado.pk])
+        response = self.get(url)
+        self.assertIn('no-cache', response['Cache-Control'])
+
+        with mock.patch.object(
+                ChamadoDetailSerializer, 'to_representation') as serializar:
+            with self.assertNumQueries(1):
+                nao_modificado = self.get(
+                    url, HTTP_IF_NONE_MATCH=response['ETag'])
+            por_data = self.get(
+                url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        serializar.assert_not_called()
+        self.assertEqual(nao_modificado.status_code, 304)
+        self.assertEqual(nao_modificado['ETag'], response['ETag'])
+        self.assertEqual(por_data.status_code, 304)
+
+        # Outra seleção de campos é outra representação
+        self.assertEqual(self.get(
+            f'{url}?fields=id', HTTP_IF_NONE_MATCH=response['ETag']
+        ).status_code, 200)
+
+    def test_detalhe_muda_com_historico_e_anexos(self):
+        url = reverse('chamados:chamado-detail', args=[self.chamado.pk])
+        etag = self.get(url)['ETag']
+
+        HistoricoChamado.objects.create(
+            chamado=self.chamado, tipo_acao='observacao_adicionada', descricao='Novo',
+            usuario=self.tecnico)
+        response = self.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        anexo = AnexoChamado(
+            chamado=self.chamado, nome_original='log.txt',
+            tamanho=4, tipo_arquivo='text/plain', enviado_por=self.usuario)
+        anexo.arquivo.name = 'anexos/log.txt'
+        AnexoChamado.objects.bulk_create([anexo])
+        response = self.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        AnexoChamado.objects.filter(chamado=self.chamado).delete()
+        self.assertEqual(
+            self.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_detalhe_inexistente(self):
+        url = reverse('chamados:chamado-detail', args=[0])
+        self.assertEqual(self.get(url).status_code, 404)
+
+    def test_listagem_304_e_invalidacao(self):
+        for params in ('', '?paginacao=cursor', '?fields=id,status'):
+            url = reverse('chamados:chamado-list-create') + params
+            with self.subTest(params=params):
+                etag = self.get(url)['ETag']
+                with mock.patch.object(
+                        ChamadoListProjecao, 'to_representation') as serializar:
+                    response = self.get(url, HTTP_IF_NONE_MATCH=etag)
+                serializar.assert_not_called()
+                self.assertEqual(response.status_code, 304)
+                self.assertFalse(response.has_header('Last-Modified'))
+
+                chamado = Chamado.objects.get(pk=self.chamado.pk)
+                chamado.titulo = f'Alterado {params}'
+                chamado.save()
+                self.assertEqual(
+                    self.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_listagem_muda_com_exclusao(self):
+        url = reverse('chamados:chamado-list-create')
+        etag = self.get(url)['ETag']
+        Chamado.objects.exclude(pk=self.chamado.pk).first().delete()
+        self.assertEqual(
+            self.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_etag_por_usuario(self):
+        url = reverse('chamados:chamado-list-create')
+        etag = self.get(url)['ETag']
+        response = self.cliente(self.admin).get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+
+class AlteracoesTests(ChamadosTestMixin, TestCase):
+    """Sincronização incremental por marca (chamados.alteracoes)"""
+
+    def setUp(self):
+        # Alterações antigas, fora da janela de segurança
+        self.agora = timezone.now()
+        for i, pk in enumerate(Chamado.objects.order_by('id').values_list('id', flat=True)):
+            Chamado.objects.filter(pk=pk).update(
+                atualizado_em=self.agora - timedelta(hours=1, minutes=-i))
+
+    def sincronizar(self, marca=None, **kwargs):
+        kwargs.setdefault('agora', self.agora)
+        return alteracoes.alteracoes_desde(marca, **kwargs)
+
+    def test_carga_inicial_e_alteracoes_seguintes(self):
+        inicial = self.sincronizar()
+        self.assertEqual(len(inicial['alteracoes']), Chamado.objects.count())
+        self.assertEqual(inicial['exclusoes'], [])
+        self.assertFalse(inicial['tem_mais'])
+        self.assertEqual(
+            inicial['alteracoes'][0],
+            ChamadoListProjecao(
+                ChamadoListProjecao.projetar(Chamado.objects.filter(pk=self.chamado.pk)),
+                many=True).data[0]
+        )
+
+        vazia = self.sincronizar(inicial['desde'])
+        self.assertEqual((vazia['alteracoes'], vazia['exclusoes']), ([], []))
+
+        self.chamado.titulo = 'Alterado'
+        self.chamado.save()
+        excluido = Chamado.objects.order_by('-id').first()
+        excluido_id = excluido.pk
+        excluido.delete()
+        seguinte = self.sincronizar(vazia['desde'])
+        self.assertEqual(
+            [(linha['id'], linha['titulo']) for linha in seguinte['alteracoes']],
+            [(self.chamado.pk, 'Alterado')]
+        )
+        self.assertEqual(
+            [(linha['id'], linha['numero']) for linha in seguinte['exclusoes']],
+            [(excluido_id, excluido.numero)]
+        )
+
+    def test_janela_reenvia_alteracoes_recentes(self):
+        marca = self.sincronizar()['desde']
+        self.chamado.titulo = 'Alterado'
+        self.chamado.save()
+        agora = timezone.now()
+        primeira = self.sincronizar(marca, agora=agora)
+        segunda = self.sincronizar(primeira['desde'], agora=agora)
+        self.assertEqual(len(primeira['alteracoes']), 1)
+        self.assertEqual(segunda['alteracoes'], primeira['alteracoes'])
+
+        # Passada a janela, a marca avança além da alteração
+        depois = self.sincronizar(
+            segunda['desde'], agora=agora + alteracoes.JANELA * 2)
+        self.assertEqual(self.sincronizar(
+            depois['desde'], agora=agora + alteracoes.JANELA * 2
+        )['alteracoes'], [])
+
+    def test_lotes_com_tem_mais(self):
+        marca, vistos, lotes = None, [], 0
+        while True:
+            resposta = self.sincronizar(marca, limite=2)
+            vistos += [linha['id'] for linha in resposta['alteracoes']]
+            marca = resposta['desde']
+            lotes += 1
+            if not resposta['tem_mais']:
+                break
+        self.assertEqual(lotes, 3)
+        self.assertEqual(
+            vistos, list(Chamado.objects.order_by('id').values_list('id', flat=True)))
+
+    def test_lote_cheio_alem_do_teto_nao_avanca_a_marca(self):
+        ids = list(Chamado.objects.order_by('id').values_list('id', flat=True))
+        for i, pk in enumerate(ids[1:], 1):
+            Chamado.objects.filter(pk=pk).update(
+                atualizado_em=self.agora - timedelta(seconds=1) + timedelta(milliseconds=i))
+        teto = (self.agora - alteracoes.JANELA, 0)
+
+        primeira = self.sincronizar(limite=2)
+        self.assertEqual(
+            [linha['id'] for linha in primeira['alteracoes']], ids[:2])
+        self.assertEqual(
+            alteracoes.decodificar_marca(primeira['desde'])[0], teto)
+        self.assertFalse(primeira['tem_mais'])
+
+        # Transação que carimbou antes da última linha lida e só agora fez commit
+        Chamado.objects.filter(pk=ids[0]).update(
+            atualizado_em=self.agora - timedelta(seconds=2))
+        segunda = self.sincronizar(primeira['desde'], limite=2)
+        self.assertEqual(segunda['alteracoes'][0]['id'], ids[0])
+
+    def test_exclusao_em_massa_registrada(self):
+        marca = self.sincronizar()['desde']
+        Chamado.objects.filter(prioridade='media').delete()
+        resposta = self.sincronizar(marca, agora=timezone.now())
+        self.assertEqual(len(resposta['exclusoes']), 4)
+        self.assertEqual(ChamadoExcluido.objects.count(), 4)
+
+    def test_api_marca_invalida_e_expirada(self):
+        client = self.cliente(self.usuario)
+        url = reverse('chamados:alteracoes-chamados')
+        response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['alteracoes']), 5)
+
+        for marca in ('x', 'e30=', response.data['desde'][:-4]):
+            with self.subTest(marca=marca):
+                self.assertEqual(
+                    client.get(url, {'desde': marca}).status_code, 400)
+
+        antiga = alteracoes.codificar_marca(
+            None, (self.agora - timedelta(days=91), 0))
+        response = client.get(url, {'desde': antiga})
+        self.assertEqual(response.status_code, 410)
+
+    def test_comando_limpar_exclusoes(self):
+        Chamado.objects.filter(prioridade='urgente').delete()
+        self.assertEqual(ChamadoExcluido.objects.count(), 1)
+        call_command('limpar_exclusoes', stdout=io.StringIO())
+        self.assertEqual(ChamadoExcluido.objects.count(), 1)
+        ChamadoExcluido.objects.update(excluido_em=self.agora - timedelta(days=91))
+        saida = io.StringIO()
+        call_command('limpar_exclusoes', stdout=saida)
+        self.assertEqual(ChamadoExcluido.objects.count(), 0)
+        self.assertIn('1 registros', saida.getvalue())
+
+
+class BrokerRegistro(eventos.BrokerMemoria):
+    """Broker local que guarda o que foi publicado"""
+
+    def __init__(self):
+        super().__init__()
+        self.publicadas = []
+
+    def ativo(self):
+        return True
+
+    def publicar(self, mensagem):
+        self.publicadas.append(mensagem)
+        super().publicar(mensagem)
+
+
+class EventosTests(ChamadosTestMixin, TestCase):
+    """Eventos em tempo real: publicação após o commit e transmissão SSE"""
+
+    def setUp(self):
+        self.broker = eventos.BrokerMemoria(tamanho_fila=3)
+        patcher = mock.patch.object(eventos, 'broker', self.broker)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.url = reverse('chamados:eventos-chamados')
+
+    def usar_broker(self, broker):
+        patcher = mock.patch.object(eventos, 'broker', broker)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return broker
+
+    def mensagem(self, pk, publico):
+        return {'tipo': 'chamado.salvo', 'dados': {'id': pk}, 'publico': publico}
+
+    def test_publica_depois_do_commit(self):
+        broker = self.usar_broker(BrokerRegistro())
+        with self.captureOnCommitCallbacks(execute=True):
+            with registro_historico(usuario=self.tecnico) as historico:
+                self.chamado.titulo = 'Alterado'
+                self.chamado.save()
+                historico.registrar(self.chamado, 'observacao_adicionada', 'Nota')
+            self.assertEqual(broker.publicadas, [])
+        self.assertEqual(
+            [mensagem['tipo'] for mensagem in broker.publicadas],
+            ['chamado.salvo', 'historico.criado']
+        )
+        salvo, historico = broker.publicadas
+        self.assertEqual(salvo['dados']['titulo'], 'Alterado')
+        self.assertEqual(historico['dados']['chamado'], self.chamado.pk)
+        self.assertEqual(historico['publico'], [self.usuario.pk, None])
+
+        broker.publicadas.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            transicionar_status(
+                self.chamado.pk, 'aberto', 'em_atendimento', self.tecnico)
+            Chamado.objects.filter(prioridade='media', status='aberto').delete()
+        self.assertEqual(
+            sorted(mensagem['tipo'] for mensagem in broker.publicadas),
+            ['chamado.excluido', 'chamado.excluido', 'chamado.salvo',
+             'historico.criado']
+        )
+        salvo = next(mensagem for mensagem in broker.publicadas
+                     if mensagem['tipo'] == 'chamado.salvo')
+        self.assertEqual(salvo['dados']['id'], self.chamado.pk)
+        self.assertEqual(salvo['dados']['status'], 'em_atendimento')
+        self.assertEqual(salvo['dados']['numero'], self.chamado.numero)
+        self.assertEqual(
+            salvo['dados']['atualizado_em'],
+            eventos._data_hora(Chamado.objects.get(pk=self.chamado.pk).atualizado_em))
+        self.assertEqual(salvo['publico'], [self.usuario.pk, None])
+
+    def test_sem_conexoes_nao_publica(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            with registro_historico(usuario=self.tecnico) as historico:
+                self.chamado.titulo = 'Alterado'
+                self.chamado.save()
+                historico.registrar(self.chamado, 'observacao_adicionada', 'Nota')
+        self.assertEqual(callbacks, [])
+
+    def test_visibilidade(self):
+        outro = Usuario.objects.create_user(
+            username='joao', password='senha123', tipo_usuario='usuario')
+        mensagem = eventos.mensagem_chamado(self.chamado)
+        self.assertTrue(eventos.visivel(self.usuario, mensagem))
+        self.assertTrue(eventos.visivel(self.tecnico, mensagem))
+        self.assertTrue(eventos.visivel(self.admin, mensagem))
+        self.assertFalse(eventos.visivel(outro, mensagem))
+
+    async def conectar(self, usuario):
+        token = AccessToken.for_user(usuario)
+        response = await AsyncClient().get(
+            self.url, headers={
+                'Authorization': f'Bearer {token}',
+                'Accept': 'text/event-stream',
+            })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        conteudo = response.streaming_content
+        self.assertEqual(await anext(conteudo), b'retry: 5000\n\n')
+        return conteudo
+
+    @override_settings(CHAMADOS_EVENTOS_DURACAO=0.5)
+    async def test_transmissao_filtrada_por_usuario(self):
+        conteudo = await self.conectar(self.usuario)
+        self.broker.publicar(self.mensagem(0, [0, None]))
+        self.broker.publicar(self.mensagem(1, [self.usuario.pk, None]))
+        self.assertEqual(
+            await asyncio.wait_for(anext(conteudo), 1),
+            eventos.formatar('chamado.salvo', {'id': 1})
+        )
+        # Encerra sozinha depois da duração e libera a assinatura
+        resto = await asyncio.wait_for(self.consumir(conteudo), 2)
+        self.assertEqual(resto, [b': ping\n\n'])
+        self.assertFalse(self.broker.ativo())
+
+    async def test_fila_cheia_pede_ressincronizacao(self):
+        conteudo = await self.conectar(self.tecnico)
+        for pk in range(4):
+            self.broker.publicar(self.mensagem(pk, [self.usuario.pk, None]))
+        resto = await asyncio.wait_for(self.consumir(conteudo), 1)
+        self.assertEqual(resto, [eventos.formatar('ressincronizar', {})])
+        self.assertFalse(self.broker.ativo())
+
+    async def consumir(self, conteudo):
+        return [parte async for parte in conteudo]
+
+    def test_wsgi_indica_sincronizacao_incremental(self):
+        response = self.cliente(self.usuario).get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            b''.join(response.streaming_content),
+            eventos.formatar('indisponivel', {
+                'alteracoes': reverse('chamados:alteracoes-chamados')})
+        )
+
+    def test_sem_autenticacao(self):
+        response = APIClient().get(self.url, HTTP_ACCEPT='text/event-stream')
+        self.assertEqual(response.status_code, 401)
+        self.assertTrue(response.content.startswith(b'event: erro\n'))
+
+    def test_broker_postgres(self):
+        broker = eventos.BrokerPostgres()
+        mensagem = self.mensagem(1, [self.usuario.pk, None])
+        with mock.patch.object(eventos, 'connections') as conexoes:
+            broker.publicar(mensagem)
+        cursor = conexoes.__getitem__.return_value.cursor.return_value
+        sql, parametros = cursor.__enter__.return_value.execute.call_args[0]
+        self.assertIn('pg_notify', sql)
+        self.assertEqual(parametros[0], broker.canal)
+
+        # Conexão de escuta substituída por uma com notificações pendentes
+        conexao = SimpleNamespace(
+            poll=lambda: None,
+            notifies=[SimpleNamespace(payload=parametros[1])])
+        recebidas = []
+        with mock.patch.object(broker, 'distribuir', recebidas.append):
+            broker.processar(conexao)
+        self.assertEqual(recebidas, [mensagem])
+        self.assertEqual(conexao.notifies, [])
+
+
+class ListagensDoUsuarioTests(ChamadosTestMixin, TestCase):
+    """meus-chamados e chamados-tecnico com paginação, filtros e stream"""
+
+    def test_meus_chamados_paginado_e_filtrado(self):
+        client = self.cliente(self.usuario)
+        response = client.get(
+            reverse('chamados:meus-chamados'), {'prioridade': 'urgente'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(len(response.data['results']), 1)
+
+    def test_chamados_tecnico_ordenado(self):
+        client = self.cliente(self.tecnico)
+        response = client.get(
+            reverse('chamados:chamados-tecnico'), {'ordering': 'criado_em'})
+        ids = [item['id'] for item in response.data['results']]
+        esperado = list(
+            Chamado.objects.filter(tecnico_responsavel=self.tecnico)
+            .order_by('criado_em').values_list('id', flat=True)
+        )
+        self.assertEqual(ids, esperado)
+
+    def test_chamados_tecnico_apenas_para_tecnicos(self):
+        client = self.cliente(self.usuario)
+        response = client.get(reverse('chamados:chamados-tecnico'))
+        self.assertEqual(response.status_code, 403)
+
+    def test_stream_igual_a_listagem(self):
+        client = self.cliente(self.usuario)
+        url = reverse('chamados:meus-chamados')
+        paginado = client.get(url, {'status': 'aberto'})
+        stream = client.get(url, {'status': 'aberto', 'stream': 'true'})
+        self.assertTrue(stream.streaming)
+        conteudo = b''.join(stream.streaming_content)
+        self.assertEqual(
+            json.loads(conteudo),
+            json.loads(json.dumps(paginado.data['results'], cls=JSONEncoder))
+        )
+
+
+class BuscaTextualTests(ChamadosTestMixin, TestCase):
+    """Busca textual usada por busca_geral e ?search="""
+
+    url = reverse('chamados:chamado-list-create')
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.impressora = Chamado.objects.create(
+            titulo='Impressão falhando', descricao='Papel atolado',
+            equipamento='HP LaserJet', tipo_servico=cls.tipo,
+            solicitante=cls.usuario
+        )
+        cls.rede = Chamado.objects.create(
+            titulo='Sem rede', descricao='Falha na impressão de relatórios',
+            tipo_servico=cls.tipo, solicitante=cls.usuario
+        )
+
+    def ids(self, **params):
+        response = self.cliente(self.tecnico).get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return [item['id'] for item in response.data['results']]
+
+    def test_ignora_acentos(self):
+        self.assertEqual(
+            set(self.ids(busca_geral='impressao')),
+            {self.impressora.pk, self.rede.pk}
+        )
+
+    def test_ordena_por_relevancia(self):
+        # Título pesa mais que descrição
+        self.assertEqual(
+            self.ids(search='impressão'), [self.impressora.pk, self.rede.pk])
+
+    def test_ordenacao_explicita_prevalece(self):
+        self.assertEqual(
+            self.ids(search='impressão', ordering='criado_em'),
+            [self.impressora.pk, self.rede.pk]
+        )
+        self.assertEqual(
+            self.ids(search='impressão', ordering='-criado_em'),
+            [self.rede.pk, self.impressora.pk]
+        )
+
+    def test_campos_secundarios(self):
+        self.assertEqual(self.ids(busca_geral='laserjet'), [self.impressora.pk])
+
+    def test_numero_busca_exata(self):
+        numero = self.impressora.numero
+        self.assertEqual(self.ids(search=f'#{int(numero)}'), [self.impressora.pk])
+        self.assertEqual(self.ids(busca_geral=numero), [self.impressora.pk])
+
+    def test_atualizacao_reindexa(self):
+        Chamado.objects.filter(pk=self.rede.pk).update(titulo='Teclado quebrado')
+        self.assertEqual(self.ids(busca_geral='teclado'), [self.rede.pk])
+
+    def test_caracteres_especiais(self):
+        self.assertEqual(self.ids(search='"*(:'), [])
+
+
+class EstatisticasDashboardTests(ChamadosTestMixin, TestCase):
+    """Estatísticas do dashboard calculadas numa única consulta"""
+
+    url = reverse('chamados:estatisticas')
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        Chamado.objects.create(
+            titulo='Encerrado', descricao='Resolvido', tipo_servico=cls.tipo,
+            solicitante=cls.admin, tecnico_responsavel=cls.tecnico,
+            status='encerrado'
+        )
+
+    def estatisticas(self, usuario):
+        client = self.cliente(usuario)
+        with self.assertNumQueries(1):
+            response = client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def assertGerais(self, dados):
+        self.assertEqual(dados['total_chamados'], 6)
+        self.assertEqual(dados['chamados_abertos'], 3)
+        self.assertEqual(dados['chamados_em_atendimento'], 2)
+        self.assertEqual(dados['chamados_encerrados'], 1)
+        self.assertEqual(dados['chamados_urgentes'], 1)
+
+    def test_usuario(self):
+        dados = self.estatisticas(self.usuario)
+        self.assertGerais(dados)
+        self.assertEqual(dados['meus_chamados'], 5)
+        self.assertEqual(dados['meus_chamados_pendentes'], 5)
+
+    def test_tecnico(self):
+        dados = self.estatisticas(self.tecnico)
+        self.assertGerais(dados)
+        self.assertEqual(dados['meus_chamados'], 6)
+        self.assertEqual(dados['meus_chamados_pendentes'], 5)
+
+    def test_admin(self):
+        dados = self.estatisticas(self.admin)
+        self.assertGerais(dados)
+        self.assertEqual(dados['meus_chamados'], 1)
+        self.assertEqual(dados['meus_chamados_pendentes'], 0)
+
+
+class ContadoresTests(ChamadosTestMixin, TestCase):
+    """Contadores do dashboard mantidos a cada escrita de Chamado"""
+
+    def assertContadoresCorretos(self):
+        self.assertEqual(contadores.divergencias(), [])
+
+    def test_criacao(self):
+        self.assertContadoresCorretos()
+        self.assertEqual(
+            ContadorChamados.objects.get(
+                dimensao='geral', status='aberto').total, 3)
+
+    def test_alteracao_de_status_tecnico_e_prioridade(self):
+        chamado = Chamado.objects.get(pk=self.chamado.pk)
+        chamado.status = 'em_atendimento'
+        chamado.tecnico_responsavel = self.tecnico
+        chamado.prioridade = 'baixa'
+        chamado.save()
+        self.assertContadoresCorretos()
+
+    def test_endpoints_de_escrita(self):
+        client = self.cliente(self.tecnico)
+        client.patch(
+            reverse('chamados:atualizar-status', args=[self.chamado.pk]),
+            {'status': 'encerrado'}, format='json')
+        self.assertContadoresCorretos()
+        client.patch(
+            reverse('chamados:chamado-detail', args=[self.chamado.pk]),
+            {'tecnico_responsavel': None, 'prioridade': 'alta'},
+            format='json')
+        self.assertContadoresCorretos()
+        client.delete(
+            reverse('chamados:chamado-detail', args=[self.chamado.pk]))
+        self.assertContadoresCorretos()
+
+    def test_comando_verifica_e_reconstroi(self):
+        ContadorChamados.objects.filter(dimensao='geral').update(total=0)
+        with self.assertRaises(CommandError):
+            call_command('recalcular_contadores', '--verificar', stdout=io.StringIO())
+        call_command('recalcular_contadores', stdout=io.StringIO())
+        call_command('recalcular_contadores', '--verificar', stdout=io.StringIO())
+        self.assertContadoresCorretos()
+
+    def test_migracao_conta_como_o_modulo(self):
+        migracao = import_module('chamados.migrations.0007_contadores_chamados')
+        ContadorChamados.objects.all().delete()
+        migracao.popular_contadores(
+            global_apps, SimpleNamespace(connection=connection))
+        self.assertContadoresCorretos()
+
+    def test_contadores_usam_o_banco_do_chamado(self):
+        # O roteador manda as escritas para um banco que não existe: só o
+        # `using` do save()/delete() leva os contadores ao banco certo
+        with override_settings(DATABASE_ROUTERS=[RoteadorInexistente()]):
+            chamado = Chamado(
+                titulo='Em outro banco', descricao='x', prioridade='alta',
+                tipo_servico=self.tipo, solicitante=self.usuario,
+                numero='90001')
+            chamado.save(using='default')
+            chamado.status = 'encerrado'
+            chamado.save(using='default')
+            chamado.delete(using='default')
+        self.assertContadoresCorretos()
+
+
+class RoteadorInexistente:
+    def db_for_write(self, model, **hints):
+        return 'inexistente'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+
+class RastreamentoAlteracoesTests(ChamadosTestMixin, TestCase):
+    """Estado capturado na leitura do chamado e save só das colunas alteradas"""
+
+    def test_campos_alterados(self):
+        chamado = Chamado.objects.get(pk=self.chamado.pk)
+        self.assertEqual(chamado.campos_alterados, set())
+        chamado.status = 'em_atendimento'
+        chamado.tecnico_responsavel = self.tecnico
+        self.assertEqual(
+            chamado.campos_alterados, {'status', 'tecnico_responsavel_id'})
+        self.assertEqual(chamado.valor_anterior('status'), 'aberto')
+
+    def test_save_grava_apenas_colunas_alteradas_sem_reler(self):
+        chamado = Chamado.objects.get(pk=self.chamado.pk)
+        chamado.status = 'encerrado'
+        with CaptureQueriesContext(connection) as ctx:
+            chamado.save()
+
+        sqls = [q['sql'] for q in ctx.captured_queries]
+        self.assertFalse(
+            [sql for sql in sqls if sql.startswith('SELECT')], sqls)
+        update = next(sql for sql in sqls if sql.startswith('UPDATE "chamados"'))
+        colunas = set(re.findall(r'"(\w+)" = ', update.split(' WHERE ')[0]))
+        self.assertEqual(colunas, {'status', 'encerrado_em', 'atualizado_em'})
+        self.assertIsNotNone(chamado.encerrado_em)
+        self.assertEqual(chamado.campos_alterados, set())
+
+    def test_save_sem_alteracoes_nao_executa_update(self):
+        chamado = Chamado.objects.get(pk=self.chamado.pk)
+        with self.assertNumQueries(0):
+            chamado.save()
+
+    def test_campo_adiado(self):
+        chamado = Chamado.objects.only('id', 'status').get(pk=self.chamado.pk)
+        chamado.status = 'em_atendimento'
+        chamado.titulo  # carrega a coluna adiada
+        self.assertEqual(chamado.campos_alterados, {'status'})
+        chamado.save()
+        chamado.refresh_from_db()
+        self.assertEqual(chamado.status, 'em_atendimento')
+        self.assertIsNotNone(chamado.atendido_em)
+        self.assertEqual(contadores.divergencias(), [])
+
+    def test_instancia_sem_estado_capturado(self):
+        chamado = Chamado.objects.get(pk=self.chamado.pk)
+        chamado._estado_original = None
+        chamado.status = 'em_atendimento'
+        chamado.save()
+        self.assertIsNotNone(chamado.atendido_em)
+        self.assertEqual(contadores.divergencias(), [])
+
+
+class TransicaoStatusTests(ChamadosTestMixin, TestCase):
+    """Troca de status com UPDATE condicional e conflito 409"""
+
+    def url(self, chamado=None):
+        chamado = chamado or self.chamado
+        return reverse('chamados:atualizar-status', args=[chamado.pk])
+
+    def test_transicao_carimba_e_registra_historico(self):
+        response = self.cliente(self.tecnico).patch(
+            self.url(), {'status': 'em_atendimento',
+                         'status_esperado': 'aberto'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['status'], 'em_atendimento')
+
+        chamado = Chamado.objects.get(pk=self.chamado.pk)
+        self.assertIsNotNone(chamado.atendido_em)
+        self.assertTrue(chamado.historico.filter(
+            tipo_acao='status_alterado', usuario=self.tecnico).exists())
+        self.assertEqual(contadores.divergencias(), [])
+
+    def test_status_esperado_diferente_retorna_409(self):
+        Chamado.objects.filter(pk=self.chamado.pk).update(status='encerrado')
+        historicos = self.chamado.historico.count()
+
+        response = self.cliente(self.tecnico).patch(
+            self.url(), {'status': 'em_atendimento',
+                         'status_esperado': 'aberto'}, format='json')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['status_atual'], 'encerrado')
+        chamado = Chamado.objects.get(pk=self.chamado.pk)
+        self.assertEqual(chamado.status, 'encerrado')
+        self.assertIsNone(chamado.atendido_em)
+        self.assertEqual(chamado.historico.count(), historicos)
+
+    def test_status_esperado_invalido_retorna_400(self):
+        historicos = self.chamado.historico.count()
+
+        response = self.cliente(self.tecnico).patch(
+            self.url(), {'status': 'em_atendimento',
+                         'status_esperado': 'abreto'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('status_esperado', response.data)
+        chamado = Chamado.objects.get(pk=self.chamado.pk)
+        self.assertEqual(chamado.status, 'aberto')
+        self.assertEqual(chamado.historico.count(), historicos)
+
+    def test_solicitante_encerra(self):
+        response = self.cliente(self.usuario).patch(
+            self.url(), {'status': 'encerrado'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        historico = self.chamado.historico.latest('criado_em')
+        self.assertIn('encerrado pelo solicitante', historico.descricao)
+
+    def test_update_returning_no_sqlite(self):
+        with CaptureQueriesContext(connection) as ctx:
+            transicionar_status(
+                self.chamado.pk, 'aberto', 'encerrado', self.tecnico)
+        updates = [q['sql'] for q in ctx.captured_queries
+                   if q['sql'].startswith('UPDATE "chamados"')]
+        self.assertEqual(len(updates), 1)
+        self.assertIn('RETURNING', updates[0])
+
+    def test_servico_sem_returning(self):
+        # MariaDB: INSERT RETURNING sim, UPDATE RETURNING não
+        with mock.patch.object(connection, 'vendor', 'mysql'):
+            depois = transicionar_status(
+                self.chamado.pk, 'aberto', 'encerrado', self.tecnico)
+            with self.assertRaises(TransicaoConflitante):
+                transicionar_status(
+                    self.chamado.pk, 'aberto', 'cancelado', self.tecnico)
+        self.assertEqual(depois['status'], 'encerrado')
+        self.assertIsNotNone(
+            Chamado.objects.get(pk=self.chamado.pk).encerrado_em)
+        self.assertEqual(contadores.divergencias(), [])
+
+    def test_chamado_inexistente(self):
+        with self.assertRaises(Chamado.DoesNotExist):
+            transicionar_status(0, 'aberto', 'encerrado', self.tecnico)
+
+
+class RegistroHistoricoTests(ChamadosTestMixin, TestCase):
+    """Histórico gravado em lote na transação da alteração"""
+
+    def test_entradas_gravadas_com_um_insert(self):
+        chamados = list(Chamado.objects.order_by('id'))
+        with CaptureQueriesContext(connection) as ctx:
+            with registro_historico(usuario=self.tecnico) as historico:
+                historico.registrar_em_lote(
+                    chamados, 'status_alterado',
+                    lambda chamado: f'Revisão do #{chamado.numero}'
+                )
+                self.assertEqual(
+                    HistoricoChamado.objects.filter(
+                        tipo_acao='status_alterado').count(), 0)
+
+        inserts = [
+            q for q in ctx.captured_queries
+            if q['sql'].startswith('INSERT INTO "historico_chamados"')
+        ]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(
+            HistoricoChamado.objects.filter(
+                tipo_acao='status_alterado', usuario=self.tecnico).count(),
+            len(chamados)
+        )
+
+    def test_falha_descarta_alteracao_e_historico(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                with registro_historico(usuario=self.tecnico) as historico:
+                    Chamado.objects.filter(pk=self.chamado.pk).update(
+                        titulo='Alterado')
+                    historico.registrar(self.chamado, 'editado', 'Editado')
+                    raise RuntimeError
+
+        self.assertFalse(
+            HistoricoChamado.objects.filter(tipo_acao='editado').exists())
+        self.assertEqual(
+            Chamado.objects.get(pk=self.chamado.pk).titulo, 'Chamado 0')
+
+    def test_edicao_grava_entradas_juntas(self):
+        client = self.cliente(self.tecnico)
+        with CaptureQueriesContext(connection) as ctx:
+            client.patch(
+                reverse('chamados:chamado-detail', args=[self.chamado.pk]),
+                {'status': 'em_atendimento',
+                 'tecnico_responsavel': self.tecnico.pk},
+                format='json'
+            )
+        inserts = [
+            q for q in ctx.captured_queries
+            if q['sql'].startswith('INSERT INTO "historico_chamados"')
+        ]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(
+            set(self.chamado.historico.values_list('tipo_acao', flat=True)),
+            {'criado', 'status_alterado', 'tecnico_atribuido'}
+        )
+
+
+class NumeracaoTests(ChamadosTestMixin, TestCase):
+    """Alocação do número dos chamados"""
+
+    def test_numeros_sequenciais(self):
+        numeros = list(
+            Chamado.objects.order_by('id').values_list('numero', flat=True))
+        self.assertEqual(numeros, ['00001', '00002', '00003', '00004', '00005'])
+
+    def test_passa_de_cinco_digitos(self):
+        Chamado.objects.filter(pk=self.chamado.pk).update(numero='99999')
+        call_command('sincronizar_numeracao', stdout=io.StringIO())
+        novo = Chamado.objects.create(
+            titulo='Novo', descricao='Novo', tipo_servico=self.tipo,
+            solicitante=self.usuario
+        )
+        self.assertEqual(novo.numero, '100000')
+
+    def test_migracao_sincroniza_como_o_modulo(self):
+        migracao = import_module('chamados.migrations.0008_numeracao_chamados')
+        Chamado.objects.filter(pk=self.chamado.pk).update(numero='00042')
+        migracao.sincronizar_numeracao(
+            global_apps, SimpleNamespace(connection=connection))
+        self.assertEqual(numeracao.reservar(1), [43])
+
+    @override_settings(CHAMADOS_NUMERO_BLOCO=10)
+    def test_reserva_em_bloco(self):
+        numeracao.descartar_reservados()
+        self.addCleanup(numeracao.descartar_reservados)
+        with self.assertNumQueries(1):
+            primeiro = numeracao.proximo_numero()
+        with self.assertNumQueries(0):
+            segundo = numeracao.proximo_numero()
+        self.assertEqual(int(segundo), int(primeiro) + 1)
+
+    def test_contador_sem_update_returning(self):
+        with CaptureQueriesContext(connection) as ctx:
+            primeiro = numeracao.reservar(2)
+        self.assertIn('RETURNING', ctx.captured_queries[-1]['sql'])
+
+        # MariaDB: INSERT RETURNING sim, UPDATE RETURNING não
+        with mock.patch.object(connection, 'vendor', 'mysql'), \
+                CaptureQueriesContext(connection) as ctx:
+            segundo = numeracao.reservar(2)
+        self.assertFalse(
+            [q['sql'] for q in ctx.captured_queries if 'RETURNING' in q['sql']])
+        self.assertEqual(segundo, [primeiro[-1] + 1, primeiro[-1] + 2])
+
+
+class CacheReferenciaTests(TransactionTestCase):
+    """Tipos de serviço e técnicos servidos da memória fora de transações"""
+
+    def setUp(self):
+        cache.delete(referencia.CHAVE_GERACAO)
+        referencia.TIPOS_SERVICO.limpar()
+        referencia.TECNICOS.limpar()
+        self.tipo = TipoServico.objects.create(nome='Rede')
+        self.usuario = Usuario.objects.create_user(
+            username='maria', password='senha123',
+            nome_completo='Maria Costa', tipo_usuario='usuario'
+        )
+        self.tecnico = Usuario.objects.create_user(
+            username='carlos', password='senha123',
+            nome_completo='Carlos Silva', tipo_usuario='tecnico'
+        )
+
+    def cliente(self, usuario):
+        client = APIClient()
+        client.force_authenticate(usuario)
+        return client
+
+    def test_listas_servidas_da_memoria(self):
+        client = self.cliente(self.usuario)
+        for url, nome in (
+            (reverse('chamados:tipo-servico-list'), 'Rede'),
+            (reverse('usuarios:tecnico-list'), 'Carlos Silva'),
+        ):
+            with self.subTest(url=url):
+                with self.assertNumQueries(1):
+                    client.get(url)
+                with self.assertNumQueries(0):
+                    response = client.get(url)
+                self.assertIn(nome, response.content.decode())
+
+    def test_invalidacao_ao_salvar_e_excluir(self):
+        client = self.cliente(self.usuario)
+        url = reverse('chamados:tipo-servico-list')
+        client.get(url)
+
+        self.tipo.nome = 'Redes'
+        self.tipo.save()
+        self.assertEqual(client.get(url).data[0]['nome'], 'Redes')
+
+        TipoServico.objects.create(nome='Impressoras')
+        self.assertEqual(len(client.get(url).data), 2)
+
+        self.tecnico.tipo_usuario = 'usuario'
+        self.tecnico.save()
+        response = client.get(reverse('usuarios:tecnico-list'))
+        self.assertEqual(response.data['count'], 0)
+
+    def test_login_nao_invalida(self):
+        geracao = referencia.geracao_atual()
+        self.tecnico.last_login = timezone.now()
+        self.tecnico.save(update_fields=['last_login'])
+        self.assertEqual(referencia.geracao_atual(), geracao)
+
+    def test_validacao_de_fk_pela_memoria(self):
+        from rest_framework.relations import PrimaryKeyRelatedField
+        original = PrimaryKeyRelatedField.to_internal_value
+        client = self.cliente(self.tecnico)
+        with mock.patch.object(
+                PrimaryKeyRelatedField, 'to_internal_value',
+                autospec=True, side_effect=original) as banco:
+            response = client.post(reverse('chamados:chamado-list-create'), {
+                'titulo': 'Sem rede', 'descricao': 'Cabo',
+                'tipo_servico': self.tipo.pk,
+            }, format='json')
+            self.assertEqual(response.status_code, 201)
+            url = reverse('chamados:chamado-detail', args=[response.data['id']])
+            response = client.patch(
+                url, {'tecnico_responsavel': self.tecnico.pk}, format='json')
+            self.assertEqual(response.status_code, 200)
+            banco.assert_not_called()
+
+            # Fora do cache (não é técnico): validação normal pelo banco
+            response = client.patch(
+                url, {'tecnico_responsavel': self.usuario.pk}, format='json')
+            self.assertEqual(response.status_code, 400)
+            banco.assert_called_once()
+
+        self.assertEqual(
+            Chamado.objects.get().tecnico_responsavel_id, self.tecnico.pk)
+
+
+class NumeracaoConcorrenteTests(TransactionTestCase):
+    """Alocações e criações simultâneas nunca recebem o mesmo número"""
+
+    THREADS = 8
+    POR_THREAD = 10
+
+    def em_paralelo(self, funcao):
+        erros = []
+        barreira = threading.Barrier(self.THREADS)
+
+        def executar():
+            try:
+                barreira.wait()
+                for _ in range(self.POR_THREAD):
+                    funcao()
+            except Exception as exc:
+                erros.append(exc)
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=executar) for _ in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(erros, [])
+
+    def test_alocacoes_paralelas(self):
+        numeros = []
+        self.em_paralelo(lambda: numeros.append(numeracao.proximo_numero()))
+
+        total = self.THREADS * self.POR_THREAD
+        self.assertEqual(
+            sorted(numeros),
+            [numeracao.formatar(n) for n in range(1, total + 1)]
+        )
+
+    def test_criacoes_paralelas(self):
+        tipo = TipoServico.objects.create(nome='Suporte')
+        usuario = Usuario.objects.create_user(
+            username='maria', password='senha123', nome_completo='Maria')
+
+        def criar():
+            for _ in range(50):
+                try:
+                    return Chamado.objects.create(
+                        titulo='Chamado', descricao='Teste',
+                        tipo_servico=tipo, solicitante=usuario
+                    )
+                except OperationalError as exc:
+                    # Limite de escritores concorrentes do SQLite, não uma
+                    # colisão de número: tentar de novo
+                    if connection.vendor != 'sqlite':
+                        raise
+                    if 'locked' not in str(exc):
+                        raise
+                    time.sleep(0.01)
+            self.fail('SQLite permaneceu bloqueado')
+
+        self.em_paralelo(criar)
+
+        numeros = list(Chamado.objects.values_list('numero', flat=True))
+        self.assertEqual(len(numeros), self.THREADS * self.POR_THREAD)
+        self.assertEqual(len(set(numeros)), len(numeros))
+
+
+class MetricasTests(ChamadosTestMixin, TestCase):
+    """Server-Timing e histogramas por rota em /api/metrics/"""
+
+    def setUp(self):
+        metricas.REGISTRO.limpar()
+        self.addCleanup(metricas.REGISTRO.limpar)
+
+    def server_timing(self, response):
+        return {
+            parte.split(';')[0].strip(): parte
+            for parte in response['Server-Timing'].split(',')
+        }
+
+    def test_server_timing_conta_consultas(self):
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.cliente(self.tecnico).get(
+                reverse('chamados:chamado-list-create'))
+        self.assertEqual(response.status_code, 200)
+        partes = self.server_timing(response)
+        self.assertEqual(set(partes), {'sql', 'serializacao', 'total', 'resposta'})
+        self.assertIn(f'desc="{len(consultas)} consultas"', partes['sql'])
+        self.assertIn(f'desc="{len(response.content)} bytes"', partes['resposta'])
+
+    def test_histogramas_por_rota(self):
+        cliente = self.cliente(self.tecnico)
+        for _ in range(3):
+            cliente.get(reverse('chamados:chamado-list-create'))
+        cliente.get(reverse('chamados:chamado-detail', kwargs={'pk': self.chamado.pk}))
+
+        series = metricas.REGISTRO.series()
+        contagens, soma, quantis = series[
+            'chamados:chamado-list-create', 'GET']['duracao_segundos']
+        self.assertEqual(sum(contagens), 3)
+        self.assertGreater(soma, 0)
+        self.assertEqual(set(quantis), set(metricas.QUANTIS))
+        self.assertIn(('chamados:chamado-detail', 'GET'), series)
+
+        contagens, soma, _ = series[
+            'chamados:chamado-list-create', 'GET']['serializacao_segundos']
+        self.assertGreater(soma, 0)
+
+    def test_serializacao_medida_nas_views(self):
+        # O to_representation roda no .data da view, antes da renderização
+        def lento(original):
+            def to_representation(serializer, instancia):
+                time.sleep(0.01)
+                return original(serializer, instancia)
+            return to_representation
+
+        cliente = self.cliente(self.tecnico)
+        with mock.patch.object(
+                ChamadoDetailSerializer, 'to_representation',
+                lento(ChamadoDetailSerializer.to_representation)), \
+                mock.patch.object(
+                    ChamadoListSerializer, 'to_representation',
+                    lento(ChamadoListSerializer.to_representation)):
+            cliente.get(reverse('chamados:chamado-detail', kwargs={'pk': self.chamado.pk}))
+            cliente.get(reverse('chamados:chamado-list-create'), {'fields': 'id,titulo'})
+
+        series = metricas.REGISTRO.series()
+        _, soma, _ = series['chamados:chamado-detail', 'GET']['serializacao_segundos']
+        self.assertGreaterEqual(soma, 0.01)
+        _, soma, _ = series['chamados:chamado-list-create', 'GET']['serializacao_segundos']
+        self.assertGreaterEqual(soma, 0.05)
+
+    def test_rota_nao_resolvida(self):
+        self.client.get('/api/inexistente/')
+        self.assertIn(
+            (metricas.ROTA_DESCONHECIDA, 'GET'), metricas.REGISTRO.series())
+
+    def test_quantis_das_amostras(self):
+        histograma = metricas.Histograma(metricas.BUCKETS['sql_consultas'])
+        for valor in range(1, 101):
+            histograma.observar(valor)
+        self.assertEqual(histograma.quantil(0.5), 50)
+        self.assertEqual(histograma.quantil(0.95), 95)
+        self.assertEqual(histograma.quantil(0.99), 99)
+        self.assertEqual(histograma.total, 100)
+        # le é inclusivo: 100 fica no bucket 100, nada em +Inf
+        self.assertEqual(histograma.contagens[-1], 0)
+
+    def test_serializacao_aninhada_conta_uma_vez(self):
+        medicao = metricas.Medicao()
+        with mock.patch.object(metricas.time, 'perf_counter', side_effect=[1.0, 3.0]):
+            with metricas.medir(medicao):
+                with metricas.cronometro_serializacao():
+                    with metricas.cronometro_serializacao():
+                        pass
+        self.assertEqual(medicao.serializacao, 2.0)
+
+    @override_settings(METRICAS_TOKEN='segredo')
+    def test_prometheus_exige_token(self):
+        url = reverse('metricas')
+        self.cliente(self.tecnico).get(reverse('chamados:chamado-list-create'))
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.assertEqual(
+            self.client.get(url, HTTP_AUTHORIZATION='Bearer outro').status_code, 403)
+
+        response = self.client.get(url, HTTP_AUTHORIZATION='Bearer segredo')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        texto = response.content.decode()
+        self.assertIn('# TYPE chamados_http_duracao_segundos histogram', texto)
+        self.assertIn(
+            'chamados_http_duracao_segundos_count'
+            '{rota="chamados:chamado-list-create",metodo="GET"} 1', texto)
+        self.assertIn(
+            'chamados_http_duracao_segundos_bucket'
+            '{rota="chamados:chamado-list-create",metodo="GET",le="+Inf"} 1', texto)
+        self.assertRegex(
+            texto, r'chamados_http_sql_consultas_quantil\{rota="chamados:chamado-list-create",'
+                   r'metodo="GET",quantile="0.99"\} \d+')
+        self.assertIn('chamados_autenticacao_cache_total{resultado="acertos"}', texto)
+
+    @override_settings(METRICAS_TOKEN='', DEBUG=False)
+    def test_prometheus_sem_token_fora_do_debug(self):
+        self.assertEqual(self.client.get(reverse('metricas')).status_code, 404)
+
+
+class ConsultasLentasTests(ChamadosTestMixin, TestCase):
+    """Registro de consultas lentas e o relatório `consultas_lentas`"""
+
+    def setUp(self):
+        consultas_lentas._explicadas.clear()
+        self.arquivo = settings.CONSULTAS_LENTAS_ARQUIVO
+        open(self.arquivo, 'w').close()
+
+    def test_normalizar(self):
+        sql = (
+            'SELECT "T3"."id" FROM "chamados_chamado" T3 WHERE "T3"."status" '
+            "IN (%s, %s,  %s) AND \"T3\".\"titulo\" = 'd''agua' LIMIT 21"
+        )
+        self.assertEqual(
+            consultas_lentas.normalizar(sql),
+            'SELECT "T3"."id" FROM "chamados_chamado" T3 WHERE "T3"."status" '
+            'IN (...) AND "T3"."titulo" = %s LIMIT %s'
+        )
+
+    def test_forma_parametros(self):
+        self.assertEqual(
+            consultas_lentas.forma_parametros([1, 'a', 'b', 'c', None]),
+            'int, str×3, NoneType')
+        self.assertEqual(
+            consultas_lentas.forma_parametros([(1, 'a'), (2, 'b')], many=True),
+            '2×(int, str)')
+
+    @override_settings(CONSULTAS_LENTAS_MS=0.000001)
+    def test_registra_rota_e_plano_na_primeira_vez(self):
+        url = reverse('chamados:chamado-list-create')
+        cliente = self.cliente(self.tecnico)
+        with CaptureQueriesContext(connection) as consultas:
+            response = cliente.get(url, {'busca_geral': 'computador'})
+        total = len(consultas)
+        # O EXPLAIN não entra na contagem da requisição
+        self.assertIn(f'desc="{total} consultas"', response['Server-Timing'])
+        cliente.get(url, {'busca_geral': 'liga'})
+
+        registros = list(consultas_lentas.ler_registros())
+        self.assertEqual(len(registros), 2 * total)
+        self.assertEqual(
+            {registro['rota'] for registro in registros},
+            {'chamados:chamado-list-create'})
+        busca = [r for r in registros if 'MATCH' in r['sql'] and 'COUNT' not in r['sql']]
+        self.assertEqual(len(busca), 2)
+        self.assertEqual(busca[0]['assinatura'], busca[1]['assinatura'])
+        self.assertNotIn('computador', busca[0]['sql'])
+        self.assertIn('str', busca[0]['parametros'])
+        self.assertTrue(busca[0]['plano'])
+        self.assertNotIn('plano', busca[1])
+
+    @override_settings(CONSULTAS_LENTAS_MS=0)
+    def test_desligado(self):
+        self.cliente(self.tecnico).get(reverse('chamados:chamado-list-create'))
+        self.assertEqual(list(consultas_lentas.ler_registros()), [])
+
+    def test_explain_com_erro_nao_aborta_transacao(self):
+        with transaction.atomic():
+            plano = consultas_lentas.explicar(
+                connection, 'SELECT * FROM tabela_inexistente', [])
+            self.assertTrue(plano[0].startswith('EXPLAIN falhou'))
+            self.assertTrue(Chamado.objects.exists())
+        self.assertIsNone(consultas_lentas.explicar(connection, 'VACUUM', None))
+
+    def test_relatorio_ordena_por_tempo_total(self):
+        linhas = [
+            {'assinatura': 'a', 'sql': 'SELECT a', 'parametros': '', 'ms': 300,
+             'rota': 'chamados:estatisticas'},
+            {'assinatura': 'b', 'sql': 'SELECT b', 'parametros': 'str×2', 'ms': 250,
+             'rota': 'chamados:chamado-list-create', 'plano': ['SCAN chamados_chamado']},
+            {'assinatura': 'b', 'sql': 'SELECT b', 'parametros': 'str×2', 'ms': 250,
+             'rota': 'chamados:chamado-list-create'},
+        ]
+        with open(self.arquivo, 'w') as arquivo:
+            for linha in linhas:
+                arquivo.write(json.dumps(linha) + '\n')
+            arquivo.write('{"cortada"\n')
+
+        saida = io.StringIO()
+        call_command('consultas_lentas', stdout=saida)
+        texto = saida.getvalue()
+        self.assertLess(texto.index('[b] total 500.0 ms'), texto.index('[a] total 300.0 ms'))
+        self.assertIn('2 execuções | média 250.0 ms', texto)
+        self.assertIn('SCAN chamados_chamado', texto)
+
+        saida = io.StringIO()
+        call_command('consultas_lentas', rota='chamados:estatisticas', stdout=saida)
+        self.assertNotIn('[b]', saida.getvalue())
+
+
+class GerarCargaTests(ChamadosTestMixin, TestCase):
+    """Geração de carga sintética em lotes com bulk_create"""
+
+    def gerar(self, **opcoes):
+        opcoes = {'chamados': 30, 'usuarios': 20, 'lote': 8, 'processos': 1,
+                  'semente': 3, **opcoes}
+        call_command('gerar_carga', stdout=io.StringIO(), **opcoes)
+
+    def test_gera_carga_consistente(self):
+        antes = Chamado.objects.count()
+        maior = numeracao.maior_numero_existente()
+        self.gerar()
+
+        gerados = Chamado.objects.filter(solicitante__username__startswith='carga')
+        self.assertEqual(Chamado.objects.count(), antes + 30)
+        self.assertEqual(gerados.count(), 30)
+        self.assertEqual(
+            Usuario.objects.filter(username__startswith='carga',
+                                   tipo_usuario='tecnico').count(), 1)
+        self.assertEqual(numeracao.maior_numero_existente(), maior + 30)
+        self.assertEqual(contadores.divergencias(), [])
+
+        # Datas sorteadas gravadas no lugar de auto_now/auto_now_add
+        self.assertGreater(len(set(gerados.values_list('criado_em', flat=True))), 1)
+        self.assertTrue(Chamado._meta.get_field('criado_em').auto_now_add)
+        self.assertTrue(Chamado._meta.get_field('atualizado_em').auto_now)
+        for chamado in gerados:
+            self.assertTrue(chamado.historico.filter(tipo_acao='criado').exists())
+            self.assertGreaterEqual(chamado.atualizado_em, chamado.criado_em)
+            if chamado.status == 'encerrado':
+                self.assertIsNotNone(chamado.encerrado_em)
+            if chamado.status == 'aberto':
+                self.assertIsNone(chamado.tecnico_responsavel_id)
+        for anexo in AnexoChamado.objects.filter(chamado__in=gerados):
+            self.assertTrue(anexo.arquivo.name.startswith(
+                f'chamados/{anexo.chamado.numero}/anexos/'))
+
+    def test_reaproveita_usuarios(self):
+        self.gerar(chamados=5)
+        self.gerar(chamados=5)
+        self.assertEqual(
+            Usuario.objects.filter(username__startswith='carga').count(), 20)
+        self.assertEqual(
+            Chamado.objects.filter(solicitante__username__startswith='carga').count(), 10)
+
+    def test_lotes_reproduziveis(self):
+        def lote(semente):
+            contexto = carga.Contexto(
+                semente=semente, total=50, tamanho_lote=20,
+                solicitantes=[self.usuario.pk], tecnicos=[self.tecnico.pk],
+                tipos=[self.tipo.pk], agora=carga.inicio_do_dia())
+            return [
+                (chamado.titulo, chamado.status, chamado.prioridade,
+                 chamado.criado_em, [h.tipo_acao for h in historico], len(anexos))
+                for chamado, historico, anexos in carga.montar_lote(contexto, 2)
+            ]
+
+        self.assertEqual(len(lote(7)), 10)
+        self.assertEqual(lote(7), lote(7))
+        self.assertNotEqual(lote(7), lote(8))
+
+
+MEDIA_TESTES = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_TESTES)
+class OrcamentoConsultasChamadosTests(
+        OrcamentoConsultasMixin, ChamadosTestMixin, TestCase):
+    """Orçamento de consultas das rotas de chamados"""
+
+    urlconf = 'chamados.urls'
+
+    ORCAMENTOS = {
+        'tipo-servico-list': [Requisicao('GET', 'usuario', 1)],
+        'chamado-list-create': [
+            Requisicao('GET', 'tecnico', 2),
+            Requisicao('GET', 'tecnico', 1,
+                       dados=lambda t: {'paginacao': 'cursor'}),
+            Requisicao('POST', 'usuario', 8, dados=lambda t: {
+                'titulo': 'Novo', 'descricao': 'Teste',
+                'tipo_servico': t.tipo.pk,
+            }),
+        ],
+        'chamado-detail': [
+            Requisicao('GET', 'usuario', 4,
+                       kwargs=lambda t: {'pk': t.chamado.pk}),
+            Requisicao('PATCH', 'tecnico', 6,
+                       kwargs=lambda t: {'pk': t.chamado.pk},
+                       dados=lambda t: {
+                           'status': 'em_atendimento',
+                           'tecnico_responsavel': t.tecnico.pk,
+                       }),
+        ],
+        'atualizar-status': [
+            Requisicao('PATCH', 'tecnico', 10,
+                       kwargs=lambda t: {'pk': t.chamado.pk},
+                       dados=lambda t: {'status': 'em_atendimento'}),
+        ],
+        'meus-chamados': [
+            Requisicao('GET', 'usuario', 2),
+            Requisicao('GET', 'usuario', 1, dados=lambda t: {'stream': 'true'}),
+        ],
+        'chamados-tecnico': [Requisicao('GET', 'tecnico', 2)],
+        'exportar-chamados': [
+            Requisicao('GET', 'tecnico', 1),
+            Requisicao('GET', 'tecnico', 1, dados=lambda t: {
+                'formato': 'ndjson', 'status_list': ['aberto', 'encerrado'],
+                'search': 'impressora',
+            }),
+        ],
+        'alteracoes-chamados': [Requisicao('GET', 'usuario', 2)],
+        # Sob WSGI só o evento `indisponivel`
+        'eventos-chamados': [Requisicao('GET', 'usuario', 0)],
+        'historico-chamado': [
+            Requisicao('GET', 'usuario', 1,
+                       kwargs=lambda t: {'chamado_id': t.chamado.pk}),
+        ],
+        'anexos-chamado': [
+            Requisicao('GET', 'usuario', 1,
+                       kwargs=lambda t: {'chamado_id': t.chamado.pk}),
+            Requisicao('POST', 'usuario', 3,
+                       kwargs=lambda t: {'chamado_id': t.chamado.pk},
+                       dados=lambda t: {'arquivo': SimpleUploadedFile(
+                           'log.txt', b'erro', content_type='text/plain')},
+                       formato='multipart'),
+        ],
+        'deletar-anexo': [
+            Requisicao('DELETE', 'tecnico', 4,
+                       kwargs=lambda t: {'anexo_id': t.anexo.pk}),
+        ],
+        'estatisticas': [
+            Requisicao('GET', 'usuario', 1),
+            Requisicao('GET', 'tecnico', 1),
+        ],
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.anexo = AnexoChamado.objects.create(
+            chamado=cls.chamado, arquivo='chamados/00001/anexos/log.txt',
+            nome_original='log.txt', tamanho=4, tipo_arquivo='text/plain',
+            enviado_por=cls.usuario
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_TESTES, ignore_errors=True)
@@ -0,0 +1,155 @@
+"""Transição de status de chamados
+
+`transicionar_status` troca o status com um UPDATE condicional
+(`WHERE status = <esperado>`), carimba `atendido_em`/`encerrado_em`, ajusta
+os contadores e grava o histórico numa única transação; o evento
+`chamado.salvo` é publicado após o commit. Se outra requisição
+mudou o status antes, nenhuma linha é afetada e `TransicaoConflitante` é
+levantada em vez de sobrescrever a alteração.
+"""
+from django.db import connections, models, router, transaction
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .bancos import suporta_update_returning
+from .contadores import CAMPOS, registrar_variacao
+from .historico import RegistroHistorico
+
+# Lidas após a troca: contadores e o evento chamado.salvo
+RETORNO = CAMPOS + ('numero', 'titulo')
+
+# Coluna carimbada na primeira vez que o chamado entra em cada status
+CARIMBOS = {
+    'em_atendimento': 'atendido_em',
+    'encerrado': 'encerrado_em',
+}
+
+
+class TransicaoConflitante(Exception):
+    """O status do chamado não era o esperado no momento da transição"""
+
+    def __init__(self, status_atual):
+        super().__init__(f'Status atual do chamado: {status_atual}')
+        self.status_atual = status_atual
+
+
+def descricao_transicao(status_anterior, novo_status, usuario, solicitante_id):
+    """Texto do histórico para a mudança de status"""
+    from .models import Chamado
+
+    if solicitante_id == usuario.pk and novo_status == 'encerrado':
+        return f'Chamado encerrado pelo solicitante ({usuario.nome_completo})'
+    nomes = dict(Chamado.STATUS_CHOICES)
+    return (
+        f'Status alterado de "{nomes[status_anterior]}" para '
+        f'"{nomes[novo_status]}" por {usuario.nome_completo}'
+    )
+
+
+def _atualizar_returning(conexao, model, chamado_id, status_esperado,
+                         valores, carimbo, agora):
+    opts = model._meta
+    nome = conexao.ops.quote_name
+    atribuicoes = []
+    parametros = []
+    for attname, valor in valores.items():
+        campo = opts.get_field(attname)
+        atribuicoes.append(f'{nome(campo.column)} = %s')
+        parametros.append(campo.get_db_prep_save(valor, conexao))
+    if carimbo:
+        coluna = nome(opts.get_field(carimbo).column)
+        atribuicoes.append(f'{coluna} = COALESCE({coluna}, %s)')
+        parametros.append(
+            opts.get_field(carimbo).get_db_prep_save(agora, conexao))
+
+    coluna_status = nome(opts.get_field('status').column)
+    retorno = ', '.join(nome(opts.get_field(campo).column) for campo in RETORNO)
+    sql = (
+        f'UPDATE {nome(opts.db_table)} SET {", ".join(atribuicoes)} '
+        f'WHERE {nome(opts.pk.column)} = %s AND {coluna_status} = %s '
+        f'RETURNING {retorno}'
+    )
+    with conexao.cursor() as cursor:
+        cursor.execute(sql, parametros + [chamado_id, status_esperado])
+        linha = cursor.fetchone()
+    return dict(zip(RETORNO, linha)) if linha else None
+
+
+def _atualizar_orm(conexao, model, chamado_id, status_esperado,
+                   valores, carimbo, agora):
+    if carimbo:
+        valores = dict(valores, **{
+            carimbo: Coalesce(carimbo, models.Value(agora))
+        })
+    atualizados = model.objects.using(conexao.alias).filter(
+        pk=chamado_id, status=status_esperado
+    ).update(**valores)
+    if not atualizados:
+        return None
+    return model.objects.using(conexao.alias).filter(
+        pk=chamado_id).values(*RETORNO).get()
+
+
+def _publicar_salvo(chamado_id, linha, agora, using):
+    """chamado.salvo após o commit: o UPDATE direto não emite post_save"""
+    from . import eventos
+    from .models import Chamado
+
+    if eventos.broker.ativo():
+        chamado = Chamado(id=chamado_id, atualizado_em=agora, **linha)
+        eventos.publicar([eventos.mensagem_chamado(chamado)], using=using)
+
+
+def transicionar_status(chamado_id, status_esperado, novo_status, usuario,
+                        campos=None, using=None, historico=None):
+    """Aplica a transição `status_esperado` -> `novo_status` atomicamente
+
+    `campos` permite gravar outras colunas no mesmo UPDATE (ex.:
+    `observacoes_tecnico`). A entrada de histórico vai para o `historico`
+    (RegistroHistorico) recebido ou é gravada antes do commit.
+
+    Retorna os valores do chamado relevantes para os contadores após a
+    troca; levanta `Chamado.DoesNotExist` se o chamado não existe e
+    `TransicaoConflitante` se o status não era o esperado.
+    """
+    from .models import Chamado
+
+    alias = using or router.db_for_write(Chamado)
+    conexao = connections[alias]
+    agora = timezone.now()
+    valores = dict(campos or {}, status=novo_status, atualizado_em=agora)
+    carimbo = CARIMBOS.get(novo_status)
+
+    if suporta_update_returning(conexao):
+        atualizar = _atualizar_returning
+    else:
+        atualizar = _atualizar_orm
+
+    with transaction.atomic(using=alias):
+        linha = atualizar(conexao, Chamado, chamado_id, status_esperado,
+                          valores, carimbo, agora)
+        if linha is None:
+            status_atual = Chamado.objects.using(alias).filter(
+                pk=chamado_id).values_list('status', flat=True).first()
+            if status_atual is None:
+                raise Chamado.DoesNotExist('Chamado não encontrado')
+            raise TransicaoConflitante(status_atual)
+
+        depois = {campo: linha[campo] for campo in CAMPOS}
+        registrar_variacao(
+            dict(depois, status=status_esperado), depois, using=alias)
+        _publicar_salvo(chamado_id, linha, agora, alias)
+
+        if status_esperado != novo_status:
+            registro = historico or RegistroHistorico(usuario, using=alias)
+            registro.registrar(
+                chamado_id, 'status_alterado',
+                descricao_transicao(
+                    status_esperado, novo_status, usuario,
+                    depois['solicitante_id']
+                ),
+                usuario
+            )
+            if historico is None:
+                registro.gravar()
+    return depois
@@ -8,9 +8,13 @@ urlpatterns = [
     path('', views.ChamadoListCreateView.as_view(), name='chamado-list-create'),
     path('<int:pk>/', views.ChamadoDetailView.as_view(), name='chamado-detail'),
     path('<int:pk>/status/', views.atualizar_status_chamado, name='atualizar-status'),
-    path('meus-chamados/', views.meus_chamados, name='meus-chamados'),
-    path('chamados-tecnico/', views.chamados_tecnico, name='chamados-tecnico'),
-    path('<int:chamado_id>/anexos/', views.upload_anexo, name='upload-anexo'),
+    path('meus-chamados/', views.MeusChamadosView.as_view(), name='meus-chamados'),
+    path('alteracoes/', views.alteracoes_chamados, name='alteracoes-chamados'),
+    path('eventos/', views.EventosChamadosView.as_view(), name='eventos-chamados'),
+    path('exportar/', views.ExportarChamadosView.as_view(), name='exportar-chamados'),
+    path('chamados-tecnico/', views.ChamadosTecnicoView.as_view(), name='chamados-tecnico'),
+    path('<int:chamado_id>/historico/', views.HistoricoChamadoListView.as_view(), name='historico-chamado'),
+    path('<int:chamado_id>/anexos/', views.AnexosChamadoView.as_view(), name='anexos-chamado'),
     path('anexos/<int:anexo_id>/', views.deletar_anexo, name='deletar-anexo'),
     path('estatisticas/', views.estatisticas_dashboard, name='estatisticas'),
 ]
@@ -1,26 +1,43 @@
-from django.db import models
-from django.utils import timezone
 from django_filters.rest_framework import DjangoFilterBackend
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, StreamingHttpResponse
+from django.urls import reverse
 from rest_framework import generics, permissions, status
-from rest_framework.decorators import (api_view, parser_classes,
-                                       permission_classes)
-from rest_framework.filters import OrderingFilter, SearchFilter
+from rest_framework.decorators import api_view, permission_classes
 from rest_framework.parsers import FormParser, MultiPartParser
 from rest_framework.response import Response
-
-from .filters import ChamadoFilter
-from .models import AnexoChamado, Chamado, HistoricoChamado, TipoServico
+from rest_framework.views import APIView
+
+from sistema_chamados.metricas import cronometro_serializacao
+
+from . import alteracoes, contadores, eventos, exportacao
+from .campos import campos_da_requisicao
+from .condicional import (GetCondicionalMixin, validadores_detalhe,
+                          validadores_pagina)
+from .filters import (BuscaTextualFilter, ChamadoFilter,
+                      ChamadoOrderingFilter)
+from .historico import registro_historico
+from .models import (ORDEM_HISTORICO, AnexoChamado, Chamado,
+                     HistoricoChamado, TipoServico)
+from .pagination import ChamadoPagination, KeysetPagination
+from .projecoes import ChamadoListProjecao
+from .referencia import TIPOS_SERVICO, ListaReferenciaMixin
+from .renderers import JSONRapidoRenderer
 from .serializers import (AnexoChamadoSerializer, AnexoChamadoUploadSerializer,
                           ChamadoCreateSerializer, ChamadoDetailSerializer,
                           ChamadoListSerializer, ChamadoStatusUpdateSerializer,
                           ChamadoUpdateSerializer, HistoricoChamadoSerializer,
                           TipoServicoSerializer)
+from .streaming import resposta_json_stream, resposta_stream
+from .transicoes import TransicaoConflitante, transicionar_status
 
 
-class TipoServicoListView(generics.ListAPIView):
-    """View para listar tipos de serviço"""
+class TipoServicoListView(ListaReferenciaMixin, generics.ListAPIView):
+    """View para listar tipos de serviço (servida pelo cache de referência)"""
 
     queryset = TipoServico.objects.filter(ativo=True)
+    referencia = TIPOS_SERVICO
     serializer_class = TipoServicoSerializer
     # Permitir acesso sem autenticação
     permission_classes = [permissions.IsAuthenticated]
@@ -28,17 +45,71 @@ class TipoServicoListView(generics.ListAPIView):
     ordering = ['nome']
 
 
-class ChamadoListCreateView(generics.ListCreateAPIView):
-    """View para listar e criar chamados"""
+class ChamadoListMixin(GetCondicionalMixin):
+    """Configuração comum das listagens de chamados
+
+    Aceita `?stream=true` para devolver a lista completa filtrada como um
+    array JSON transmitido em lotes, sem paginação. As demais respostas têm
+    ETag (ver chamados.condicional).
+    """
 
     queryset = Chamado.objects.all()
     permission_classes = [permissions.IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    pagination_class = ChamadoPagination
+    filter_backends = [DjangoFilterBackend, BuscaTextualFilter,
+                       ChamadoOrderingFilter]
     filterset_class = ChamadoFilter
+    # Indexados por chamados.busca; mantidos para a documentação da API
     search_fields = ['numero', 'titulo',
                      'descricao', 'equipamento', 'localizacao']
     ordering_fields = ['criado_em', 'atualizado_em', 'prioridade']
     ordering = ['-criado_em']
+    stream_query_param = 'stream'
+
+    def get_queryset(self):
+        plano = ChamadoListSerializer.plano_da_requisicao(self.request)
+        # atualizado_em sempre lido: compõe o ETag da página
+        colunas = plano and [*plano[0], 'atualizado_em']
+        return super().get_queryset().para_listagem(colunas)
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        serializer_class = ChamadoListSerializer
+        self.projecao = None
+        # Sem ?fields= a listagem completa sai pela projeção sobre values(),
+        # com a mesma saída do ChamadoListSerializer. A paginação aplica a
+        # projeção só à página, para que o COUNT continue sem JOINs.
+        if campos_da_requisicao(request)[0] is None:
+            self.projecao = ChamadoListProjecao.projetar
+            serializer_class = ChamadoListProjecao
+        context = self.get_serializer_context()
+
+        if request.query_params.get(self.stream_query_param) in ('1', 'true'):
+            if self.projecao:
+                queryset = self.projecao(queryset)
+            return resposta_json_stream(
+                request, queryset, serializer_class, context)
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            resposta = self.resposta_condicional(
+                request, validadores_pagina(self.paginator, page))
+            if resposta is not None:
+                return resposta
+            serializer = serializer_class(page, many=True, context=context)
+            with cronometro_serializacao():
+                dados = serializer.data
+            return self.get_paginated_response(dados)
+        if self.projecao:
+            queryset = self.projecao(queryset)
+        serializer = serializer_class(queryset, many=True, context=context)
+        with cronometro_serializacao():
+            dados = serializer.data
+        return Response(dados)
+
+
+class ChamadoListCreateView(ChamadoListMixin, generics.ListCreateAPIView):
+    """View para listar e criar chamados"""
 
     def get_serializer_class(self):
         if self.request.method == 'POST':
@@ -46,31 +117,29 @@ class ChamadoListCreateView(generics.ListCreateAPIView):
         return ChamadoListSerializer
 
     def perform_create(self, serializer):
-        chamado = serializer.save(solicitante=self.request.user)
-
-        # Criar histórico
-        HistoricoChamado.objects.create(
-            chamado=chamado,
-            tipo_acao='criado',
-            descricao=f'Chamado criado por {self.request.user.nome_completo}',
-            usuario=self.request.user
-        )
+        with registro_historico(usuario=self.request.user) as historico:
+            chamado = serializer.save(solicitante=self.request.user)
+
+            # Criar histórico
+            historico.registrar(
+                chamado, 'criado',
+                f'Chamado criado por {self.request.user.nome_completo}'
+            )
 
     def create(self, request, *args, **kwargs):
         """Sobrescrever create para retornar dados completos"""
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
-        # Criar o chamado
-        chamado = serializer.save(solicitante=request.user)
+        with registro_historico(usuario=request.user) as historico:
+            # Criar o chamado
+            chamado = serializer.save(solicitante=request.user)
 
-        # Criar histórico
-        HistoricoChamado.objects.create(
-            chamado=chamado,
-            tipo_acao='criado',
-            descricao=f'Chamado criado por {request.user.nome_completo}',
-            usuario=request.user
-        )
+            # Criar histórico
+            historico.registrar(
+                chamado, 'criado',
+                f'Chamado criado por {request.user.nome_completo}'
+            )
 
         # Retornar dados completos usando o serializer de detalhes
         response_serializer = ChamadoDetailSerializer(chamado)
@@ -80,54 +149,80 @@ class ChamadoListCreateView(generics.ListCreateAPIView):
         return Response(response_serializer.data, status=status.HTTP_201_CREATED)
 
 
-class ChamadoDetailView(generics.RetrieveUpdateDestroyAPIView):
-    """View para detalhar, atualizar e deletar chamado"""
+class ChamadoDetailView(GetCondicionalMixin,
+                        generics.RetrieveUpdateDestroyAPIView):
+    """View para detalhar, atualizar e deletar chamado
+
+    O GET responde 304 a `If-None-Match`/`If-Modified-Since` sem carregar
+    histórico e anexos (ver chamados.condicional).
+    """
 
     queryset = Chamado.objects.all()
     serializer_class = ChamadoDetailSerializer
     permission_classes = [permissions.IsAuthenticated]
 
+    def get_queryset(self):
+        if self.request.method == 'GET':
+            plano = ChamadoDetailSerializer.plano_da_requisicao(self.request)
+            return super().get_queryset().para_detalhe(*(plano or ()))
+        return super().get_queryset()
+
+    def retrieve(self, request, *args, **kwargs):
+        validadores = validadores_detalhe(self.kwargs['pk'])
+        if validadores is None:
+            raise Http404
+        resposta = self.resposta_condicional(request, *validadores)
+        if resposta is not None:
+            return resposta
+        serializer = self.get_serializer(self.get_object())
+        with cronometro_serializacao():
+            dados = serializer.data
+        return Response(dados)
+
     def get_serializer_class(self):
         if self.request.method in ['PUT', 'PATCH']:
             return ChamadoUpdateSerializer
         return ChamadoDetailSerializer
 
     def perform_update(self, serializer):
-        chamado_anterior = self.get_object()
-        chamado = serializer.save()
-
-        # Verificar mudanças e criar histórico
-        if chamado_anterior.status != chamado.status:
-            HistoricoChamado.objects.create(
-                chamado=chamado,
-                tipo_acao='status_alterado',
-                descricao=f'Status alterado de "{chamado_anterior.get_status_display()}" para "{chamado.get_status_display()}"',
-                usuario=self.request.user
-            )
-
-        if chamado_anterior.tecnico_responsavel != chamado.tecnico_responsavel:
-            if chamado.tecnico_responsavel:
-                HistoricoChamado.objects.create(
-                    chamado=chamado,
-                    tipo_acao='tecnico_atribuido',
-                    descricao=f'Técnico {chamado.tecnico_responsavel.nome_completo} atribuído ao chamado',
-                    usuario=self.request.user
-                )
-            else:
-                HistoricoChamado.objects.create(
-                    chamado=chamado,
-                    tipo_acao='tecnico_removido',
-                    descricao=f'Técnico removido do chamado',
-                    usuario=self.request.user
+        # A instância ainda não foi alterada: os valores atuais são os
+        # anteriores à edição, sem precisar buscar o chamado de novo
+        status_anterior = serializer.instance.status
+        tecnico_anterior_id = serializer.instance.tecnico_responsavel_id
+        with registro_historico(usuario=self.request.user) as historico:
+            chamado = serializer.save()
+
+            # Verificar mudanças e criar histórico
+            if status_anterior != chamado.status:
+                historico.registrar(
+                    chamado, 'status_alterado',
+                    f'Status alterado de "{dict(Chamado.STATUS_CHOICES)[status_anterior]}" para "{chamado.get_status_display()}"'
                 )
 
+            if tecnico_anterior_id != chamado.tecnico_responsavel_id:
+                if chamado.tecnico_responsavel:
+                    historico.registrar(
+                        chamado, 'tecnico_atribuido',
+                        f'Técnico {chamado.tecnico_responsavel.nome_completo} atribuído ao chamado'
+                    )
+                else:
+                    historico.registrar(
+                        chamado, 'tecnico_removido',
+                        'Técnico removido do chamado'
+                    )
+
 
 @api_view(['PATCH'])
 @permission_classes([permissions.IsAuthenticated])
 def atualizar_status_chamado(request, pk):
-    """Atualiza apenas o status do chamado"""
+    """Atualiza apenas o status do chamado
+
+    `status_esperado` (opcional) é o status que o cliente exibia; se o
+    chamado já estiver em outro status a resposta é 409 em vez de
+    sobrescrever a alteração feita por outra pessoa.
+    """
     try:
-        chamado = Chamado.objects.get(pk=pk)
+        chamado = Chamado.objects.only('id', 'status', 'solicitante').get(pk=pk)
     except Chamado.DoesNotExist:
         return Response(
             {'error': 'Chamado não encontrado'},
@@ -142,7 +237,7 @@ def atualizar_status_chamado(request, pk):
     if novo_status == 'encerrado':
         pode_encerrar = (
             user.tipo_usuario in ['tecnico', 'admin'] or
-            chamado.solicitante == user
+            chamado.solicitante_id == user.pk
         )
         if not pode_encerrar:
             return Response(
@@ -158,112 +253,204 @@ def atualizar_status_chamado(request, pk):
                 status=status.HTTP_403_FORBIDDEN
             )
 
-    status_anterior = chamado.status
     serializer = ChamadoStatusUpdateSerializer(
         chamado, data=request.data, partial=True)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-    if serializer.is_valid():
-        chamado = serializer.save()
-
-        # Atualizar timestamp específico baseado no status
-        if novo_status == 'em_atendimento' and not chamado.atendido_em:
-            chamado.atendido_em = timezone.now()
-            chamado.save()
-        elif novo_status == 'encerrado' and not chamado.encerrado_em:
-            chamado.encerrado_em = timezone.now()
-            chamado.save()
-
-        # Criar histórico da mudança de status
-        if status_anterior != chamado.status:
-            # Personalizar mensagem baseada em quem fez a ação
-            if chamado.solicitante == user and novo_status == 'encerrado':
-                descricao = f'Chamado encerrado pelo solicitante ({user.nome_completo})'
-            else:
-                descricao = f'Status alterado de "{dict(Chamado.STATUS_CHOICES)[status_anterior]}" para "{chamado.get_status_display()}" por {user.nome_completo}'
-
-            HistoricoChamado.objects.create(
-                chamado=chamado,
-                tipo_acao='status_alterado',
-                descricao=descricao,
-                usuario=user
-            )
-
-        return Response(ChamadoDetailSerializer(chamado).data)
+    campos = dict(serializer.validated_data)
+    status_esperado = campos.pop('status_esperado', None) or chamado.status
+    try:
+        transicionar_status(
+            chamado.pk, status_esperado,
+            campos.pop('status', chamado.status), user, campos=campos
+        )
+    except Chamado.DoesNotExist:
+        return Response(
+            {'error': 'Chamado não encontrado'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    except TransicaoConflitante as erro:
+        return Response(
+            {
+                'error': 'O status do chamado foi alterado por outra pessoa',
+                'status_atual': erro.status_atual,
+            },
+            status=status.HTTP_409_CONFLICT
+        )
 
-    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    chamado = Chamado.objects.para_detalhe().get(pk=chamado.pk)
+    return Response(ChamadoDetailSerializer(chamado).data)
 
 
-@api_view(['GET'])
-@permission_classes([permissions.IsAuthenticated])
-def meus_chamados(request):
+class MeusChamadosView(ChamadoListMixin, generics.ListAPIView):
     """Retorna os chamados do usuário logado"""
-    chamados = Chamado.objects.filter(solicitante=request.user)
 
-    # Aplicar filtros se fornecidos
-    status_filter = request.GET.get('status')
-    if status_filter:
-        chamados = chamados.filter(status=status_filter)
+    serializer_class = ChamadoListSerializer
 
-    serializer = ChamadoListSerializer(chamados, many=True)
-    return Response(serializer.data)
+    def get_queryset(self):
+        return super().get_queryset().filter(solicitante=self.request.user)
 
 
-@api_view(['GET'])
-@permission_classes([permissions.IsAuthenticated])
-def chamados_tecnico(request):
+class ChamadosTecnicoView(ChamadoListMixin, generics.ListAPIView):
     """Retorna os chamados atribuídos ao técnico logado"""
-    if request.user.tipo_usuario != 'tecnico':
-        return Response(
-            {'error': 'Apenas técnicos podem acessar esta funcionalidade'},
-            status=status.HTTP_403_FORBIDDEN
+
+    serializer_class = ChamadoListSerializer
+
+    def get_queryset(self):
+        return super().get_queryset().filter(
+            tecnico_responsavel=self.request.user)
+
+    def list(self, request, *args, **kwargs):
+        if request.user.tipo_usuario != 'tecnico':
+            return Response(
+                {'error': 'Apenas técnicos podem acessar esta funcionalidade'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        return super().list(request, *args, **kwargs)
+
+
+class ExportarChamadosView(ChamadoListMixin, generics.ListAPIView):
+    """Exporta todos os chamados filtrados em CSV ou NDJSON (`?formato=`)
+
+    Aceita os mesmos filtros, busca e ordenação da listagem; sem paginação
+    nem COUNT, as linhas são transmitidas em lotes (ver chamados.exportacao).
+    """
+
+    serializer_class = ChamadoListSerializer
+    formato_query_param = 'formato'
+
+    def get_queryset(self):
+        return Chamado.objects.all()
+
+    def list(self, request, *args, **kwargs):
+        if request.user.tipo_usuario not in ['tecnico', 'admin']:
+            return Response(
+                {'error': 'Apenas técnicos e administradores podem exportar chamados'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        formato = request.query_params.get(self.formato_query_param, 'csv')
+        if formato not in exportacao.FORMATOS:
+            return Response(
+                {'error': f'Formato inválido. Use: {", ".join(exportacao.FORMATOS)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        queryset = self.filter_queryset(self.get_queryset())
+        response = resposta_stream(
+            request, exportacao.exportar(queryset, formato),
+            content_type=exportacao.FORMATOS[formato]
         )
+        response['Content-Disposition'] = (
+            f'attachment; filename="chamados.{formato}"')
+        return response
 
-    chamados = Chamado.objects.filter(tecnico_responsavel=request.user)
 
-    # Aplicar filtros se fornecidos
-    status_filter = request.GET.get('status')
-    if status_filter:
-        chamados = chamados.filter(status=status_filter)
+class EventosChamadosView(APIView):
+    """Eventos de chamados em tempo real (Server-Sent Events)
 
-    serializer = ChamadoListSerializer(chamados, many=True)
-    return Response(serializer.data)
+    Sob WSGI a resposta traz só o evento `indisponivel`, com o endereço da
+    sincronização incremental (ver chamados.eventos).
+    """
 
+    permission_classes = [permissions.IsAuthenticated]
+    renderer_classes = [eventos.EventosRenderer, JSONRapidoRenderer]
+
+    def get(self, request):
+        if isinstance(request._request, ASGIRequest):
+            conteudo = eventos.transmitir(
+                request.user, settings.CHAMADOS_EVENTOS_DURACAO)
+        else:
+            conteudo = [eventos.formatar('indisponivel', {
+                'alteracoes': reverse('chamados:alteracoes-chamados'),
+            })]
+        response = StreamingHttpResponse(
+            conteudo, content_type=eventos.EventosRenderer.media_type)
+        response['Cache-Control'] = 'no-cache'
+        # Sem buffer no nginx: cada evento sai assim que é escrito
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+
+class ChamadoSubRecursoMixin:
+    """Listas paginadas por cursor das relações de um chamado"""
 
-@api_view(['POST'])
-@permission_classes([permissions.IsAuthenticated])
-@parser_classes([MultiPartParser, FormParser])
-def upload_anexo(request, chamado_id):
-    """Upload de anexo para um chamado"""
-    try:
-        chamado = Chamado.objects.get(pk=chamado_id)
-    except Chamado.DoesNotExist:
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+
+    def chamado_nao_encontrado(self):
         return Response(
             {'error': 'Chamado não encontrado'},
             status=status.HTTP_404_NOT_FOUND
         )
 
-    serializer = AnexoChamadoUploadSerializer(data=request.data)
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        # Só consulta o chamado quando a lista vem vazia
+        if (not response.data['results'] and
+                not Chamado.objects.filter(pk=self.kwargs['chamado_id']).exists()):
+            return self.chamado_nao_encontrado()
+        return response
 
-    if serializer.is_valid():
-        anexo = serializer.save(
-            chamado=chamado,
-            enviado_por=request.user
-        )
 
-        # Criar histórico
-        HistoricoChamado.objects.create(
-            chamado=chamado,
-            tipo_acao='anexo_adicionado',
-            descricao=f'Anexo "{anexo.nome_original}" adicionado',
-            usuario=request.user
-        )
+class HistoricoChamadoListView(ChamadoSubRecursoMixin, generics.ListAPIView):
+    """Histórico completo do chamado, mais recente primeiro"""
 
-        return Response(
-            AnexoChamadoSerializer(anexo, context={'request': request}).data,
-            status=status.HTTP_201_CREATED
-        )
+    serializer_class = HistoricoChamadoSerializer
+
+    def get_queryset(self):
+        # Geração do schema (drf-spectacular): sem chamado_id na URL
+        if getattr(self, 'swagger_fake_view', False):
+            return HistoricoChamado.objects.none()
+        return HistoricoChamado.objects.filter(
+            chamado_id=self.kwargs['chamado_id']
+        ).select_related('usuario').order_by(*ORDEM_HISTORICO)
+
+
+class AnexosChamadoView(ChamadoSubRecursoMixin, generics.ListAPIView):
+    """Lista (GET) e recebe (POST) os anexos de um chamado"""
+
+    serializer_class = AnexoChamadoSerializer
+    parser_classes = [MultiPartParser, FormParser]
+    throttle_scope = 'anexos'
 
-    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    def get_queryset(self):
+        if getattr(self, 'swagger_fake_view', False):
+            return AnexoChamado.objects.none()
+        return AnexoChamado.objects.filter(
+            chamado_id=self.kwargs['chamado_id']
+        ).select_related('enviado_por').order_by('-criado_em', '-id')
+
+    def post(self, request, chamado_id):
+        """Upload de anexo para um chamado"""
+        try:
+            chamado = Chamado.objects.get(pk=chamado_id)
+        except Chamado.DoesNotExist:
+            return self.chamado_nao_encontrado()
+
+        serializer = AnexoChamadoUploadSerializer(data=request.data)
+
+        if serializer.is_valid():
+            with registro_historico(usuario=request.user) as historico:
+                anexo = serializer.save(
+                    chamado=chamado,
+                    enviado_por=request.user
+                )
+
+                # Criar histórico
+                historico.registrar(
+                    chamado, 'anexo_adicionado',
+                    f'Anexo "{anexo.nome_original}" adicionado'
+                )
+
+            return Response(
+                AnexoChamadoSerializer(
+                    anexo, context=self.get_serializer_context()).data,
+                status=status.HTTP_201_CREATED
+            )
+
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
 @api_view(['DELETE'])
@@ -286,15 +473,12 @@ def deletar_anexo(request, anexo_id):
             status=status.HTTP_403_FORBIDDEN
         )
 
-    # Criar histórico antes de deletar
-    HistoricoChamado.objects.create(
-        chamado=anexo.chamado,
-        tipo_acao='anexo_removido',
-        descricao=f'Anexo "{anexo.nome_original}" removido',
-        usuario=request.user
-    )
-
-    anexo.delete()
+    with registro_historico(usuario=request.user) as historico:
+        historico.registrar(
+            anexo.chamado_id, 'anexo_removido',
+            f'Anexo "{anexo.nome_original}" removido'
+        )
+        anexo.delete()
 
     return Response(status=status.HTTP_204_NO_CONTENT)
 
@@ -304,46 +488,28 @@ def deletar_anexo(request, anexo_id):
 def estatisticas_dashboard(request):
     """Retorna estatísticas para o dashboard"""
 
-    # Estatísticas gerais
-    total_chamados = Chamado.objects.count()
-    chamados_abertos = Chamado.objects.filter(status='aberto').count()
-    chamados_em_atendimento = Chamado.objects.filter(
-        status='em_atendimento').count()
-    chamados_encerrados = Chamado.objects.filter(status='encerrado').count()
-
-    # Estatísticas por prioridade
-    chamados_urgentes = Chamado.objects.filter(
-        prioridade='urgente',
-        status__in=['aberto', 'em_atendimento']
-    ).count()
-
-    # Estatísticas do usuário
-    if request.user.tipo_usuario == 'tecnico':
-        # Para técnicos, contar chamados abertos OU atribuídos a eles
-
-        meus_chamados_queryset = Chamado.objects.filter(
-            models.Q(status='aberto') | models.Q(
-                tecnico_responsavel=request.user)
+    # Lido dos contadores mantidos a cada escrita: custo constante,
+    # independente do tamanho da tabela de chamados
+    return Response(contadores.estatisticas_dashboard(request.user))
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def alteracoes_chamados(request):
+    """Chamados alterados e excluídos desde a marca `?desde=`
+
+    Sem `desde`, começa pela carga completa. Repita com a marca devolvida
+    enquanto `tem_mais` for verdadeiro (ver chamados.alteracoes).
+    """
+    try:
+        return Response(alteracoes.alteracoes_desde(request.query_params.get('desde')))
+    except alteracoes.MarcaInvalida:
+        return Response(
+            {'error': 'Marca de sincronização inválida'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    except alteracoes.MarcaExpirada:
+        return Response(
+            {'error': 'Marca de sincronização expirada. Recarregue sem "desde".'},
+            status=status.HTTP_410_GONE
         )
-        meus_chamados_count = meus_chamados_queryset.count()
-        meus_chamados_pendentes = meus_chamados_queryset.filter(
-            status__in=['aberto', 'em_atendimento']
-        ).count()
-    else:
-        meus_chamados_count = Chamado.objects.filter(
-            solicitante=request.user
-        ).count()
-        meus_chamados_pendentes = Chamado.objects.filter(
-            solicitante=request.user,
-            status__in=['aberto', 'em_atendimento']
-        ).count()
-
-    return Response({
-        'total_chamados': total_chamados,
-        'chamados_abertos': chamados_abertos,
-        'chamados_em_atendimento': chamados_em_atendimento,
-        'chamados_encerrados': chamados_encerrados,
-        'chamados_urgentes': chamados_urgentes,
-        'meus_chamados': meus_chamados_count,
-        'meus_chamados_pendentes': meus_chamados_pendentes,
-    })
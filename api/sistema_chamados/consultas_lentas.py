@@ -0,0 +1,232 @@
+"""Registro de consultas lentas com o plano de execução
+
+`registrar` é instalado pelo `MetricasMiddleware` com
+`connection.execute_wrapper` em cada requisição quando
+`CONSULTAS_LENTAS_MS` é maior que zero. Toda instrução mais demorada que o
+limite vira uma linha JSON em `CONSULTAS_LENTAS_ARQUIVO` (rotacionado a
+cada TAMANHO_ARQUIVO bytes, com BACKUPS cópias) com a rota de origem, o SQL
+normalizado (literais e listas de IN trocados por marcadores) e os tipos
+dos parâmetros; os valores não são gravados.
+
+Na primeira ocorrência de cada SQL normalizado no processo, o registro leva
+também o `EXPLAIN` da instrução. No PostgreSQL, SELECTs sem efeitos
+colaterais (sem FOR UPDATE, pg_notify, nextval...) usam `EXPLAIN ANALYZE`,
+que executa a consulta de novo; `CONSULTAS_LENTAS_ANALYZE=False` desliga.
+
+`manage.py consultas_lentas` ordena as consultas registradas pelo tempo total.
+A rotação do arquivo não é coordenada entre processos: com vários workers,
+aponte cada um para um arquivo ou aceite perder linhas na virada.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from logging.handlers import RotatingFileHandler
+
+from django.conf import settings
+from django.utils import timezone
+
+from . import metricas
+
+TAMANHO_ARQUIVO = 10 * 1024 * 1024
+BACKUPS = 5
+
+# Assinaturas já explicadas neste processo; acima do máximo recomeça
+MAXIMO_EXPLICADAS = 10000
+
+_LITERAIS = re.compile(r"'(?:[^']|'')*'")
+_NUMEROS = re.compile(r'(?<![\w."])-?\d+(?:\.\d+)?\b')
+_LISTAS = re.compile(r'\(\s*%s(?:\s*,\s*%s)+\s*\)')
+_ESPACOS = re.compile(r'\s+')
+
+_EXPLICAVEIS = re.compile(r'^\s*(SELECT|INSERT|UPDATE|DELETE|WITH)\b', re.I)
+# SELECTs que EXPLAIN ANALYZE poderia repetir com efeito
+_INSEGURAS = re.compile(
+    r'\bFOR\s+(UPDATE|SHARE|NO\s+KEY|KEY)\b|\b(pg_notify|nextval|setval|'
+    r'pg_advisory\w*|pg_sleep|dblink\w*)\s*\(', re.I)
+
+logger = logging.getLogger(__name__)
+
+# Só escreve no arquivo de consultas lentas
+arquivo = logging.getLogger(f'{__name__}.arquivo')
+arquivo.propagate = False
+
+_explicadas = set()
+_trava = threading.Lock()
+
+
+def normalizar(sql):
+    """SQL sem valores: literais viram %s e listas de IN viram (...)"""
+    sql = _LITERAIS.sub('%s', sql)
+    sql = _NUMEROS.sub('%s', sql)
+    sql = _LISTAS.sub('(...)', sql)
+    return _ESPACOS.sub(' ', sql).strip()
+
+
+def assinatura(sql_normalizado):
+    return hashlib.blake2b(sql_normalizado.encode(), digest_size=6).hexdigest()
+
+
+def _tipos(params):
+    if isinstance(params, dict):
+        params = params.values()
+    grupos = []
+    for param in params or ():
+        tipo = type(param).__name__
+        if grupos and grupos[-1][0] == tipo:
+            grupos[-1][1] += 1
+        else:
+            grupos.append([tipo, 1])
+    return ', '.join(
+        tipo if total == 1 else f'{tipo}×{total}' for tipo, total in grupos)
+
+
+def forma_parametros(params, many=False):
+    """'int, str×3' ou, em executemany, '120×(int, str)'"""
+    if not many:
+        return _tipos(params)
+    lotes = list(params)
+    return f'{len(lotes)}×({_tipos(lotes[0]) if lotes else ""})'
+
+
+def _handler():
+    """Handler do arquivo configurado, trocado se a configuração mudar"""
+    caminho = os.path.abspath(settings.CONSULTAS_LENTAS_ARQUIVO)
+    for handler in arquivo.handlers:
+        if getattr(handler, 'baseFilename', None) == caminho:
+            return
+    for handler in list(arquivo.handlers):
+        arquivo.removeHandler(handler)
+        handler.close()
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    handler = RotatingFileHandler(
+        caminho, maxBytes=TAMANHO_ARQUIVO, backupCount=BACKUPS, encoding='utf-8')
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    arquivo.addHandler(handler)
+    arquivo.setLevel(logging.INFO)
+
+
+def _primeira_vez(chave):
+    with _trava:
+        if chave in _explicadas:
+            return False
+        if len(_explicadas) >= MAXIMO_EXPLICADAS:
+            _explicadas.clear()
+        _explicadas.add(chave)
+        return True
+
+
+def explicar(connection, sql, params):
+    """Linhas do plano de execução, ou None se a instrução não é explicável"""
+    if not _EXPLICAVEIS.match(sql):
+        return None
+    analisar = (
+        connection.vendor == 'postgresql'
+        and settings.CONSULTAS_LENTAS_ANALYZE
+        and sql.lstrip()[:6].upper() == 'SELECT'
+        and not _INSEGURAS.search(sql)
+    )
+    prefixo = connection.ops.explain_query_prefix(
+        **({'analyze': True} if analisar else {}))
+
+    # Cursor do driver: não passa pelos execute_wrappers (nem é contado)
+    cursor = connection.create_cursor()
+    # Um erro no EXPLAIN não pode abortar a transação da requisição
+    protegido = connection.in_atomic_block and connection.features.uses_savepoints
+    try:
+        if protegido:
+            cursor.execute('SAVEPOINT consultas_lentas')
+        try:
+            cursor.execute(f'{prefixo} {sql}', params)
+            return [str(linha[-1]) for linha in cursor.fetchall()]
+        except Exception as exc:
+            if protegido:
+                cursor.execute('ROLLBACK TO SAVEPOINT consultas_lentas')
+            return [f'EXPLAIN falhou: {exc}']
+        finally:
+            if protegido:
+                cursor.execute('RELEASE SAVEPOINT consultas_lentas')
+    finally:
+        cursor.close()
+
+
+def registrar(execute, sql, params, many, context):
+    """execute_wrapper: grava as instruções acima de CONSULTAS_LENTAS_MS"""
+    inicio = time.perf_counter()
+    sucesso = False
+    try:
+        resultado = execute(sql, params, many, context)
+        sucesso = True
+        return resultado
+    finally:
+        ms = (time.perf_counter() - inicio) * 1000
+        if ms >= settings.CONSULTAS_LENTAS_MS:
+            _gravar(context['connection'], sql, params, many, ms, sucesso)
+
+
+def _gravar(connection, sql, params, many, ms, sucesso=True):
+    normalizado = normalizar(sql)
+    chave = assinatura(normalizado)
+    registro = {
+        'em': timezone.now().isoformat(),
+        'ms': round(ms, 3),
+        'rota': metricas.rota_atual(),
+        'banco': connection.alias,
+        'assinatura': chave,
+        'sql': normalizado,
+        'parametros': forma_parametros(params, many),
+    }
+    if not sucesso:
+        registro['erro'] = True
+    try:
+        # Depois de um erro a transação pode estar abortada: sem EXPLAIN
+        if sucesso and not many and _primeira_vez(chave):
+            registro['plano'] = explicar(connection, sql, params)
+        _handler()
+        arquivo.info(json.dumps(registro, ensure_ascii=False))
+    except Exception:
+        # O registro nunca derruba a requisição
+        logger.exception('Falha ao registrar consulta lenta %s', chave)
+
+
+def ler_registros(caminho=None):
+    """Registros do arquivo e de seus backups, do mais antigo ao mais novo"""
+    caminho = caminho or settings.CONSULTAS_LENTAS_ARQUIVO
+    nomes = [f'{caminho}.{n}' for n in range(BACKUPS, 0, -1)] + [caminho]
+    for nome in nomes:
+        if not os.path.exists(nome):
+            continue
+        with open(nome, encoding='utf-8') as conteudo:
+            for linha in conteudo:
+                try:
+                    yield json.loads(linha)
+                except ValueError:
+                    # Linha cortada por uma rotação concorrente
+                    continue
+
+
+def ranking(registros):
+    """Consultas agrupadas por assinatura, da maior soma de tempo à menor"""
+    grupos = {}
+    for registro in registros:
+        grupo = grupos.setdefault(registro['assinatura'], {
+            'assinatura': registro['assinatura'],
+            'sql': registro['sql'],
+            'parametros': registro['parametros'],
+            'execucoes': 0,
+            'total_ms': 0.0,
+            'max_ms': 0.0,
+            'rotas': {},
+            'plano': None,
+        })
+        grupo['execucoes'] += 1
+        grupo['total_ms'] += registro['ms']
+        grupo['max_ms'] = max(grupo['max_ms'], registro['ms'])
+        rota = registro.get('rota') or '-'
+        grupo['rotas'][rota] = grupo['rotas'].get(rota, 0) + 1
+        if registro.get('plano'):
+            grupo['plano'] = registro['plano']
+    return sorted(grupos.values(), key=lambda grupo: -grupo['total_ms'])
@@ -0,0 +1,279 @@
+"""Métricas por requisição: cabeçalho Server-Timing e histogramas por rota
+
+`MetricasMiddleware` (sistema_chamados.middleware) mede cada requisição:
+quantidade e tempo das consultas SQL, tempo de serialização, latência
+total e tamanho da resposta. Os valores saem no cabeçalho `Server-Timing`
+e entram nos histogramas da rota (nome da URL, ex.:
+`chamados:chamado-list-create`) e do método.
+
+A serialização é a renderização da resposta mais os blocos marcados com
+`cronometro_serializacao()`: o `.data` das listagens e do detalhe de
+chamados e da `ChamadoListProjecao`. Nas demais rotas só a renderização
+é medida.
+
+`GET /api/metrics/` devolve os histogramas no formato texto do Prometheus,
+com p50/p95/p99 calculados sobre as últimas AMOSTRAS requisições de cada
+rota, além dos contadores do cache de autenticação e dos limites. Exige
+`Authorization: Bearer <METRICAS_TOKEN>`; sem token configurado, só
+responde com DEBUG ligado.
+
+Os valores são do processo que atende a requisição. Respostas em stream
+são medidas até o envio dos cabeçalhos: o corpo é gerado depois.
+"""
+import bisect
+import contextvars
+import hmac
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseForbidden
+
+# Limites superiores dos buckets de cada histograma (+Inf implícito)
+BUCKETS = {
+    'duracao_segundos': (
+        0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+    'sql_segundos': (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5),
+    'sql_consultas': (0, 1, 2, 3, 5, 10, 20, 50, 100),
+    'serializacao_segundos': (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1),
+    'resposta_bytes': (
+        256, 1024, 10 * 1024, 100 * 1024, 1024 ** 2, 10 * 1024 ** 2),
+}
+
+DESCRICOES = {
+    'duracao_segundos': 'Latência total da requisição',
+    'sql_segundos': 'Tempo nas consultas SQL da requisição',
+    'sql_consultas': 'Consultas SQL por requisição',
+    'serializacao_segundos': 'Tempo de serialização e renderização da resposta',
+    'resposta_bytes': 'Tamanho do corpo da resposta (sem streams)',
+}
+
+# Amostras recentes por série usadas nos quantis
+AMOSTRAS = 1024
+QUANTIS = (0.5, 0.95, 0.99)
+
+ROTA_DESCONHECIDA = 'nao_resolvida'
+
+_medicao = contextvars.ContextVar('medicao', default=None)
+
+
+class Medicao:
+    """Valores acumulados durante uma requisição"""
+
+    def __init__(self, requisicao=None):
+        self.requisicao = requisicao
+        self.inicio = time.perf_counter()
+        self.consultas = 0
+        self.sql = 0.0
+        self.serializacao = 0.0
+        self._cronometros = 0
+
+    def executar(self, execute, sql, params, many, context):
+        """execute_wrapper das conexões durante a requisição"""
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql += time.perf_counter() - inicio
+            self.consultas += 1
+
+
+def medicao_atual():
+    return _medicao.get()
+
+
+def rota(requisicao):
+    """Nome da URL resolvida (ex.: chamados:chamado-list-create)"""
+    match = requisicao.resolver_match
+    return match.view_name if match else ROTA_DESCONHECIDA
+
+
+def rota_atual():
+    """Rota da requisição em andamento, ou None fora de requisições"""
+    medicao = _medicao.get()
+    if medicao is None or medicao.requisicao is None:
+        return None
+    return rota(medicao.requisicao)
+
+
+@contextmanager
+def medir(medicao):
+    token = _medicao.set(medicao)
+    try:
+        yield medicao
+    finally:
+        _medicao.reset(token)
+
+
+@contextmanager
+def cronometro_serializacao():
+    """Soma o tempo do bloco à serialização da requisição atual
+
+    Blocos aninhados (a projeção dentro da listagem) contam uma vez só.
+    """
+    medicao = _medicao.get()
+    if medicao is None or medicao._cronometros:
+        yield
+        return
+    medicao._cronometros += 1
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        medicao._cronometros -= 1
+        medicao.serializacao += time.perf_counter() - inicio
+
+
+class Histograma:
+    """Buckets cumulativos à moda do Prometheus e amostras recentes"""
+
+    def __init__(self, limites):
+        self.limites = limites
+        self.contagens = [0] * (len(limites) + 1)
+        self.soma = 0.0
+        self.amostras = deque(maxlen=AMOSTRAS)
+
+    def observar(self, valor):
+        self.contagens[bisect.bisect_left(self.limites, valor)] += 1
+        self.soma += valor
+        self.amostras.append(valor)
+
+    @property
+    def total(self):
+        return sum(self.contagens)
+
+    def quantil(self, q):
+        """Quantil (vizinho mais próximo) das amostras recentes"""
+        ordenadas = sorted(self.amostras)
+        if not ordenadas:
+            return None
+        return ordenadas[max(0, math.ceil(q * len(ordenadas)) - 1)]
+
+
+class Registro:
+    """Histogramas por (rota, método), seguros entre threads"""
+
+    def __init__(self):
+        self._series = {}
+        self._trava = threading.Lock()
+
+    def observar(self, rota, metodo, valores):
+        with self._trava:
+            serie = self._series.get((rota, metodo))
+            if serie is None:
+                serie = self._series[rota, metodo] = {
+                    nome: Histograma(limites)
+                    for nome, limites in BUCKETS.items()
+                }
+            for nome, valor in valores.items():
+                if valor is not None:
+                    serie[nome].observar(valor)
+
+    def limpar(self):
+        with self._trava:
+            self._series.clear()
+
+    def series(self):
+        """Cópia consistente: {(rota, método): {nome: (contagens, soma, quantis)}}"""
+        with self._trava:
+            return {
+                chave: {
+                    nome: (
+                        list(histograma.contagens), histograma.soma,
+                        {q: histograma.quantil(q) for q in QUANTIS},
+                    )
+                    for nome, histograma in serie.items()
+                }
+                for chave, serie in self._series.items()
+            }
+
+
+REGISTRO = Registro()
+
+
+def server_timing(medicao, total, tamanho):
+    partes = [
+        f'sql;dur={medicao.sql * 1000:.1f};desc="{medicao.consultas} consultas"',
+        f'serializacao;dur={medicao.serializacao * 1000:.1f}',
+        f'total;dur={total * 1000:.1f}',
+    ]
+    if tamanho is not None:
+        partes.append(f'resposta;desc="{tamanho} bytes"')
+    return ', '.join(partes)
+
+
+def _rotulos(**rotulos):
+    conteudo = ','.join(
+        '{}="{}"'.format(
+            nome,
+            str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for nome, valor in rotulos.items()
+    )
+    return '{' + conteudo + '}'
+
+
+def _numero(valor):
+    if valor == math.inf:
+        return '+Inf'
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+def texto_prometheus():
+    """Métricas do processo no formato de exposição texto 0.0.4"""
+    from usuarios import autenticacao, limites
+
+    linhas = []
+    series = REGISTRO.series()
+    for nome, limites_bucket in BUCKETS.items():
+        metrica = f'chamados_http_{nome}'
+        linhas.append(f'# HELP {metrica} {DESCRICOES[nome]}')
+        linhas.append(f'# TYPE {metrica} histogram')
+        for (rota, metodo), serie in sorted(series.items()):
+            contagens, soma, _ = serie[nome]
+            acumulado = 0
+            for limite, contagem in zip((*limites_bucket, math.inf), contagens):
+                acumulado += contagem
+                linhas.append(f'{metrica}_bucket{_rotulos(rota=rota, metodo=metodo, le=_numero(limite))} {acumulado}')
+            linhas.append(f'{metrica}_sum{_rotulos(rota=rota, metodo=metodo)} {_numero(soma)}')
+            linhas.append(f'{metrica}_count{_rotulos(rota=rota, metodo=metodo)} {acumulado}')
+
+        quantis = f'{metrica}_quantil'
+        linhas.append(
+            f'# HELP {quantis} {DESCRICOES[nome]}: quantis das últimas {AMOSTRAS} requisições')
+        linhas.append(f'# TYPE {quantis} gauge')
+        for (rota, metodo), serie in sorted(series.items()):
+            for q, valor in serie[nome][2].items():
+                if valor is not None:
+                    linhas.append(f'{quantis}{_rotulos(rota=rota, metodo=metodo, quantile=q)} {_numero(valor)}')
+
+    cache = autenticacao.USUARIOS.metricas()
+    linhas.append('# HELP chamados_autenticacao_cache_total Consultas ao cache de autenticação')
+    linhas.append('# TYPE chamados_autenticacao_cache_total counter')
+    for resultado in ('acertos', 'faltas', 'expiradas', 'invalidadas', 'descartadas'):
+        linhas.append(f'chamados_autenticacao_cache_total{_rotulos(resultado=resultado)} {cache[resultado]}')
+    linhas.append('# HELP chamados_autenticacao_cache_entradas Usuários no cache de autenticação')
+    linhas.append('# TYPE chamados_autenticacao_cache_entradas gauge')
+    linhas.append(f'chamados_autenticacao_cache_entradas {cache["entradas"]}')
+
+    linhas.append('# HELP chamados_limites_total Requisições avaliadas pelos limites por balde')
+    linhas.append('# TYPE chamados_limites_total counter')
+    for escopo, totais in sorted(limites.metricas()['escopos'].items()):
+        for resultado, total in sorted(totais.items()):
+            linhas.append(f'chamados_limites_total{_rotulos(escopo=escopo, resultado=resultado)} {total}')
+    return '\n'.join(linhas) + '\n'
+
+
+def metricas(request):
+    """GET /api/metrics/ no formato texto do Prometheus"""
+    token = settings.METRICAS_TOKEN
+    if not token:
+        if not settings.DEBUG:
+            raise Http404
+    elif not hmac.compare_digest(
+            request.META.get('HTTP_AUTHORIZATION', ''), f'Bearer {token}'):
+        return HttpResponseForbidden()
+    return HttpResponse(
+        texto_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -1,7 +1,13 @@
 import re
+import time
+from contextlib import ExitStack
+
 from django.conf import settings
+from django.db import connections
 from django.utils.deprecation import MiddlewareMixin
 
+from . import consultas_lentas, metricas
+
 
 class DisableCSRFMiddleware(MiddlewareMixin):
     """
@@ -19,3 +25,54 @@ class DisableCSRFMiddleware(MiddlewareMixin):
                     break
         
         return None
+
+
+class MetricasMiddleware:
+    """
+    Mede SQL, serialização, latência e tamanho de cada requisição
+    (ver sistema_chamados.metricas) e registra as consultas lentas
+    (sistema_chamados.consultas_lentas); deve ser o primeiro da lista
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        medicao = metricas.Medicao(request)
+        lentas = settings.CONSULTAS_LENTAS_MS > 0
+        with metricas.medir(medicao), ExitStack() as pilha:
+            for conexao in connections.all():
+                pilha.enter_context(conexao.execute_wrapper(medicao.executar))
+                if lentas:
+                    pilha.enter_context(
+                        conexao.execute_wrapper(consultas_lentas.registrar))
+            response = self.get_response(request)
+        total = time.perf_counter() - medicao.inicio
+
+        tamanho = None if response.streaming else len(response.content)
+        response['Server-Timing'] = metricas.server_timing(medicao, total, tamanho)
+
+        metricas.REGISTRO.observar(
+            metricas.rota(request),
+            request.method,
+            {
+                'duracao_segundos': total,
+                'sql_segundos': medicao.sql,
+                'sql_consultas': medicao.consultas,
+                'serializacao_segundos': medicao.serializacao,
+                'resposta_bytes': tamanho,
+            },
+        )
+        return response
+
+    def process_template_response(self, request, response):
+        # Respostas do DRF são renderizadas logo depois deste gancho
+        medicao = metricas.medicao_atual()
+        if medicao is not None:
+            inicio = time.perf_counter()
+
+            def renderizada(response):
+                medicao.serializacao += time.perf_counter() - inicio
+
+            response.add_post_render_callback(renderizada)
+        return response
@@ -53,6 +53,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'sistema_chamados.middleware.MetricasMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -99,10 +100,27 @@ else:
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
             'NAME': BASE_DIR / 'db.sqlite3',
+            # Banco de testes em arquivo: o banco em memória compartilhado
+            # não aceita escritas concorrentes de várias conexões
+            'TEST': {
+                'NAME': BASE_DIR / 'test_db.sqlite3',
+            },
         }
     }
 
 
+# Cache - com vários workers use um backend compartilhado (ex.: Redis), pois
+# ele coordena a invalidação do cache de referência (chamados.referencia)
+CACHES = {
+    'default': {
+        'BACKEND': config(
+            'CACHE_BACKEND',
+            default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default=''),
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -152,12 +170,31 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Django REST Framework
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'usuarios.autenticacao.JWTCacheAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    # orjson quando instalado; sem ele, o mesmo comportamento do DRF
+    'DEFAULT_RENDERER_CLASSES': [
+        'chamados.renderers.JSONRapidoRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'chamados.parsers.JSONRapidoParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+    # Escritas limitadas por usuário (usuarios.limites); login e troca de
+    # senha têm throttles próprios
+    'DEFAULT_THROTTLE_CLASSES': [
+        'usuarios.limites.EscritaThrottle',
+    ],
+    # Proxies confiáveis na frente da API. Com 0 o IP dos limites é o
+    # REMOTE_ADDR; com N, o N-ésimo endereço do fim do X-Forwarded-For.
+    # Sem valor o DRF confiaria no X-Forwarded-For enviado pelo cliente
+    'NUM_PROXIES': config('NUM_PROXIES', default=0, cast=int),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
     'DEFAULT_FILTER_BACKENDS': [
@@ -213,6 +250,62 @@ CSRF_EXEMPT_URLS = [
 # Custom user model
 AUTH_USER_MODEL = 'usuarios.Usuario'
 
+# Números de chamado reservados por processo a cada ida ao banco
+# (1 = numeração estritamente sequencial; ver chamados.numeracao)
+CHAMADOS_NUMERO_BLOCO = config('CHAMADOS_NUMERO_BLOCO', default=1, cast=int)
+
+# Entradas de histórico embutidas no detalhe do chamado (as mais recentes);
+# o restante fica em /api/chamados/<id>/historico/
+CHAMADOS_HISTORICO_DETALHE = config(
+    'CHAMADOS_HISTORICO_DETALHE', default=20, cast=int)
+
+# Dias de retenção do registro de exclusões lido por /api/chamados/alteracoes/;
+# marcas de sincronização mais antigas exigem recarga completa
+CHAMADOS_EXCLUSOES_DIAS = config('CHAMADOS_EXCLUSOES_DIAS', default=90, cast=int)
+
+# Eventos em tempo real (/api/chamados/eventos/, exige ASGI). O broker em
+# memória só atende o próprio processo; com vários workers use
+# chamados.eventos.BrokerPostgres
+CHAMADOS_EVENTOS_BROKER = config(
+    'CHAMADOS_EVENTOS_BROKER', default='chamados.eventos.BrokerMemoria')
+# Segundos até o servidor encerrar cada conexão (o cliente reconecta)
+CHAMADOS_EVENTOS_DURACAO = config(
+    'CHAMADOS_EVENTOS_DURACAO', default=300, cast=int)
+
+# Cache por processo dos usuários autenticados por JWT (usuarios.autenticacao);
+# 0 segundos desliga
+AUTENTICACAO_CACHE_TAMANHO = config(
+    'AUTENTICACAO_CACHE_TAMANHO', default=1000, cast=int)
+AUTENTICACAO_CACHE_SEGUNDOS = config(
+    'AUTENTICACAO_CACHE_SEGUNDOS', default=60, cast=int)
+
+# Baldes de tokens por escopo (usuarios.limites): 'quantidade/período'
+# (s, min, h, d). Escopo sem taxa não é limitado
+LIMITES_TAXAS = {
+    'login': config('LIMITE_LOGIN', default='30/min'),                  # por IP
+    'login_usuario': config('LIMITE_LOGIN_USUARIO', default='5/min'),   # por username
+    'senha': config('LIMITE_SENHA', default='5/min'),                   # por usuário
+    'escrita': config('LIMITE_ESCRITA', default='120/min'),             # por usuário
+    'anexos': config('LIMITE_ANEXOS', default='30/min'),                # por usuário
+}
+# Arquivo compartilhado pelos workers da máquina (padrão em /dev/shm) e
+# número de baldes que ele comporta
+LIMITES_ARQUIVO = config('LIMITES_ARQUIVO', default='')
+LIMITES_POSICOES = config('LIMITES_POSICOES', default=8192, cast=int)
+
+# Token exigido (Authorization: Bearer) em /api/metrics/ (sistema_chamados.metricas);
+# sem token o endpoint só responde com DEBUG
+METRICAS_TOKEN = config('METRICAS_TOKEN', default='')
+
+# Instruções SQL acima deste tempo (ms) vão para o registro de consultas
+# lentas (sistema_chamados.consultas_lentas); 0 desliga
+CONSULTAS_LENTAS_MS = config('CONSULTAS_LENTAS_MS', default=200, cast=float)
+CONSULTAS_LENTAS_ARQUIVO = config(
+    'CONSULTAS_LENTAS_ARQUIVO',
+    default=os.path.join(BASE_DIR, 'logs', 'consultas_lentas.log'))
+# EXPLAIN ANALYZE (PostgreSQL) nos SELECTs sem efeitos colaterais
+CONSULTAS_LENTAS_ANALYZE = config('CONSULTAS_LENTAS_ANALYZE', default=True, cast=bool)
+
 # JWT Configuration - Stateless (sem blacklist)
 from datetime import timedelta
 
@@ -4,12 +4,15 @@ from django.conf import settings
 from django.conf.urls.static import static
 from drf_spectacular.views import SpectacularAPIView, SpectacularRedocView, SpectacularSwaggerView
 
+from .metricas import metricas
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     
     # API URLs
     path('api/usuarios/', include('usuarios.urls')),
     path('api/chamados/', include('chamados.urls')),
+    path('api/metrics/', metricas, name='metricas'),
     
     # API Documentation
     path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
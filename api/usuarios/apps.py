@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class UsuariosConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'usuarios'
+
+    def ready(self):
+        # Conecta os sinais que invalidam o cache de autenticação
+        from . import autenticacao  # noqa: F401
+        # Registra o esquema jwtAuth do OpenAPI (drf-spectacular)
+        from . import schema  # noqa: F401
@@ -0,0 +1,159 @@
+"""Autenticação JWT com cache dos usuários autenticados
+
+O `JWTAuthentication` do simplejwt busca o usuário no banco a cada
+requisição. `JWTCacheAuthentication` guarda os usuários num LRU por
+processo, limitado em tamanho (`AUTENTICACAO_CACHE_TAMANHO`) e em validade
+(`AUTENTICACAO_CACHE_SEGUNDOS`; 0 desliga o cache).
+
+Cada usuário tem uma versão no cache do Django (`CACHES`), trocada depois
+do commit de qualquer save/delete do usuário (inclusive desativação e troca
+de senha). A entrada local só vale enquanto a versão for a mesma com que foi
+guardada, então a revogação alcança todos os processos na requisição
+seguinte quando o cache do Django é compartilhado. Escritas sem sinais
+(`QuerySet.update()`) só são vistas ao fim da validade: chame `invalidar()`.
+
+Usuários com `ativo` desligado não são autenticados, como no login.
+"""
+import copy
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+# As versões só precisam sobreviver às entradas locais; se uma versão se
+# perder, a entrada correspondente é recarregada
+VALIDADE_VERSAO = 24 * 60 * 60
+
+
+def _chave_versao(pk):
+    return f'usuarios:autenticacao:{pk}'
+
+
+class CacheUsuarios:
+    """LRU com validade de pk -> usuário, seguro entre threads"""
+
+    def __init__(self):
+        self._entradas = OrderedDict()  # pk -> (expira_em, versão, usuário)
+        self._trava = threading.Lock()
+        self.contagem = Counter()
+
+    @property
+    def tamanho(self):
+        return settings.AUTENTICACAO_CACHE_TAMANHO
+
+    @property
+    def segundos(self):
+        return settings.AUTENTICACAO_CACHE_SEGUNDOS
+
+    def obter(self, pk):
+        """(usuário ou None, versão atual) — a versão vai para `guardar()`"""
+        if self.segundos <= 0:
+            return None, None
+        # Lida antes de carregar: o usuário guardado é no mínimo tão novo
+        # quanto a versão associada a ele
+        versao = cache.get(_chave_versao(pk))
+        with self._trava:
+            entrada = self._entradas.get(pk)
+            if entrada is None:
+                self.contagem['faltas'] += 1
+                return None, versao
+            expira_em, versao_entrada, usuario = entrada
+            if expira_em <= time.monotonic() or versao_entrada != versao:
+                del self._entradas[pk]
+                self.contagem['expiradas'] += 1
+                self.contagem['faltas'] += 1
+                return None, versao
+            self._entradas.move_to_end(pk)
+            self.contagem['acertos'] += 1
+            return usuario, versao
+
+    def guardar(self, pk, usuario, versao):
+        if self.segundos <= 0:
+            return
+        with self._trava:
+            self._entradas[pk] = (
+                time.monotonic() + self.segundos, versao, usuario)
+            self._entradas.move_to_end(pk)
+            while len(self._entradas) > self.tamanho:
+                self._entradas.popitem(last=False)
+                self.contagem['descartadas'] += 1
+
+    def remover(self, pk):
+        with self._trava:
+            if self._entradas.pop(pk, None) is not None:
+                self.contagem['invalidadas'] += 1
+
+    def limpar(self):
+        with self._trava:
+            self._entradas.clear()
+            self.contagem.clear()
+
+    def metricas(self):
+        """Contadores deste processo desde o início (ou o último `limpar()`)"""
+        with self._trava:
+            contagem = dict(self.contagem)
+            entradas = len(self._entradas)
+        consultas = contagem.get('acertos', 0) + contagem.get('faltas', 0)
+        return {
+            'acertos': contagem.get('acertos', 0),
+            'faltas': contagem.get('faltas', 0),
+            'expiradas': contagem.get('expiradas', 0),
+            'invalidadas': contagem.get('invalidadas', 0),
+            'descartadas': contagem.get('descartadas', 0),
+            'entradas': entradas,
+            'taxa_acerto': (
+                round(contagem.get('acertos', 0) / consultas, 4)
+                if consultas else None),
+        }
+
+
+USUARIOS = CacheUsuarios()
+
+
+def invalidar(pk):
+    """Faz todos os processos recarregarem o usuário na próxima requisição"""
+    cache.set(_chave_versao(pk), time.time_ns(), timeout=VALIDADE_VERSAO)
+    USUARIOS.remover(pk)
+
+
+@receiver([post_save, post_delete], sender=settings.AUTH_USER_MODEL)
+def _invalidar_ao_salvar(sender, instance, update_fields=None, **kwargs):
+    # O login só atualiza last_login, que a autenticação não usa
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    pk = instance.pk
+    transaction.on_commit(lambda: invalidar(pk))
+
+
+class JWTCacheAuthentication(JWTAuthentication):
+    """JWTAuthentication que resolve o usuário pelo cache antes do banco"""
+
+    def get_user(self, validated_token):
+        pk = validated_token.get(api_settings.USER_ID_CLAIM)
+        if pk is None:
+            return super().get_user(validated_token)
+
+        usuario, versao = USUARIOS.obter(pk)
+        if usuario is None:
+            usuario = super().get_user(validated_token)
+            USUARIOS.guardar(pk, usuario, versao)
+        elif api_settings.CHECK_REVOKE_TOKEN and (
+                validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) !=
+                get_md5_hash_password(usuario.password)):
+            # Depende do token; o restante já foi verificado ao guardar
+            raise AuthenticationFailed(
+                'A senha do usuário foi alterada.', code='password_changed')
+
+        if not usuario.ativo:
+            raise AuthenticationFailed('Usuário inativo', code='user_inactive')
+        # Cópia: a instância guardada é compartilhada entre requisições
+        return copy.copy(usuario)
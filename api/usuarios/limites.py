@@ -0,0 +1,215 @@
+"""Limites de requisições por balde de tokens, compartilhados entre processos
+
+Login e troca de senha passam pelo PBKDF2 (a troca de senha duas vezes);
+uma rajada de tentativas ocupa todos os núcleos. Os throttles deste módulo
+recusam com 429 e `Retry-After` antes de qualquer hash.
+
+O IP é o `REMOTE_ADDR`, ou o endereço que o último proxy confiável
+acrescentou ao `X-Forwarded-For` quando `NUM_PROXIES` (REST_FRAMEWORK) é
+maior que zero; o que o cliente escreve no cabeçalho não conta.
+
+Cada chave (escopo + IP, usuário ou nome de login) tem um balde com a
+capacidade e o reabastecimento de `LIMITES_TAXAS[escopo]` (`'5/min'`:
+5 tokens, 5 por minuto). Os baldes ficam numa tabela de tamanho fixo num
+arquivo mapeado em memória (`LIMITES_ARQUIVO`, em /dev/shm quando existe),
+compartilhada por todos os workers da máquina sem serviço externo; cada
+conjunto de VIAS posições é protegido por um lock de região (fcntl).
+Quando o conjunto enche, o balde atualizado há mais tempo é reaproveitado.
+Com várias máquinas cada uma limita sozinha.
+
+Sem fcntl (Windows) os baldes continuam no arquivo, mas o lock só vale
+dentro do processo.
+"""
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from django.conf import settings
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import BaseThrottle
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - depende da plataforma
+    fcntl = None
+
+# Posição: hash da chave, tokens, instante da última atualização
+POSICAO = struct.Struct('<Qdd')
+VIAS = 4
+
+PERIODOS = {'s': 1, 'min': 60, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def interpretar_taxa(taxa):
+    """'5/min' -> (capacidade 5, 5/60 tokens por segundo)"""
+    quantidade, periodo = taxa.split('/')
+    quantidade = int(quantidade)
+    segundos = PERIODOS.get(periodo) or PERIODOS[periodo[0]]
+    return quantidade, quantidade / segundos
+
+
+def _hash(chave):
+    valor = int.from_bytes(
+        hashlib.blake2b(chave.encode(), digest_size=8).digest(), 'little')
+    # 0 marca posição vazia
+    return valor or 1
+
+
+class Baldes:
+    """Tabela de baldes num arquivo mapeado em memória"""
+
+    def __init__(self, caminho, posicoes):
+        self.conjuntos = max(1, posicoes // VIAS)
+        tamanho = self.conjuntos * VIAS * POSICAO.size
+        self._fd = os.open(caminho, os.O_RDWR | os.O_CREAT, 0o600)
+        if os.fstat(self._fd).st_size < tamanho:
+            os.ftruncate(self._fd, tamanho)
+        self._mapa = mmap.mmap(self._fd, tamanho)
+        # O lock do fcntl não exclui threads do mesmo processo
+        self._trava = threading.Lock()
+
+    @contextmanager
+    def _travar(self, inicio, tamanho):
+        with self._trava:
+            if fcntl is None:
+                yield
+                return
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, tamanho, inicio)
+            try:
+                yield
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, tamanho, inicio)
+
+    def consumir(self, chave, capacidade, por_segundo, agora=None):
+        """Retira um token; retorna (permitido, segundos até o próximo)"""
+        agora = time.time() if agora is None else agora
+        codigo = _hash(chave)
+        tamanho = VIAS * POSICAO.size
+        inicio = (codigo % self.conjuntos) * tamanho
+        with self._travar(inicio, tamanho):
+            substituir = None
+            for via in range(VIAS):
+                posicao = inicio + via * POSICAO.size
+                codigo_via, tokens, atualizado = POSICAO.unpack_from(
+                    self._mapa, posicao)
+                if codigo_via == codigo:
+                    break
+                if substituir is None or atualizado < substituir[1]:
+                    substituir = (posicao, atualizado)
+            else:
+                # Chave nova: balde cheio na posição mais antiga (ou vazia)
+                posicao, tokens, atualizado = substituir[0], capacidade, agora
+
+            tokens = min(
+                capacidade, tokens + max(0.0, agora - atualizado) * por_segundo)
+            permitido = tokens >= 1
+            if permitido:
+                tokens -= 1
+            POSICAO.pack_into(self._mapa, posicao, codigo, tokens, agora)
+        return permitido, 0.0 if permitido else (1 - tokens) / por_segundo
+
+    def fechar(self):
+        self._mapa.close()
+        os.close(self._fd)
+
+
+def caminho_padrao():
+    pasta = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+    return os.path.join(pasta, 'sistema_chamados_limites')
+
+
+_abertos = {}
+_trava_abertos = threading.Lock()
+
+
+def baldes():
+    """Tabela do processo para `LIMITES_ARQUIVO`, aberta na primeira chamada"""
+    chave = (settings.LIMITES_ARQUIVO or caminho_padrao(), settings.LIMITES_POSICOES)
+    tabela = _abertos.get(chave)
+    if tabela is None:
+        with _trava_abertos:
+            tabela = _abertos.get(chave)
+            if tabela is None:
+                tabela = _abertos[chave] = Baldes(*chave)
+    return tabela
+
+
+# (escopo, 'permitidas' | 'negadas') -> total neste processo
+CONTADORES = Counter()
+
+
+def metricas():
+    """Requisições permitidas e negadas por escopo neste processo"""
+    escopos = {}
+    for (escopo, resultado), total in list(CONTADORES.items()):
+        escopos.setdefault(escopo, {'permitidas': 0, 'negadas': 0})
+        escopos[escopo][resultado] = total
+    return {
+        'taxas': dict(settings.LIMITES_TAXAS),
+        'escopos': escopos,
+    }
+
+
+class BaldeThrottle(BaseThrottle):
+    """Retira um token de cada balde de `baldes()`; recusa no primeiro vazio"""
+
+    def baldes(self, request, view):
+        """Pares (escopo, identificador) da requisição"""
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        self.espera = None
+        for escopo, identificador in self.baldes(request, view):
+            taxa = settings.LIMITES_TAXAS.get(escopo)
+            if not taxa:
+                continue
+            capacidade, por_segundo = interpretar_taxa(taxa)
+            permitido, espera = baldes().consumir(
+                f'{escopo}:{identificador}', capacidade, por_segundo)
+            CONTADORES[escopo, 'permitidas' if permitido else 'negadas'] += 1
+            if not permitido:
+                self.espera = espera
+                return False
+        return True
+
+    def wait(self):
+        return self.espera
+
+
+class LoginThrottle(BaldeThrottle):
+    """Tentativas de login por IP e por nome de usuário"""
+
+    def baldes(self, request, view):
+        pares = [('login', self.get_ident(request))]
+        username = request.data.get('username')
+        if isinstance(username, str) and username:
+            pares.append(('login_usuario', username.lower()))
+        return pares
+
+
+class SenhaThrottle(BaldeThrottle):
+    """Trocas de senha por usuário"""
+
+    def baldes(self, request, view):
+        return [('senha', request.user.pk)]
+
+
+class EscritaThrottle(BaldeThrottle):
+    """Escritas (POST, PUT, PATCH, DELETE) por usuário, ou por IP se anônimo
+
+    O escopo é o `throttle_scope` da view, ou `escrita`.
+    """
+
+    def baldes(self, request, view):
+        if request.method in SAFE_METHODS:
+            return []
+        escopo = getattr(view, 'throttle_scope', None) or 'escrita'
+        if request.user and request.user.is_authenticated:
+            return [(escopo, f'u{request.user.pk}')]
+        return [(escopo, self.get_ident(request))]
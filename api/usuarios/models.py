@@ -63,9 +63,14 @@ class Usuario(AbstractUser):
     @property
     def iniciais(self):
         """Retorna as iniciais do nome"""
-        nomes = self.nome_completo.split()
-        if len(nomes) >= 2:
-            return f"{nomes[0][0]}{nomes[-1][0]}".upper()
-        elif len(nomes) == 1:
-            return nomes[0][:2].upper()
-        return "US"
+        return iniciais_do_nome(self.nome_completo)
+
+
+def iniciais_do_nome(nome_completo):
+    """Iniciais exibidas para o nome completo (primeiro e último nome)"""
+    nomes = nome_completo.split()
+    if len(nomes) >= 2:
+        return f"{nomes[0][0]}{nomes[-1][0]}".upper()
+    elif len(nomes) == 1:
+        return nomes[0][:2].upper()
+    return "US"
@@ -0,0 +1,8 @@
+"""Extensões do drf-spectacular para a autenticação da API"""
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+
+
+class JWTCacheScheme(SimpleJWTScheme):
+    """`jwtAuth` (Bearer) no schema, como o JWTAuthentication do simplejwt"""
+
+    target_class = 'usuarios.autenticacao.JWTCacheAuthentication'
@@ -1,8 +1,10 @@
+from chamados.campos import CamposDinamicosMixin
 from rest_framework import serializers
+
 from .models import Usuario
 
 
-class UsuarioSerializer(serializers.ModelSerializer):
+class UsuarioSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializer para Usuario"""
     
     iniciais = serializers.ReadOnlyField()
@@ -15,6 +17,7 @@ class UsuarioSerializer(serializers.ModelSerializer):
             'criado_em', 'atualizado_em'
         ]
         read_only_fields = ['id', 'criado_em', 'atualizado_em']
+        colunas = {'iniciais': ['nome_completo']}
 
 
 class UsuarioCreateSerializer(serializers.ModelSerializer):
@@ -44,7 +47,7 @@ class UsuarioCreateSerializer(serializers.ModelSerializer):
         return usuario
 
 
-class UsuarioListSerializer(serializers.ModelSerializer):
+class UsuarioListSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializer simplificado para listagem de usuários"""
     
     iniciais = serializers.ReadOnlyField()
@@ -52,9 +55,10 @@ class UsuarioListSerializer(serializers.ModelSerializer):
     class Meta:
         model = Usuario
         fields = ['id', 'username', 'nome_completo', 'tipo_usuario', 'iniciais']
+        colunas = {'iniciais': ['nome_completo']}
 
 
-class TecnicoSerializer(serializers.ModelSerializer):
+class TecnicoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializer para técnicos"""
     
     iniciais = serializers.ReadOnlyField()
@@ -62,3 +66,4 @@ class TecnicoSerializer(serializers.ModelSerializer):
     class Meta:
         model = Usuario
         fields = ['id', 'nome_completo', 'iniciais', 'email', 'telefone']
+        colunas = {'iniciais': ['nome_completo']}
@@ -1,3 +1,414 @@
-from django.test import TestCase
+import time
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from chamados.tests import (ArquivosIsolados, OrcamentoConsultasMixin,
+                            Requisicao)
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from drf_spectacular.drainage import GENERATOR_STATS
+from drf_spectacular.generators import SchemaGenerator
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from . import autenticacao, limites
+from .models import Usuario
+
+_arquivos = ArquivosIsolados()
+
+
+def setUpModule():
+    _arquivos.enable()
+
+
+def tearDownModule():
+    _arquivos.disable()
+
+
+class OrcamentoConsultasUsuariosTests(OrcamentoConsultasMixin, TestCase):
+    """Orçamento de consultas das rotas de usuários"""
+
+    urlconf = 'usuarios.urls'
+
+    ORCAMENTOS = {
+        'login': [
+            Requisicao('POST', None, 1, dados=lambda t: {
+                'username': 'maria', 'password': 'senha123'}),
+        ],
+        'logout': [Requisicao('POST', None, 0)],
+        'metricas-autenticacao': [Requisicao('GET', 'admin', 0)],
+        'metricas-limites': [Requisicao('GET', 'admin', 0)],
+        'token-refresh': [
+            Requisicao('POST', None, 0, dados=lambda t: {
+                'refresh': str(RefreshToken.for_user(t.usuario))}),
+        ],
+        'usuario-list-create': [
+            Requisicao('GET', 'admin', 2),
+            Requisicao('POST', 'admin', 3, dados=lambda t: {
+                'username': 'novo', 'password': 'senha-nova-1',
+                'password_confirm': 'senha-nova-1',
+                'nome_completo': 'Novo Usuário',
+            }),
+        ],
+        'usuario-detail': [
+            Requisicao('GET', 'admin', 1,
+                       kwargs=lambda t: {'pk': t.usuario.pk}),
+        ],
+        'tecnico-list': [Requisicao('GET', 'usuario', 2)],
+        'usuario-perfil': [
+            Requisicao('GET', 'usuario', 0),
+            Requisicao('PATCH', 'usuario', 1,
+                       dados=lambda t: {'departamento': 'RH'}),
+        ],
+        'alterar-senha': [
+            Requisicao('POST', 'usuario', 2, dados=lambda t: {
+                'senha_atual': 'senha123', 'nova_senha': 'senha456',
+                'confirmar_senha': 'senha456',
+            }),
+        ],
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = Usuario.objects.create_user(
+            username='maria', password='senha123',
+            nome_completo='Maria Costa', tipo_usuario='usuario'
+        )
+        cls.admin = Usuario.objects.create_user(
+            username='admin', password='senha123',
+            nome_completo='Administrador', tipo_usuario='admin'
+        )
+        for i in range(3):
+            Usuario.objects.create_user(
+                username=f'tecnico{i}', password='senha123',
+                nome_completo=f'Técnico {i}', tipo_usuario='tecnico'
+            )
+
+
+class CamposEsparsosUsuariosTests(TestCase):
+    """?fields= nas rotas de usuários"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = Usuario.objects.create_user(
+            username='admin', password='senha123',
+            nome_completo='Administrador', tipo_usuario='admin'
+        )
+        Usuario.objects.create_user(
+            username='tecnico', password='senha123',
+            nome_completo='Carlos Silva', tipo_usuario='tecnico'
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_listas_e_detalhe(self):
+        urls = [
+            reverse('usuarios:usuario-list-create'),
+            reverse('usuarios:tecnico-list'),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as ctx:
+                    response = self.client.get(f'{url}?fields=id,iniciais')
+                self.assertEqual(
+                    set(response.data['results'][0]), {'id', 'iniciais'})
+                self.assertNotIn('"password"', ctx.captured_queries[-1]['sql'])
+
+        response = self.client.get(
+            reverse('usuarios:usuario-detail', args=[self.admin.pk]),
+            {'fields': 'username,tipo_usuario'}
+        )
+        self.assertEqual(
+            response.data, {'username': 'admin', 'tipo_usuario': 'admin'})
+
+        response = self.client.get(
+            reverse('usuarios:usuario-perfil'), {'fields': 'id'})
+        self.assertEqual(response.data, {'id': self.admin.pk})
+
+
+class CacheAutenticacaoTests(TestCase):
+    """Usuário do JWT resolvido pelo cache e invalidado a cada alteração"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = Usuario.objects.create_user(
+            username='maria', password='senha123',
+            nome_completo='Maria Costa', tipo_usuario='usuario'
+        )
+        cls.admin = Usuario.objects.create_user(
+            username='admin', password='senha123',
+            nome_completo='Administrador', tipo_usuario='admin'
+        )
+
+    def setUp(self):
+        cache.clear()
+        autenticacao.USUARIOS.limpar()
+        self.addCleanup(autenticacao.USUARIOS.limpar)
+
+    def perfil(self, usuario=None, consultas=None):
+        client = APIClient()
+        token = RefreshToken.for_user(usuario or self.usuario).access_token
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(reverse('usuarios:usuario-perfil'))
+        if consultas is not None:
+            self.assertEqual(len(ctx.captured_queries), consultas)
+        return response
+
+    def salvar(self, usuario, **campos):
+        with self.captureOnCommitCallbacks(execute=True):
+            for campo, valor in campos.items():
+                setattr(usuario, campo, valor)
+            usuario.save()
+
+    def test_usuario_vem_do_cache(self):
+        self.assertEqual(self.perfil(consultas=1).status_code, 200)
+        response = self.perfil(consultas=0)
+        self.assertEqual(response.data['username'], 'maria')
+        metricas = autenticacao.USUARIOS.metricas()
+        self.assertEqual((metricas['acertos'], metricas['faltas']), (1, 1))
+        self.assertEqual(metricas['taxa_acerto'], 0.5)
+
+    def test_alteracao_e_desativacao_invalidam(self):
+        self.perfil()
+        usuario = Usuario.objects.get(pk=self.usuario.pk)
+        self.salvar(usuario, departamento='RH')
+        self.assertEqual(self.perfil(consultas=1).data['departamento'], 'RH')
+
+        self.salvar(usuario, ativo=False)
+        self.assertEqual(self.perfil().status_code, 401)
+        self.assertEqual(self.perfil(consultas=0).status_code, 401)
+        self.assertEqual(autenticacao.USUARIOS.metricas()['invalidadas'], 2)
+
+    def test_troca_de_senha_invalida(self):
+        self.perfil()
+        with self.captureOnCommitCallbacks(execute=True):
+            usuario = Usuario.objects.get(pk=self.usuario.pk)
+            usuario.set_password('senha456')
+            usuario.save()
+        self.perfil(consultas=1)
+
+    def test_token_revogado_pela_senha_mesmo_em_cache(self):
+        def token(senha_hash):
+            acesso = RefreshToken.for_user(self.usuario).access_token
+            acesso['hash_password'] = get_md5_hash_password(senha_hash)
+            return f'Bearer {acesso}'
+
+        client = APIClient()
+        url = reverse('usuarios:usuario-perfil')
+        with mock.patch.object(autenticacao.api_settings,
+                               'CHECK_REVOKE_TOKEN', True, create=True):
+            client.credentials(HTTP_AUTHORIZATION=token(self.usuario.password))
+            self.assertEqual(client.get(url).status_code, 200)
+            # O usuário em cache tem a senha antiga: token de outra senha é
+            # recusado sem ir ao banco
+            client.credentials(HTTP_AUTHORIZATION=token('outra'))
+            with CaptureQueriesContext(connection) as ctx:
+                self.assertEqual(client.get(url).status_code, 401)
+            self.assertEqual(len(ctx.captured_queries), 0)
+
+    def test_versao_trocada_por_outro_processo(self):
+        self.perfil()
+        # Outro processo só altera a versão compartilhada
+        cache.set(autenticacao._chave_versao(self.usuario.pk), 1)
+        self.perfil(consultas=1)
+        self.perfil(consultas=0)
+
+    @override_settings(AUTENTICACAO_CACHE_TAMANHO=1)
+    def test_lru_limitado(self):
+        self.perfil()
+        self.perfil(self.admin)
+        self.perfil(consultas=1)
+        self.assertEqual(autenticacao.USUARIOS.metricas()['descartadas'], 2)
+
+    @override_settings(AUTENTICACAO_CACHE_SEGUNDOS=0)
+    def test_cache_desligado(self):
+        self.perfil(consultas=1)
+        self.perfil(consultas=1)
+
+    def test_validade(self):
+        self.perfil()
+        with mock.patch.object(
+                autenticacao.time, 'monotonic',
+                return_value=time.monotonic() + 61):
+            self.perfil(consultas=1)
+        self.assertEqual(autenticacao.USUARIOS.metricas()['expiradas'], 1)
+
+    def test_metricas_apenas_admin(self):
+        client = APIClient()
+        client.force_authenticate(self.usuario)
+        url = reverse('usuarios:metricas-autenticacao')
+        self.assertEqual(client.get(url).status_code, 403)
+        client.force_authenticate(self.admin)
+        self.assertIn('taxa_acerto', client.get(url).data)
+
+    def test_schema_openapi_com_jwt(self):
+        with GENERATOR_STATS.silence():
+            schema = SchemaGenerator().get_schema(request=None, public=True)
+        self.assertEqual(
+            schema['components']['securitySchemes']['jwtAuth'],
+            {'type': 'http', 'scheme': 'bearer', 'bearerFormat': 'JWT'})
+        perfil = schema['paths']['/api/usuarios/perfil/']['get']
+        self.assertIn({'jwtAuth': []}, perfil['security'])
+
+
+class LimitesTests(TestCase):
+    """Baldes de tokens no login, na troca de senha e nas escritas"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = Usuario.objects.create_user(
+            username='maria', password='senha123',
+            nome_completo='Maria Costa', tipo_usuario='usuario'
+        )
+        cls.admin = Usuario.objects.create_user(
+            username='admin', password='senha123',
+            nome_completo='Administrador', tipo_usuario='admin'
+        )
+
+    def setUp(self):
+        isolados = ArquivosIsolados()
+        isolados.enable()
+        self.addCleanup(isolados.disable)
+        limites.CONTADORES.clear()
+
+    def taxas(self, **taxas):
+        return override_settings(LIMITES_TAXAS=taxas)
+
+    def login(self, username, ip='10.0.0.1'):
+        return APIClient().post(
+            reverse('usuarios:login'),
+            {'username': username, 'password': 'errada'},
+            format='json', REMOTE_ADDR=ip)
+
+    def test_login_por_usuario_e_por_ip(self):
+        with self.taxas(login='3/min', login_usuario='2/min'):
+            self.assertEqual(self.login('maria').status_code, 401)
+            self.assertEqual(self.login('Maria', '10.0.0.2').status_code, 401)
+            with mock.patch('usuarios.auth_views.authenticate') as autenticar:
+                response = self.login('maria', '10.0.0.3')
+            autenticar.assert_not_called()
+            self.assertEqual(response.status_code, 429)
+            self.assertEqual(response['Retry-After'], '30')
+
+            # O IP 10.0.0.1 ainda tem tokens para outros usuários
+            self.assertEqual(self.login('joao').status_code, 401)
+            self.assertEqual(self.login('ana').status_code, 401)
+            self.assertEqual(self.login('pedro').status_code, 429)
+
+        self.assertEqual(
+            self.admin_get('usuarios:metricas-limites').data['escopos'],
+            {
+                'login': {'permitidas': 5, 'negadas': 1},
+                'login_usuario': {'permitidas': 4, 'negadas': 1},
+            }
+        )
+
+    def test_x_forwarded_for_do_cliente_nao_troca_o_balde(self):
+        with self.taxas(login='2/min'):
+            respostas = [
+                APIClient().post(
+                    reverse('usuarios:login'),
+                    {'username': f'u{i}', 'password': 'errada'},
+                    format='json', REMOTE_ADDR='10.0.0.1',
+                    HTTP_X_FORWARDED_FOR=f'192.0.2.{i}')
+                for i in range(4)
+            ]
+        self.assertEqual(
+            [r.status_code for r in respostas], [401, 401, 429, 429])
+
+    def test_x_forwarded_for_atras_de_proxy_confiavel(self):
+        rest = dict(settings.REST_FRAMEWORK, NUM_PROXIES=1)
+        with self.taxas(login='2/min'), override_settings(REST_FRAMEWORK=rest):
+            respostas = [
+                APIClient().post(
+                    reverse('usuarios:login'),
+                    {'username': f'u{i}', 'password': 'errada'},
+                    format='json', REMOTE_ADDR='172.16.0.1',
+                    # O cliente forja o início; o proxy acrescenta o IP real
+                    HTTP_X_FORWARDED_FOR=f'192.0.2.{i}, 10.0.0.{i // 2}')
+                for i in range(4)
+            ]
+        self.assertEqual(
+            [r.status_code for r in respostas], [401, 401, 401, 401])
+        with self.taxas(login='2/min'), override_settings(REST_FRAMEWORK=rest):
+            response = APIClient().post(
+                reverse('usuarios:login'),
+                {'username': 'u9', 'password': 'errada'},
+                format='json', REMOTE_ADDR='172.16.0.1',
+                HTTP_X_FORWARDED_FOR='192.0.2.99, 10.0.0.0')
+        self.assertEqual(response.status_code, 429)
+
+    def admin_get(self, rota):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        return client.get(reverse(rota))
+
+    def test_troca_de_senha(self):
+        client = APIClient()
+        client.force_authenticate(self.usuario)
+        dados = {'senha_atual': 'errada', 'nova_senha': 'senha456',
+                 'confirmar_senha': 'senha456'}
+        url = reverse('usuarios:alterar-senha')
+        with self.taxas(senha='1/h'):
+            self.assertEqual(client.post(url, dados).status_code, 400)
+            response = client.post(url, dados)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '3600')
+
+    def test_escritas_por_escopo(self):
+        client = APIClient()
+        client.force_authenticate(self.usuario)
+        url = reverse('usuarios:usuario-perfil')
+        with self.taxas(escrita='1/min'):
+            self.assertEqual(
+                client.patch(url, {'departamento': 'RH'}).status_code, 200)
+            self.assertEqual(
+                client.patch(url, {'departamento': 'TI'}).status_code, 429)
+            # Leituras não consomem
+            self.assertEqual(client.get(url).status_code, 200)
+
+        # Cada view pode ter o próprio escopo (`throttle_scope`)
+        request = SimpleNamespace(method='POST', user=self.usuario)
+        self.assertEqual(
+            limites.EscritaThrottle().baldes(
+                request, SimpleNamespace(throttle_scope='anexos')),
+            [('anexos', f'u{self.usuario.pk}')]
+        )
+
+    def test_baldes_compartilhados_e_reabastecidos(self):
+        caminho = settings.LIMITES_ARQUIVO
+        # Duas tabelas sobre o mesmo arquivo, como em dois processos
+        primeira = limites.Baldes(caminho, 64)
+        segunda = limites.Baldes(caminho, 64)
+        self.addCleanup(primeira.fechar)
+        self.addCleanup(segunda.fechar)
+
+        self.assertEqual(primeira.consumir('x', 2, 1, agora=100), (True, 0.0))
+        self.assertEqual(segunda.consumir('x', 2, 1, agora=100), (True, 0.0))
+        self.assertEqual(primeira.consumir('x', 2, 1, agora=100), (False, 1.0))
+        self.assertEqual(segunda.consumir('x', 2, 1, agora=100.5), (False, 0.5))
+        self.assertEqual(primeira.consumir('x', 2, 1, agora=101), (True, 0.0))
+        self.assertEqual(segunda.consumir('y', 2, 1, agora=101), (True, 0.0))
+
+    def test_conjunto_cheio_reaproveita_o_mais_antigo(self):
+        tabela = limites.Baldes(settings.LIMITES_ARQUIVO + '-um', limites.VIAS)
+        self.addCleanup(tabela.fechar)
+        self.assertEqual(tabela.consumir('antiga', 1, 1, agora=0), (True, 0.0))
+        for i in range(limites.VIAS):
+            tabela.consumir(f'chave{i}', 1, 1, agora=1 + i)
+        # 'antiga' foi substituída: volta com o balde cheio
+        self.assertEqual(tabela.consumir('antiga', 1, 1, agora=10), (True, 0.0))
+        self.assertEqual(tabela.consumir('chave3', 1, 1, agora=4), (False, 1.0))
+
+    def test_interpretar_taxa(self):
+        self.assertEqual(limites.interpretar_taxa('5/min'), (5, 5 / 60))
+        self.assertEqual(limites.interpretar_taxa('10/s'), (10, 10))
+        self.assertEqual(limites.interpretar_taxa('2/hora'), (2, 2 / 3600))
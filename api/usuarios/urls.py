@@ -10,6 +10,9 @@ urlpatterns = [
     path('login/', login_view, name='login'),
     path('logout/', logout_view, name='logout'),
     path('token/refresh/', refresh_token_view, name='token-refresh'),
+    path('autenticacao/metricas/', views.metricas_autenticacao,
+         name='metricas-autenticacao'),
+    path('limites/metricas/', views.metricas_limites, name='metricas-limites'),
 
     # Usuários
     path('', views.UsuarioListCreateView.as_view(), name='usuario-list-create'),
@@ -1,13 +1,18 @@
 import re
 
+from chamados.campos import projetar
 from chamados.filters import UsuarioFilter
+from chamados.referencia import TECNICOS, ListaReferenciaMixin
 from django.contrib.auth import authenticate
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import generics, permissions, status
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import (api_view, permission_classes,
+                                       throttle_classes)
 from rest_framework.filters import OrderingFilter, SearchFilter
 from rest_framework.response import Response
 
+from . import limites
+from .autenticacao import USUARIOS
 from .models import Usuario
 from .serializers import (TecnicoSerializer, UsuarioCreateSerializer,
                           UsuarioListSerializer, UsuarioSerializer)
@@ -25,6 +30,16 @@ def is_valid_phone(phone):
     return len(digits_only) == 11
 
 
+def projetar_leitura(queryset, view):
+    """Em GET com ?fields=, lê só as colunas dos campos pedidos"""
+    if view.request.method != 'GET':
+        return queryset
+    plano = view.get_serializer_class().plano_da_requisicao(view.request)
+    if not plano or not plano[0]:
+        return queryset
+    return projetar(queryset, plano[0])
+
+
 class UsuarioListCreateView(generics.ListCreateAPIView):
     """View para listar e criar usuários"""
 
@@ -41,6 +56,9 @@ class UsuarioListCreateView(generics.ListCreateAPIView):
             return UsuarioCreateSerializer
         return UsuarioListSerializer
 
+    def get_queryset(self):
+        return projetar_leitura(super().get_queryset(), self)
+
 
 class UsuarioDetailView(generics.RetrieveUpdateDestroyAPIView):
     """View para detalhar, atualizar e deletar usuário"""
@@ -49,24 +67,32 @@ class UsuarioDetailView(generics.RetrieveUpdateDestroyAPIView):
     serializer_class = UsuarioSerializer
     permission_classes = [permissions.IsAuthenticated]
 
+    def get_queryset(self):
+        return projetar_leitura(super().get_queryset(), self)
+
 
-class TecnicoListView(generics.ListAPIView):
-    """View para listar apenas técnicos"""
+class TecnicoListView(ListaReferenciaMixin, generics.ListAPIView):
+    """View para listar apenas técnicos (servida pelo cache de referência)"""
 
     queryset = Usuario.objects.filter(tipo_usuario='tecnico', ativo=True)
+    referencia = TECNICOS
     serializer_class = TecnicoSerializer
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [SearchFilter, OrderingFilter]
     search_fields = ['nome_completo', 'email']
     ordering = ['nome_completo']
 
+    def get_queryset(self):
+        return projetar_leitura(super().get_queryset(), self)
+
 
 @api_view(['GET', 'PATCH'])
 @permission_classes([permissions.IsAuthenticated])
 def usuario_perfil(request):
     """Retorna ou atualiza o perfil do usuário logado"""
     if request.method == 'GET':
-        serializer = UsuarioSerializer(request.user)
+        serializer = UsuarioSerializer(
+            request.user, context={'request': request})
         return Response(serializer.data)
 
     elif request.method == 'PATCH':
@@ -94,6 +120,7 @@ def usuario_perfil(request):
 
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
+@throttle_classes([limites.SenhaThrottle])
 def alterar_senha(request):
     """Altera a senha do usuário logado"""
 
@@ -136,3 +163,27 @@ def alterar_senha(request):
     request.user.save()
 
     return Response({'detail': 'Senha alterada com sucesso'})
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def metricas_autenticacao(request):
+    """Acertos e faltas do cache de autenticação neste processo"""
+    if request.user.tipo_usuario != 'admin':
+        return Response(
+            {'error': 'Apenas administradores podem ver as métricas'},
+            status=status.HTTP_403_FORBIDDEN
+        )
+    return Response(USUARIOS.metricas())
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def metricas_limites(request):
+    """Requisições permitidas e negadas por escopo de limite neste processo"""
+    if request.user.tipo_usuario != 'admin':
+        return Response(
+            {'error': 'Apenas administradores podem ver as métricas'},
+            status=status.HTTP_403_FORBIDDEN
+        )
+    return Response(limites.metricas())
@@ -177,6 +177,7 @@ export interface Chamado {
   encerrado_em?: string
   anexos?: AnexoChamado[]
   historico?: HistoricoChamado[]
+  historico_truncado?: boolean
 }
 
 export interface ChamadoCreate {
@@ -363,8 +364,9 @@ export const chamadoService = {
     return response.data
   },
 
-  async atualizarStatus(id: number, status: string): Promise<Chamado> {
-    const response = await api.patch(`/chamados/${id}/status/`, { status })
+  async atualizarStatus(id: number, status: string, statusEsperado?: string): Promise<Chamado> {
+    const dados = statusEsperado ? { status, status_esperado: statusEsperado } : { status }
+    const response = await api.patch(`/chamados/${id}/status/`, dados)
     return response.data
   },
 
@@ -372,16 +374,63 @@ export const chamadoService = {
     await api.delete(`/chamados/${id}/`)
   },
 
-  async meusChamados(params?: any): Promise<Chamado[]> {
+  async meusChamados(params?: any): Promise<{ results: Chamado[], count: number }> {
     const response = await api.get('/chamados/meus-chamados/', { params })
     return response.data
   },
 
-  async chamadosTecnico(params?: any): Promise<Chamado[]> {
+  async chamadosTecnico(params?: any): Promise<{ results: Chamado[], count: number }> {
     const response = await api.get('/chamados/chamados-tecnico/', { params })
     return response.data
   },
 
+  // Sincronização incremental: repetir com `desde` enquanto `tem_mais`
+  async listarAlteracoes(desde?: string): Promise<{ alteracoes: Chamado[], exclusoes: { id: number, numero: string, excluido_em: string }[], desde: string, tem_mais: boolean }> {
+    const response = await api.get('/chamados/alteracoes/', { params: desde ? { desde } : undefined })
+    return response.data
+  },
+
+  // Eventos em tempo real (SSE); retorna a função que encerra a conexão.
+  // `indisponivel` (servidor sem ASGI) e `ressincronizar` pedem listarAlteracoes
+  assinarEventos(onEvento: (tipo: string, dados: any) => void): () => void {
+    const controller = new AbortController()
+    const conectar = async () => {
+      while (!controller.signal.aborted) {
+        try {
+          const response = await fetch(`${api.defaults.baseURL}/chamados/eventos/`, {
+            headers: {
+              Authorization: `Bearer ${localStorage.getItem('access_token')}`,
+              Accept: 'text/event-stream',
+            },
+            signal: controller.signal,
+          })
+          if (!response.ok || !response.body) return
+          const reader = response.body.pipeThrough(new TextDecoderStream()).getReader()
+          let buffer = ''
+          for (;;) {
+            const { value, done } = await reader.read()
+            if (done) break
+            buffer += value
+            const blocos = buffer.split('\n\n')
+            buffer = blocos.pop() || ''
+            for (const bloco of blocos) {
+              const tipo = /^event: (.*)$/m.exec(bloco)?.[1]
+              const dados = /^data: (.*)$/m.exec(bloco)?.[1]
+              if (tipo && dados) onEvento(tipo, JSON.parse(dados))
+              if (tipo === 'indisponivel') return
+            }
+          }
+        } catch {
+          if (controller.signal.aborted) return
+        }
+        // O servidor encerra cada conexão periodicamente: reconectar
+        await new Promise((resolve) => setTimeout(resolve, 5000))
+      }
+    }
+    conectar()
+    return () => controller.abort()
+  },
+
   async uploadAnexo(chamadoId: number, arquivo: File): Promise<AnexoChamado> {
     if (!chamadoId || chamadoId === undefined || isNaN(chamadoId)) {
       console.error('ID do chamado inválido para upload:', chamadoId)
@@ -401,6 +450,16 @@ export const chamadoService = {
     return response.data
   },
 
+  async listarHistorico(chamadoId: number, cursorUrl?: string): Promise<{ results: HistoricoChamado[], next: string | null, previous: string | null }> {
+    const response = await api.get(cursorUrl || `/chamados/${chamadoId}/historico/`)
+    return response.data
+  },
+
+  async listarAnexos(chamadoId: number, cursorUrl?: string): Promise<{ results: AnexoChamado[], next: string | null, previous: string | null }> {
+    const response = await api.get(cursorUrl || `/chamados/${chamadoId}/anexos/`)
+    return response.data
+  },
+
   async deletarAnexo(anexoId: number): Promise<void> {
     await api.delete(`/chamados/anexos/${anexoId}/`)
   },